@@ -9,6 +9,8 @@ export interface ProcessCallResponse {
   lead_name?: string
   lead_email?: string
   company?: string
+  digested?: boolean
+  stage_timings?: Record<string, number>
 }
 
 export interface ProcessEmailResponse {
@@ -18,6 +20,7 @@ export interface ProcessEmailResponse {
   lead_tier: 'hot' | 'warm' | 'cold'
   suggested_response: string
   extracted_data?: Record<string, any>
+  stage_timings?: Record<string, number>
 }
 
 export interface LeadUpdate {
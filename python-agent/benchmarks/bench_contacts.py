@@ -0,0 +1,91 @@
+"""Benchmark the single-pass contact extractor against the original per-field regexes on adversarial inputs.
+
+Growth is the time ratio per doubling of the input: near 2x is linear,
+near 4x is the quadratic backtracking of the original company and email
+patterns. The original is skipped at sizes where its previous run already
+took longer than --max-seconds.
+
+Run from python-agent/:  python -m benchmarks.bench_contacts [--sizes 1000,2000,4000,8000,16000,64000] [--max-seconds 2]
+"""
+import argparse
+import math
+import re
+import time
+from typing import Callable, Dict, Optional
+from utils.helpers import extract_contacts
+
+def legacy_extract(text: str) -> Dict[str, Optional[str]]:
+    """extract_email, extract_phone and extract_company_name as they were before the contact extractor"""
+    email = re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
+    phone = re.search(r'(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}', text)
+    company = None
+    for pattern in (
+        r'(?:at|from|with)\s+([A-Z][a-zA-Z\s&]+(?:Inc|LLC|Corp|Ltd|Company|Co))',
+        r'([A-Z][a-zA-Z\s&]+(?:Inc|LLC|Corp|Ltd))',
+    ):
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            company = match.group(1).strip()
+            break
+    return {
+        "email": email.group(0) if email else None,
+        "phone": phone.group(0) if phone else None,
+        "company": company,
+    }
+
+# Inputs that defeat each original pattern, by name: size -> text
+ADVERSARIAL: Dict[str, Callable[[int], str]] = {
+    "prose without companies": lambda n: ("we spoke with the team about the rollout plans " * (n // 48 + 1))[:n],
+    "one long word": lambda n: "a" * n,
+    "capitalised words": lambda n: ("Acme Widgets " * (n // 13 + 1))[:n],
+    "local part, no domain": lambda n: ("a." * (n // 2 + 1))[:n] + "@",
+    "many @ signs": lambda n: ("a@" * (n // 2 + 1))[:n],
+    "digit run": lambda n: "5" * n,
+}
+
+SAMPLE = (
+    "Hi, this is Dana Smith calling from Acme Corp about our billing problems. "
+    "You can reach me at dana.smith@acme.example or on +1 555-123-4567. "
+    "We currently use a tool from Globex Inc but it is too slow for the team. "
+)
+
+def timed(extract: Callable[[str], Dict], text: str) -> float:
+    started = time.perf_counter()
+    extract(text)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,2000,4000,8000,16000,64000,256000",
+                        help="comma-separated input lengths in characters")
+    parser.add_argument("--max-seconds", type=float, default=2.0,
+                        help="stop timing the original once one run takes this long")
+    args = parser.parse_args()
+    sizes = [int(value) for value in args.sizes.split(",")]
+
+    print(f"sample transcript: original {legacy_extract(SAMPLE)}")
+    print(f"                   extractor {extract_contacts(SAMPLE)}")
+
+    for name, make in ADVERSARIAL.items():
+        print(f"\n{name}")
+        print(f"{'chars':>8} | {'original s':>11}{'growth':>8} | {'extractor s':>12}{'growth':>8}")
+        previous: Dict[str, Optional[float]] = {"original": None, "extractor": None}
+        previous_size = None
+        for size in sizes:
+            text = make(size)
+            cells = []
+            for label, extract, width in (("original", legacy_extract, 11), ("extractor", extract_contacts, 12)):
+                last = previous[label]
+                if last is not None and last > args.max_seconds:
+                    cells.append(f"{'skipped':>{width}}{'':>8}")
+                    continue
+                seconds = timed(extract, text)
+                # Normalised to one doubling of the input, whatever the step between sizes
+                growth = f"{(seconds / last) ** (1 / math.log2(size / previous_size)):.1f}x" if last else ""
+                cells.append(f"{seconds:>{width}.4f}{growth:>8}")
+                previous[label] = seconds
+            previous_size = size
+            print(f"{size:>8} | {cells[0]} | {cells[1]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Benchmark call extraction latency and Claude token use against transcript length, with and without the digest.
+
+Claude is replaced by an in-process fake whose latency follows a simple
+model (fixed overhead + prefill per input token + decode per output token),
+compressed by --time-scale so the run finishes quickly; reported latencies
+are scaled back up. Token counts use the local estimator. The rate limiter
+is off, so the "full" rows leave out the wait for CLAUDE_TPM quota that
+long undigested prompts cause in production (a prompt over the quota waits
+for a whole minute's refill).
+
+Run from python-agent/:  python -m benchmarks.bench_digest [--lengths 2000,10000,50000] [--time-scale 0.01]
+"""
+import os
+
+# Before the app modules read their config: no cache, no limiter, quiet logs
+os.environ.setdefault("CLAUDE_API_KEY", "benchmark")
+os.environ["CACHE_ENABLED"] = "false"
+os.environ["CLAUDE_RPM"] = "0"
+os.environ["CLAUDE_TPM"] = "0"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import argparse
+import asyncio
+import random
+import time
+from services.digest import DigestService
+from services.intent import IntentService
+from services.llm import LLMService
+from services.providers import providers
+from utils.tokens import count_tokens
+
+OVERHEAD_SECONDS = 0.5
+PREFILL_SECONDS_PER_TOKEN = 1 / 20000
+DECODE_SECONDS_PER_TOKEN = 1 / 50
+CONTEXT_LIMIT_TOKENS = 200_000
+
+SENTENCES = [
+    "Thanks for taking the time today.",
+    "We are a team of about forty people and our current CRM is too slow for us.",
+    "Our budget for this is roughly fifty thousand dollars a year.",
+    "Can your API integrate with our billing system?",
+    "I would need the director of operations to approve anything over that.",
+    "We are hoping to have something live by the end of next quarter.",
+    "Security and compliance reviews usually take us about a month.",
+    "Honestly the reporting is the biggest problem for my managers.",
+    "Could you send over a proposal and maybe set up a demo next week?",
+    "Sure, that sounds good, let me check the calendar.",
+]
+
+class Usage:
+    def __init__(self, input_tokens: int, output_tokens: int):
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+class Block:
+    def __init__(self, text: str):
+        self.type = "text"
+        self.text = text
+
+class Message:
+    def __init__(self, text: str, usage: Usage):
+        self.content = [Block(text)]
+        self.usage = usage
+
+class FakeClaude:
+    def __init__(self, time_scale: float):
+        self.time_scale = time_scale
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.requests = 0
+        self.over_context = 0
+
+    async def create(self, model: str, max_tokens: int, messages: list, system=None, **kwargs) -> Message:
+        if isinstance(system, list):
+            system = "\n\n".join(block["text"] for block in system)
+        prompt = f"{system or ''}\n\n{messages[0]['content']}"
+        input_tokens = count_tokens(prompt)
+        if "Classify the intent" in prompt:
+            text, output_tokens = '{"intent": "sales_inquiry", "confidence": 0.9}', 20
+        elif "JSON array" in prompt:
+            text, output_tokens = '["reporting", "billing integration"]', 30
+        elif "Extract lead information" in prompt:
+            text, output_tokens = '{"name": "Dana", "email": null, "phone": null, "company": null}', 40
+        elif "next best action" in prompt:
+            text, output_tokens = "send_proposal", 5
+        else:
+            # Notes, digests and emails use about half their budget
+            output_tokens = max_tokens // 2
+            text = " ".join(["- fact"] * (output_tokens // 2))
+
+        self.requests += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        if input_tokens > CONTEXT_LIMIT_TOKENS:
+            self.over_context += 1
+        latency = OVERHEAD_SECONDS + input_tokens * PREFILL_SECONDS_PER_TOKEN + output_tokens * DECODE_SECONDS_PER_TOKEN
+        await asyncio.sleep(latency * self.time_scale)
+        return Message(text, Usage(input_tokens, output_tokens))
+
+def make_transcript(tokens: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts, total = [], 0
+    while total < tokens:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        total += count_tokens(sentence)
+    return " ".join(parts)
+
+async def run_extractors(text: str, digest: bool) -> None:
+    """The call pipeline's Claude stages after transcription"""
+    intent, llm = IntentService(), LLMService()
+    if digest:
+        text = await DigestService().prepare(text)
+    lead = {"score": 60, "tier": "warm"}
+    _, requirements, lead_info, _ = await asyncio.gather(
+        intent.detect_intent(text),
+        llm.extract_requirements(text),
+        llm.extract_lead_info(text),
+        llm.suggest_next_step(text, lead),
+    )
+    await llm.generate_email_response(text, {**lead_info, **lead, "requirements": requirements})
+
+async def measure(fake: FakeClaude, text: str, digest: bool) -> dict:
+    fake.input_tokens = fake.output_tokens = fake.requests = fake.over_context = 0
+    started = time.perf_counter()
+    await run_extractors(text, digest)
+    elapsed = (time.perf_counter() - started) / fake.time_scale
+    return {
+        "seconds": elapsed,
+        "requests": fake.requests,
+        "input": fake.input_tokens,
+        "output": fake.output_tokens,
+        "over_context": fake.over_context,
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", default="1000,5000,10000,25000,50000,100000,250000",
+                        help="comma-separated transcript lengths in tokens")
+    parser.add_argument("--time-scale", type=float, default=0.01,
+                        help="fraction of modelled provider latency actually slept")
+    args = parser.parse_args()
+
+    fake = FakeClaude(args.time_scale)
+    providers.claude_messages.create = fake.create
+
+    print(f"{'tokens':>8} | {'mode':<7}{'latency s':>10}{'requests':>9}{'input tok':>11}{'output tok':>11}{'over ctx':>9}")
+    for length in (int(value) for value in args.lengths.split(",")):
+        text = make_transcript(length)
+        for mode, digest in (("full", False), ("digest", True)):
+            row = await measure(fake, text, digest)
+            print(f"{length:>8} | {mode:<7}{row['seconds']:>10.2f}{row['requests']:>9}"
+                  f"{row['input']:>11}{row['output']:>11}{row['over_context']:>9}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
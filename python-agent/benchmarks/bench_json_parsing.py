@@ -0,0 +1,179 @@
+"""Check and time the shared model-response parser against the per-stage parsing it replaced.
+
+Uses the response fixtures in benchmarks/fixtures/llm_responses.jsonl (one
+per line: stage, case, response and the expected parsed value, or null when
+the response should fall back):
+- every fixture must parse to its expected value;
+- a seeded fuzz run wraps each fixture in fences and prose (which must not
+  change the result) and truncates, deletes and injects characters (which
+  may fail, but must never raise);
+- the time per parse of both parsers, on clean JSON, on all fixtures
+  (where the original mostly gives up early) and on a long response. The
+  parser is a robustness change, not a speedup: it costs a few microseconds
+  more per response, and only the scan-and-repair fallback is much slower.
+
+Exits with status 1 on a fixture mismatch, a fuzz mismatch or an exception.
+
+Run from python-agent/:  python -m benchmarks.bench_json_parsing [--fuzz 2000] [--seed 7]
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, List
+from services.schemas import IntentResult, LeadInfo, Requirements
+from utils.json_parsing import parse_response
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "llm_responses.jsonl")
+
+def _parse_new(stage: str, text: str) -> Any:
+    if stage == "detect_intent":
+        result = parse_response(stage, text, IntentResult)
+        return result and result.model_dump()
+    if stage == "extract_requirements":
+        result = parse_response(stage, text, Requirements)
+        return None if result is None else result.root
+    result = parse_response(stage, text, LeadInfo)
+    return result and result.model_dump()
+
+def _legacy_intent(text: str) -> Any:
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0].strip()
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0].strip()
+    result = json.loads(text)
+    if result.get('intent') not in ['sales_inquiry', 'performance_query', 'technical_question', 'general_inquiry']:
+        result['intent'] = 'general_inquiry'
+    return result
+
+def _legacy_requirements(text: str) -> Any:
+    match = re.search(r'\[.*?\]', text, re.DOTALL)
+    if match:
+        requirements = json.loads(match.group(0))
+        if isinstance(requirements, list):
+            return requirements
+    return None
+
+def _legacy_lead_info(text: str) -> Any:
+    match = re.search(r'\{.*?\}', text, re.DOTALL)
+    return json.loads(match.group(0)) if match else None
+
+LEGACY: Dict[str, Callable[[str], Any]] = {
+    "detect_intent": _legacy_intent,
+    "extract_requirements": _legacy_requirements,
+    "extract_lead_info": _legacy_lead_info,
+}
+
+def _parse_legacy(stage: str, text: str) -> Any:
+    """The parsing each stage did before the shared parser; None where it raised or found nothing"""
+    try:
+        return LEGACY[stage](text)
+    except Exception:
+        return None
+
+# Rewrites that keep the answer intact, so the parse must not change
+PRESERVING: List[Callable[[str, random.Random], str]] = [
+    lambda text, rng: f"```json\n{text}\n```",
+    lambda text, rng: f"```\n{text}\n```\n",
+    lambda text, rng: "Here is the result you asked for:\n\n" + text,
+    lambda text, rng: text + "\n\nLet me know if you need the {details} in another format.",
+    lambda text, rng: f"Sure. {text} Hope this helps!",
+]
+
+def _truncate(text: str, rng: random.Random) -> str:
+    return text[:rng.randrange(len(text) + 1)]
+
+def _delete(text: str, rng: random.Random) -> str:
+    i = rng.randrange(len(text) + 1)
+    return text[:i] + text[i + rng.randint(1, 3):]
+
+def _inject(text: str, rng: random.Random) -> str:
+    i = rng.randrange(len(text) + 1)
+    return text[:i] + rng.choice('{}[]",:\\\'') + text[i:]
+
+DESTRUCTIVE = [_truncate, _delete, _inject]
+
+def load_fixtures(path: str = FIXTURES) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def check_fixtures(fixtures: List[Dict[str, Any]]) -> int:
+    print(f"{'stage':<22}{'fixtures':>9}{'original':>10}{'parser':>8}")
+    failures = 0
+    for stage in LEGACY:
+        cases = [fixture for fixture in fixtures if fixture["stage"] == stage]
+        legacy = sum(_parse_legacy(stage, case["response"]) == case["expected"] for case in cases)
+        new = 0
+        for case in cases:
+            result = _parse_new(stage, case["response"])
+            if result == case["expected"]:
+                new += 1
+            else:
+                failures += 1
+                print(f"  MISMATCH {stage} / {case['case']}: {result!r} != {case['expected']!r}")
+        print(f"{stage:<22}{len(cases):>9}{legacy:>10}{new:>8}")
+    return failures
+
+def fuzz(fixtures: List[Dict[str, Any]], iterations: int, seed: int) -> int:
+    rng = random.Random(seed)
+    failures = 0
+    for _ in range(iterations):
+        case = rng.choice(fixtures)
+        stage, text = case["stage"], case["response"]
+        # A truncated response has nothing after it, so only complete ones are wrapped
+        if case["expected"] is not None and not case["case"].startswith("truncated") and rng.random() < 0.5:
+            mutated = rng.choice(PRESERVING)(text, rng)
+            expected = case["expected"]
+        else:
+            mutated = rng.choice(DESTRUCTIVE)(text, rng)
+            expected = Ellipsis
+        try:
+            result = _parse_new(stage, mutated)
+        except Exception as e:
+            failures += 1
+            print(f"  RAISED {type(e).__name__}: {e} on {stage} {mutated!r}")
+            continue
+        if expected is not Ellipsis and result != expected:
+            failures += 1
+            print(f"  MISMATCH {stage} {mutated!r}: {result!r} != {expected!r}")
+    print(f"fuzz: {iterations} mutated responses, {failures} failures")
+    return failures
+
+def _per_parse_us(parse: Callable[[str, str], Any], cases: List[tuple], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for stage, text in cases:
+            parse(stage, text)
+    return (time.perf_counter() - started) / (repeat * len(cases)) * 1e6
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fuzz", type=int, default=2000, help="mutated responses to parse")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=200, help="timing passes over the fixtures")
+    args = parser.parse_args(argv)
+    # Every failed parse logs a warning; only the summary matters here
+    logging.getLogger("utils.json_parsing").setLevel(logging.ERROR)
+
+    fixtures = load_fixtures()
+    failures = check_fixtures(fixtures)
+    failures += fuzz(fixtures, args.fuzz, args.seed)
+
+    cases = [(fixture["stage"], fixture["response"]) for fixture in fixtures]
+    plain = [(fixture["stage"], fixture["response"]) for fixture in fixtures if fixture["case"] == "plain"]
+    long_response = [("extract_requirements",
+                      "Summary of the call. " * 1000 + '["Faster reporting", "Single sign-on"]')]
+    print(f"\n{'us per parse':<22}{'original':>10}{'parser':>8}")
+    for label, timed_cases in (("plain JSON", plain), ("all fixtures", cases), ("20 KB response", long_response)):
+        legacy_us = _per_parse_us(_parse_legacy, timed_cases, args.repeat)
+        new_us = _per_parse_us(_parse_new, timed_cases, args.repeat)
+        print(f"{label:<22}{legacy_us:>10.1f}{new_us:>8.1f}")
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
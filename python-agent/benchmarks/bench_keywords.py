@@ -0,0 +1,121 @@
+"""Benchmark the single-pass keyword engine against the original substring scans.
+
+The engine's point is word-boundary matching (no "answer" -> "we"), not speed:
+it wins on keyword-rich text, where it stops early, and is slower than the
+substring checks on text without keywords, which it must scan in full.
+
+That slower case is accepted rather than pre-checked: it is one linear pass,
+a few milliseconds per 100 KB (about 25k tokens, already several seconds of
+Claude time), and it needs a transcript that lacks a whole category. Any
+pre-check cheap enough to help would be another substring scan, which is
+what the keyword-rich case, the common one, pays for. The summary line
+prints the worst-case extra time per 100 KB.
+
+Run from python-agent/:  python -m benchmarks.bench_keywords [--size 100000] [--repeat 20]
+"""
+import argparse
+import random
+import time
+from services.analysis import AnalysisService
+from services.intent import IntentService
+
+VOCABULARY = (
+    "the a we our team answer budget price priced cost customer month weekly soon answered "
+    "issue problem need needs wanted integration api apiary connect support helpful scale "
+    "demo product service status doing performance metrics how are you to implement setup "
+    "thanks call meeting follow up proposal contract security encryption growth tailor"
+).split()
+
+def legacy_score_lead(transcript: str, email_body: str = "") -> dict:
+    """score_lead as it was before the keyword engine"""
+    score = 0
+    factors = {}
+    text = (transcript + " " + email_body).lower()
+    checks = [
+        ('budget_mentioned', 25, ['budget', 'price', 'cost', '$', 'dollar', 'afford', 'pricing', 'quote']),
+        ('timeline_clear', 20, ['quarter', 'month', 'week', 'soon', 'asap', 'urgent', 'timeline', 'deadline', 'when']),
+        ('pain_points_clear', 20, ['problem', 'issue', 'challenge', 'struggle', 'slow', 'difficult', 'need', 'want', 'looking for']),
+        ('authority_indicated', 15, ['we', 'team', 'company', 'decision', 'decide', 'approve', 'manager', 'director', 'ceo']),
+    ]
+    for factor, points, keywords in checks:
+        if any(keyword in text for keyword in keywords):
+            score += points
+            factors[factor] = True
+    return {'score': score, 'factors': factors}
+
+def legacy_extract_requirements(text: str) -> list:
+    text_lower = text.lower()
+    patterns = {
+        'integration': ['integrate', 'integration', 'connect', 'api'],
+        'customization': ['custom', 'customize', 'tailor', 'specific'],
+        'scalability': ['scale', 'scalable', 'growth', 'expand'],
+        'security': ['security', 'secure', 'encryption', 'compliance'],
+        'support': ['support', 'help', 'assistance', 'training'],
+    }
+    return [name for name, keywords in patterns.items() if any(k in text_lower for k in keywords)]
+
+def legacy_fallback_intent(text: str) -> dict:
+    text_lower = text.lower()
+    for intent, keywords in [
+        ('sales_inquiry', ['price', 'pricing', 'cost', 'buy', 'purchase', 'product', 'service', 'feature', 'demo']),
+        ('performance_query', ['how are you', 'performance', 'results', 'metrics', 'doing', 'status']),
+        ('technical_question', ['how to', 'implement', 'technical', 'api', 'integration', 'code', 'setup']),
+    ]:
+        if any(keyword in text_lower for keyword in keywords):
+            return {"intent": intent, "confidence": 0.7}
+    return {"intent": "general_inquiry", "confidence": 0.5}
+
+def make_transcript(size: int, seed: int, with_keywords: bool = True) -> str:
+    rng = random.Random(seed)
+    words = VOCABULARY if with_keywords else ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur"]
+    parts, length = [], 0
+    while length < size:
+        word = rng.choice(words)
+        parts.append(word)
+        length += len(word) + 1
+    return " ".join(parts)[:size]
+
+def timed(func, texts, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    return (time.perf_counter() - started) / (repeat * len(texts)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000, help="transcript size in characters")
+    parser.add_argument("--count", type=int, default=5, help="transcripts per corpus")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    analysis = AnalysisService()
+    intent = IntentService()
+    corpora = {
+        "keyword-rich": [make_transcript(args.size, seed) for seed in range(args.count)],
+        # Worst case for both: no category ever matches, so every keyword scans the whole text
+        "no-match": [make_transcript(args.size, seed, with_keywords=False) for seed in range(args.count)],
+    }
+    cases = [
+        ("score_lead", legacy_score_lead, analysis.score_lead),
+        ("extract_requirements", legacy_extract_requirements, analysis.extract_requirements),
+        ("fallback_intent", legacy_fallback_intent, intent._fallback_intent_detection),
+    ]
+
+    print(f"{'corpus':<14}{'case':<22}{'legacy ms':>11}{'engine ms':>11}{'speedup':>9}")
+    extra_ms = 0.0
+    for corpus_name, texts in corpora.items():
+        for name, legacy, engine in cases:
+            legacy_ms = timed(legacy, texts, args.repeat)
+            engine_ms = timed(engine, texts, args.repeat)
+            extra_ms = max(extra_ms, (engine_ms - legacy_ms) * 100_000 / args.size)
+            print(f"{corpus_name:<14}{name:<22}{legacy_ms:>11.3f}{engine_ms:>11.3f}{legacy_ms / engine_ms:>8.1f}x")
+    print(f"\nWorst case extra time: {extra_ms:.1f} ms per 100 KB of text")
+
+    sample = "Great answer, thanks. Our apiary is fine."
+    print(f"\nSubstring false positives on {sample!r}:")
+    print(f"  legacy score_lead factors: {sorted(legacy_score_lead(sample)['factors'])}")
+    print(f"  engine score_lead factors: {sorted(analysis.score_lead(sample)['factors'])}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Measure how many intent/next-step Claude calls the local classifier saves, and at what accuracy.
+
+Trains on 80% of the interactions and evaluates on the rest. For each
+confidence threshold it prints the share of calls answered locally (Claude
+calls saved), the local accuracy on those, and the end-to-end accuracy
+if Claude is right on the rest (--llm-accuracy scales that). It also prints
+the keyword fallback's accuracy and the time per local prediction.
+
+Interactions come from --data, a JSONL export (train_classifier.py export:
+{"text", "intent", "next_step"} per line). Without it a seeded synthetic
+set is generated: label phrases mixed with filler, some phrases borrowed
+from other labels, and a little label noise, which is only a rough stand-in
+for real history.
+
+Run from python-agent/:  python -m benchmarks.bench_local_classifier [--data interactions.jsonl] [--synthetic 4000]
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Dict, List
+from services.intent import INTENT_SIGNALS, keyword_intent
+from services.local_classifier import HEADS, evaluate, train
+
+PHRASES: Dict[str, Dict[str, List[str]]] = {
+    "intent": {
+        "sales_inquiry": ["how much does the enterprise plan cost", "can you send pricing for fifty seats",
+                          "we are looking to buy a license", "is there a discount for annual billing",
+                          "what does the premium tier include", "we want to purchase this for our sales team"],
+        "performance_query": ["how are the numbers looking this month", "what results did the campaign get",
+                              "how is the rollout doing", "can you share the latest metrics",
+                              "what is the status of our account", "how did last quarter perform"],
+        "technical_question": ["how do we set up the api integration", "does it support single sign-on",
+                               "what is the rate limit on the webhook endpoint", "how to implement the sdk in python",
+                               "we get an error when importing the csv", "is there a sandbox for testing the code"],
+        "general_inquiry": ["where is your office located", "who should I talk to about a partnership",
+                            "do you have any openings on the team", "thanks for the newsletter",
+                            "can you update my mailing address", "just wanted to say hello"],
+    },
+    "next_step": {
+        "schedule_demo": ["can we see it in action", "we would like a walkthrough next week",
+                          "show the team how it works", "book a demo for our managers"],
+        "send_proposal": ["send over a proposal", "we need a formal quote for procurement",
+                          "put together the terms for legal", "please share a contract draft"],
+        "follow_up_call": ["let us talk again after the board meeting", "call me back next month",
+                           "we need to think it over", "check in after the holidays"],
+        "send_information": ["send me some documentation", "do you have a brochure",
+                             "share a case study from our industry", "email me the product sheet"],
+        "close_deal": ["we are ready to sign", "let us get the paperwork done today",
+                       "approved by finance, where do I sign", "we will go ahead with the purchase"],
+    },
+}
+
+FILLER = ["thanks for getting back to me", "hope you had a good weekend", "I spoke with my manager yesterday",
+          "our team is about forty people", "we are based in Chicago", "let me know what you think",
+          "we currently use spreadsheets", "best regards", "looking forward to hearing from you"]
+
+def synthetic_interactions(count: int, seed: int, borrowed: float = 0.25, noise: float = 0.03) -> List[Dict]:
+    rng = random.Random(seed)
+    records = []
+    for _ in range(count):
+        labels = {head: rng.choice(list(phrases)) for head, phrases in PHRASES.items()}
+        parts = rng.sample(FILLER, rng.randint(1, 4))
+        for head, label in labels.items():
+            parts += rng.sample(PHRASES[head][label], rng.randint(1, 2))
+            if rng.random() < borrowed:
+                other = rng.choice([candidate for candidate in PHRASES[head] if candidate != label])
+                parts.append(rng.choice(PHRASES[head][other]))
+            if rng.random() < noise:
+                labels[head] = rng.choice(list(PHRASES[head]))
+        rng.shuffle(parts)
+        records.append({"text": ". ".join(parts).capitalize() + ".", **labels})
+    return records
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=None, help="JSONL interactions (default: synthetic)")
+    parser.add_argument("--synthetic", type=int, default=4000, help="synthetic interactions without --data")
+    parser.add_argument("--llm-accuracy", type=float, default=1.0, help="assumed accuracy of Claude on deferred calls")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.data:
+        with open(args.data) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    else:
+        records = synthetic_interactions(args.synthetic, args.seed)
+    random.Random(args.seed).shuffle(records)
+    split = int(len(records) * 0.8)
+    training, test = records[:split], records[split:]
+
+    started = time.perf_counter()
+    classifier = train(training, seed=args.seed)
+    print(f"trained {classifier.version} on {len(training)} interactions in {time.perf_counter() - started:.1f}s")
+
+    report = evaluate(classifier, test)
+    for head, result in report.items():
+        print(f"\n{head}: {result['examples']} test interactions, local accuracy {result['accuracy']:.1%}")
+        if head == "intent":
+            labelled = [record for record in test if record.get("intent") in HEADS["intent"]]
+            keyword = sum(keyword_intent(INTENT_SIGNALS.first_category(record["text"]))["intent"] == record["intent"]
+                          for record in labelled) / len(labelled)
+            print(f"keyword fallback accuracy {keyword:.1%}")
+        print(f"{'threshold':>10}{'calls saved':>13}{'local acc.':>12}{'end-to-end':>12}")
+        for level in result["thresholds"]:
+            local = level["accuracy"] or 0.0
+            end_to_end = level["coverage"] * local + (1 - level["coverage"]) * args.llm_accuracy
+            print(f"{level['threshold']:>10.2f}{level['coverage']:>13.1%}{local:>12.1%}{end_to_end:>12.1%}")
+
+    texts = [record["text"] for record in test[:500]]
+    for head in report:
+        timings = []
+        for text in texts:
+            started = time.perf_counter()
+            classifier.predict(head, text)
+            timings.append((time.perf_counter() - started) * 1e6)
+        print(f"\n{head} prediction: median {statistics.median(timings):.0f} us, "
+              f"p95 {sorted(timings)[int(len(timings) * 0.95)]:.0f} us")
+
+if __name__ == "__main__":
+    main()
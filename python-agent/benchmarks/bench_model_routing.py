@@ -0,0 +1,192 @@
+"""Compare sending the routable Claude stages to the fast model against the default model.
+
+Starts benchmarks.mock_provider and sends the same inputs for each stage to
+CLAUDE_MODEL and CLAUDE_FAST_MODEL through the agent's own completion and
+parsing code. It reports, per stage and model: latency percentiles, cost per
+1k calls (from token usage at the configured prices), and how often the parsed
+answer matches the default model's. For detect_intent it adds the
+confidence escalation policy at each --thresholds value: the fast answer,
+re-asked on the default model when it is less confident than the threshold.
+
+The mock's small-model speed and disagreement come from --mock, e.g.
+--mock "--fast-speedup 3 --fast-disagreement 0.1". In production the same
+tradeoff shows in sales_agent_claude_requests_total,
+sales_agent_model_escalations_total and the cost and provider-latency metrics.
+
+Run from python-agent/:  python -m benchmarks.bench_model_routing [--samples 100] [--concurrency 8] [--thresholds 0.6,0.7,0.8]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import httpx
+from benchmarks.load_test import AGENT_DIR, REPORT_DIR, free_port, git_revision, percentiles, stop, wait_until_ready
+
+# Stage -> (max_tokens, template fields), as the services call them
+STAGES: Dict[str, Tuple[int, Dict[str, Any]]] = {
+    "detect_intent": (200, {}),
+    "suggest_next_step": (100, {"score": 60, "tier": "warm"}),
+    "extract_requirements": (300, {}),
+    "extract_lead_info": (200, {}),
+}
+
+@contextmanager
+def spawn_mock(mock_args: List[str]) -> Iterator[str]:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    mock = subprocess.Popen([sys.executable, "-m", "benchmarks.mock_provider", "--port", str(port), *mock_args],
+                            cwd=AGENT_DIR)
+    try:
+        wait_until_ready(f"{url}/stats", mock)
+        yield url
+    finally:
+        stop(mock)
+
+def _answer(stage: str, response: str) -> Tuple[Any, Optional[float]]:
+    """(comparable parsed answer, confidence if the stage reports one), parsed as the services do"""
+    from services.schemas import IntentResult, LeadInfo, Requirements
+    from utils.json_parsing import parse_response
+    if stage == "detect_intent":
+        result = parse_response(stage, response, IntentResult)
+        return (result.intent, result.confidence) if result else (None, None)
+    if stage == "extract_requirements":
+        result = parse_response(stage, response, Requirements)
+        return (tuple(result.root) if result else None), None
+    if stage == "extract_lead_info":
+        result = parse_response(stage, response, LeadInfo)
+        return (tuple(sorted(result.model_dump().items())) if result else None), None
+    return response.lower(), None
+
+async def measure(samples: int, concurrency: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    """Per stage and model: latencies (ms), answers, confidences and mean cost per call"""
+    # Imported here, after main() has pointed the agent's settings at the mock
+    from benchmarks.mock_provider import TRANSCRIPT_SENTENCES
+    from services.completion import complete
+    from services.providers import providers
+    from services.routing import model_router
+    from utils.metrics import COST_USD
+
+    rng = random.Random(seed)
+    texts = [f"{' '.join(rng.sample(TRANSCRIPT_SENTENCES, rng.randint(3, 6)))} (call {i})" for i in range(samples)]
+    semaphore = asyncio.Semaphore(concurrency)
+    models = {"default": model_router.default_model, "fast": model_router.fast_model}
+
+    async def call(stage: str, model: str, text: str) -> Tuple[float, Any, Optional[float]]:
+        max_tokens, fields = STAGES[stage]
+        async with semaphore:
+            started = time.perf_counter()
+            response = await complete(stage, max_tokens, text, model=model, **fields)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        return (elapsed_ms, *_answer(stage, response))
+
+    await providers.startup()
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for stage in STAGES:
+            results[stage] = {}
+            for label, model in models.items():
+                cost_before = COST_USD.value(stage=stage)
+                calls = await asyncio.gather(*(call(stage, model, text) for text in texts))
+                results[stage][label] = {
+                    "model": model,
+                    "latency_ms": [latency for latency, _, _ in calls],
+                    "answers": [answer for _, answer, _ in calls],
+                    "confidence": [confidence for _, _, confidence in calls],
+                    "cost_per_call": (COST_USD.value(stage=stage) - cost_before) / samples,
+                }
+    finally:
+        await providers.shutdown()
+    return results
+
+def _row(policy: str, latencies: List[float], cost_per_call: float, agreement: float,
+         escalated: Optional[float] = None) -> Dict[str, Any]:
+    return {
+        "policy": policy,
+        "latency_ms": percentiles(latencies),
+        "usd_per_1k_calls": round(cost_per_call * 1000, 4),
+        "agreement": round(agreement, 4),
+        "escalated": None if escalated is None else round(escalated, 4),
+    }
+
+def tradeoffs(results: Dict[str, Dict[str, Any]], thresholds: List[float]) -> Dict[str, List[Dict[str, Any]]]:
+    """Per stage: the default model, the fast model and, where there is a confidence, escalation policies"""
+    table = {}
+    for stage, runs in results.items():
+        default, fast = runs["default"], runs["fast"]
+        agree = [a == b for a, b in zip(fast["answers"], default["answers"])]
+        rows = [
+            _row("default", default["latency_ms"], default["cost_per_call"], 1.0),
+            _row("fast", fast["latency_ms"], fast["cost_per_call"], sum(agree) / len(agree)),
+        ]
+        if any(confidence is not None for confidence in fast["confidence"]):
+            for threshold in thresholds:
+                escalate = [confidence is None or confidence < threshold for confidence in fast["confidence"]]
+                latencies = [f + (d if e else 0.0)
+                             for f, d, e in zip(fast["latency_ms"], default["latency_ms"], escalate)]
+                rate = sum(escalate) / len(escalate)
+                agreement = sum(e or a for e, a in zip(escalate, agree)) / len(agree)
+                rows.append(_row(f"fast, escalate <{threshold:g}", latencies,
+                                 fast["cost_per_call"] + rate * default["cost_per_call"], agreement, rate))
+        table[stage] = rows
+    return table
+
+def print_table(table: Dict[str, List[Dict[str, Any]]]):
+    print(f"{'stage':<22}{'policy':<24}{'p50 ms':>8}{'p95 ms':>8}{'$/1k':>9}{'agree':>8}{'escal.':>8}")
+    for stage, rows in table.items():
+        for row in rows:
+            escalated = "" if row["escalated"] is None else f"{row['escalated']:.0%}"
+            print(f"{stage:<22}{row['policy']:<24}{row['latency_ms']['p50']:>8.0f}{row['latency_ms']['p95']:>8.0f}"
+                  f"{row['usd_per_1k_calls']:>9.3f}{row['agreement']:>8.0%}{escalated:>8}")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=100, help="inputs per stage, each sent to both models")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--thresholds", default="0.6,0.7,0.8", help="escalation confidences to evaluate")
+    parser.add_argument("--mock", default="", help="options for benchmarks.mock_provider, as one string")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None,
+                        help="report path (default: benchmarks/reports/<time>-<commit>-routing.json)")
+    args = parser.parse_args(argv)
+    thresholds = [float(value) for value in args.thresholds.split(",") if value]
+
+    with spawn_mock(shlex.split(args.mock)) as mock_url:
+        os.environ.update({
+            "CLAUDE_API_KEY": "mock",
+            "CLAUDE_BASE_URL": mock_url,
+            "CACHE_ENABLED": "false",
+            "CLAUDE_RPM": "0",
+            "CLAUDE_TPM": "0",
+            "LOG_LEVEL": "WARNING",
+        })
+        results = asyncio.run(measure(args.samples, args.concurrency, args.seed))
+        mock_stats = httpx.get(f"{mock_url}/stats").json()
+
+    table = tradeoffs(results, thresholds)
+    print_table(table)
+
+    timestamp = datetime.now(timezone.utc)
+    report = {
+        "timestamp": timestamp.isoformat(timespec="seconds"),
+        **git_revision(),
+        "models": {label: run["model"] for label, run in next(iter(results.values())).items()},
+        "samples": args.samples,
+        "mock": mock_stats,
+        "stages": table,
+    }
+    output = args.output or os.path.join(REPORT_DIR, f"{timestamp:%Y%m%d-%H%M%S}-{report['commit'] or 'nogit'}-routing.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to {output}")
+
+if __name__ == "__main__":
+    main()
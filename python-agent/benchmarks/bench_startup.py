@@ -0,0 +1,118 @@
+"""Profile the agent's cold start and check it against a budget.
+
+Measures, each in fresh processes:
+- `import main` under `python -X importtime`, with the slowest top-level
+  packages by self time and a check that none of LAZY_MODULES (provider
+  SDKs, numpy, pandas) is imported eagerly;
+- the time from launching uvicorn to the first 200 from /health.
+
+Exits with status 1 when a median is over its budget or a lazy module is
+imported at startup, so it can gate CI.
+
+Run from python-agent/:  python -m benchmarks.bench_startup [--runs 5] [--import-budget-ms 1000] [--startup-budget-ms 2500]
+"""
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must be imported on first use, not when the app is imported
+LAZY_MODULES = ("anthropic", "openai", "httpx", "numpy", "pandas")
+
+# Defaults leave roughly 50% headroom over a 1-CPU container
+IMPORT_BUDGET_MS = 1000
+STARTUP_BUDGET_MS = 2500
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+def _env() -> Dict[str, str]:
+    return {**os.environ, "LOG_LEVEL": "WARNING", "PYTHONDONTWRITEBYTECODE": "1"}
+
+def profile_import(module: str = "main") -> Tuple[float, Dict[str, float], List[str]]:
+    """(cumulative ms of `module`, self ms per top-level package, lazy modules imported) in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=AGENT_DIR, env=_env(), capture_output=True, text=True, check=True,
+    )
+    total_ms, packages, imported = 0.0, defaultdict(float), set()
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        root = name.split(".")[0]
+        packages[root] += int(self_us) / 1000
+        if root in LAZY_MODULES:
+            imported.add(root)
+        if name == module:
+            total_ms = int(cumulative_us) / 1000
+    return total_ms, dict(packages), sorted(imported)
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def time_to_health(timeout: float = 30) -> float:
+    """Milliseconds from launching uvicorn to the first 200 from /health"""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=AGENT_DIR, env=_env(),
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"/health not answering after {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--startup-budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=8, help="packages to list by import self time")
+    args = parser.parse_args(argv)
+
+    profiles = [profile_import() for _ in range(args.runs)]
+    import_ms = statistics.median(total for total, _, _ in profiles)
+    eager = sorted({name for _, _, imported in profiles for name in imported})
+    packages = {name: statistics.median(p.get(name, 0.0) for _, p, _ in profiles) for name in profiles[0][1]}
+    startup_ms = statistics.median(time_to_health() for _ in range(args.runs))
+
+    print(f"import main:        {import_ms:8.0f} ms (budget {args.import_budget_ms:.0f})")
+    print(f"launch to /health:  {startup_ms:8.0f} ms (budget {args.startup_budget_ms:.0f})")
+    print("slowest packages (self time):")
+    for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<24}{ms:8.1f} ms")
+
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import time {import_ms:.0f} ms is over budget")
+    if startup_ms > args.startup_budget_ms:
+        failures.append(f"startup time {startup_ms:.0f} ms is over budget")
+    if eager:
+        failures.append(f"imported at startup, should be lazy: {', '.join(eager)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,363 @@
+"""Load-test the agent's HTTP API and save a latency/throughput report as JSON.
+
+Drives /ai/process-email and/or /ai/process-call at a fixed concurrency and
+reports p50/p95/p99 latency, requests per second, errors by status, and the
+same percentiles per pipeline stage (from each response's stage_timings).
+
+With --spawn, it starts benchmarks.mock_provider and the agent (serve.py,
+pointed at the mock; result cache, near-duplicate reuse and provider
+quotas off) on free ports, so a run needs no API keys and measures the
+agent rather than the providers.
+Otherwise it targets --url, e.g. a staging deployment.
+
+Reports go to benchmarks/reports/ tagged with the git commit; pass
+--compare to print the change against an earlier report.
+
+Run from python-agent/:
+    python -m benchmarks.load_test --spawn [--scenario mixed] [--concurrency 16] [--requests 400]
+        [--workers 2] [--mock "--latency-ms 300 --error-rate 0.01"] [--compare benchmarks/reports/<old>.json]
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import shlex
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+import httpx
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT_DIR = os.path.join(AGENT_DIR, "benchmarks", "reports")
+
+SCENARIOS = {
+    "email": ["email"],
+    "call": ["call"],
+    # Roughly the production mix: mostly inbound emails
+    "mixed": ["email", "email", "email", "call"],
+}
+
+ENDPOINTS = {"email": "/ai/process-email", "call": "/ai/process-call"}
+
+EMAIL_BODIES = [
+    "Hi, we are evaluating CRM tools for a team of forty. What does pricing look like, and can you integrate with our billing system?",
+    "Hello, our reporting is too slow and my managers are frustrated. Could we set up a demo next week? Budget is about 50k a year.",
+    "Can your API handle SSO and data export? Our security review usually takes a month, so we need details soon.",
+    "How are you doing on the rollout numbers from last quarter? Let me know if you have any performance metrics to share.",
+]
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 (linear interpolation), mean and max of `values`, in their own unit"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def at(q: float) -> float:
+        position = (len(ordered) - 1) * q
+        low = int(position)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+    return {
+        "p50": round(at(0.50), 2),
+        "p95": round(at(0.95), 2),
+        "p99": round(at(0.99), 2),
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "max": round(ordered[-1], 2),
+    }
+
+def make_wav(seconds: float, seed: int, rate: int = 16000) -> bytes:
+    """A quiet noise recording; the seed makes each upload's content (and hash) distinct"""
+    rng = random.Random(seed)
+    frames = struct.pack(f"<{int(seconds * rate)}h", *(rng.randint(-200, 200) for _ in range(int(seconds * rate))))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as recording:
+        recording.setnchannels(1)
+        recording.setsampwidth(2)
+        recording.setframerate(rate)
+        recording.writeframes(frames)
+    return buffer.getvalue()
+
+class Sample:
+    def __init__(self, kind: str, status: int, latency_ms: float, stages: Dict[str, float], error: Optional[str] = None):
+        self.kind = kind
+        self.status = status
+        self.latency_ms = latency_ms
+        self.stages = stages
+        self.error = error
+
+class LoadTest:
+    def __init__(self, url: str, scenario: str, concurrency: int, requests: int,
+                 duration: Optional[float], audio_seconds: float, timeout: float):
+        self.url = url.rstrip("/")
+        self.kinds = SCENARIOS[scenario]
+        self.concurrency = concurrency
+        self.requests = requests
+        self.duration = duration
+        self.audio_seconds = audio_seconds
+        self.timeout = timeout
+        self._issued = 0
+
+    async def _send(self, client: httpx.AsyncClient, index: int) -> Sample:
+        kind = self.kinds[index % len(self.kinds)]
+        started = time.perf_counter()
+        try:
+            if kind == "email":
+                # A distinct body per request, so the result cache cannot answer it
+                payload = {
+                    "email_body": f"{EMAIL_BODIES[index % len(EMAIL_BODIES)]} (ref {index}-{random.random():.6f})",
+                    "from_email": f"lead{index}@example.com",
+                    "subject": "Question about your product",
+                }
+                response = await client.post(ENDPOINTS[kind], json=payload)
+            else:
+                audio = await asyncio.to_thread(make_wav, self.audio_seconds, index)
+                response = await client.post(ENDPOINTS[kind], files={"audio_file": (f"call{index}.wav", audio, "audio/wav")})
+        except httpx.HTTPError as e:
+            return Sample(kind, 0, (time.perf_counter() - started) * 1000, {}, error=type(e).__name__)
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        stages = {}
+        if response.status_code == 200:
+            stages = response.json().get("stage_timings") or {}
+        return Sample(kind, response.status_code, latency_ms, stages,
+                      error=None if response.status_code == 200 else response.text[:200])
+
+    def _next_index(self, deadline: Optional[float]) -> Optional[int]:
+        if deadline is not None:
+            if time.perf_counter() >= deadline:
+                return None
+        elif self._issued >= self.requests:
+            return None
+        self._issued += 1
+        return self._issued - 1
+
+    async def run(self, warmup: int) -> Dict:
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.url, timeout=self.timeout, limits=limits) as client:
+            # Warm connections, imports and provider pools; not recorded
+            await asyncio.gather(*(self._send(client, -1 - i) for i in range(warmup)))
+
+            samples: List[Sample] = []
+            started = time.perf_counter()
+            deadline = started + self.duration if self.duration else None
+
+            async def worker():
+                while (index := self._next_index(deadline)) is not None:
+                    samples.append(await self._send(client, index))
+
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+            elapsed = time.perf_counter() - started
+        return summarize(samples, elapsed)
+
+def _summarize_group(samples: List[Sample], elapsed: float) -> Dict:
+    ok = [sample for sample in samples if sample.status == 200]
+    stages = defaultdict(list)
+    for sample in ok:
+        for stage, ms in sample.stages.items():
+            stages[stage].append(ms)
+    return {
+        "requests": len(samples),
+        "ok": len(ok),
+        "errors": dict(Counter(str(sample.status) for sample in samples if sample.status != 200)),
+        "requests_per_second": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": percentiles([sample.latency_ms for sample in ok]),
+        "stages_ms": {stage: percentiles(values) for stage, values in sorted(stages.items())},
+    }
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict:
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[ENDPOINTS[sample.kind]].append(sample)
+    summary = _summarize_group(samples, elapsed)
+    del summary["stages_ms"]
+    summary["duration_seconds"] = round(elapsed, 2)
+    summary["endpoints"] = {endpoint: _summarize_group(group, elapsed) for endpoint, group in sorted(by_endpoint.items())}
+    summary["sample_errors"] = sorted({sample.error for sample in samples if sample.error})[:5]
+    return summary
+
+def git_revision() -> Dict:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], cwd=AGENT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "."))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode} during startup")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+def stop(process: subprocess.Popen):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+@contextmanager
+def spawn_stack(workers: int, mock_args: List[str], env_overrides: Dict[str, str]) -> Iterator[Dict]:
+    """Start the mock provider and the agent against it; yields their URLs"""
+    mock_port, agent_port = free_port(), free_port()
+    mock_url = f"http://127.0.0.1:{mock_port}"
+    work_dir = tempfile.mkdtemp(prefix="load_test_")
+    env = {
+        **os.environ,
+        "CLAUDE_API_KEY": "mock",
+        "OPENAI_API_KEY": "mock",
+        "CLAUDE_BASE_URL": mock_url,
+        "OPENAI_BASE_URL": f"{mock_url}/v1",
+        "CACHE_ENABLED": "false",
+        # The scenarios repeat their emails, which near-duplicate reuse would answer without Claude
+        "SIMILARITY_ENABLED": "false",
+        # Likewise a locally trained classifier would answer intent and next step without Claude
+        "LOCAL_CLASSIFIER_PATH": "",
+        "CLAUDE_RPM": "0",
+        "CLAUDE_TPM": "0",
+        "WHISPER_RPM": "0",
+        "UPLOAD_DIR": os.path.join(work_dir, "uploads"),
+        "JOB_DB_PATH": os.path.join(work_dir, "jobs.db"),
+        "LOG_LEVEL": "WARNING",
+        **env_overrides,
+    }
+    mock = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.mock_provider", "--port", str(mock_port), *mock_args],
+        cwd=AGENT_DIR, env=env,
+    )
+    agent = None
+    try:
+        wait_until_ready(f"{mock_url}/stats", mock)
+        agent = subprocess.Popen(
+            [sys.executable, "serve.py", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(agent_port)],
+            cwd=AGENT_DIR, env=env,
+        )
+        agent_url = f"http://127.0.0.1:{agent_port}"
+        wait_until_ready(f"{agent_url}/ready", agent)
+        yield {"agent": agent_url, "mock": mock_url}
+    finally:
+        if agent is not None:
+            stop(agent)
+        stop(mock)
+
+def compare(report: Dict, baseline: Dict) -> List[str]:
+    """Lines showing how latency and throughput moved against a baseline report"""
+    def delta(new: float, old: float) -> str:
+        if not old:
+            return f"{new:>10.1f}"
+        return f"{new:>10.1f} ({(new - old) / old:+.0%})"
+
+    lines = [
+        f"vs {baseline.get('commit')} ({baseline.get('timestamp')})",
+        f"{'':<28}{'p50 ms':>20}{'p95 ms':>20}{'p99 ms':>20}{'req/s':>20}",
+    ]
+    rows = [("overall", report, baseline)]
+    for endpoint, group in report["endpoints"].items():
+        rows.append((endpoint, group, baseline.get("endpoints", {}).get(endpoint, {})))
+        for stage, stats in group["stages_ms"].items():
+            old = baseline.get("endpoints", {}).get(endpoint, {}).get("stages_ms", {}).get(stage, {})
+            rows.append((f"  {stage}", {"latency_ms": stats}, {"latency_ms": old}))
+    for name, new, old in rows:
+        new_latency, old_latency = new.get("latency_ms", {}), old.get("latency_ms", {})
+        cells = [delta(new_latency.get(q, 0), old_latency.get(q, 0)) for q in ("p50", "p95", "p99")]
+        if "requests_per_second" in new:
+            cells.append(delta(new["requests_per_second"], old.get("requests_per_second", 0)))
+        lines.append(f"{name:<28}" + "".join(f"{cell:>20}" for cell in cells))
+    return lines
+
+def print_report(report: Dict):
+    print(f"{report['requests']} requests in {report['duration_seconds']}s at concurrency {report['concurrency']}: "
+          f"{report['requests_per_second']} req/s, {report['ok']} ok, errors {report['errors'] or 'none'}")
+    print(f"{'':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for endpoint, group in report["endpoints"].items():
+        rows = [(endpoint, group["latency_ms"])] + [(f"  {stage}", stats) for stage, stats in group["stages_ms"].items()]
+        for name, stats in rows:
+            print(f"{name:<28}" + "".join(f"{stats.get(q, 0):>10.1f}" for q in ("p50", "p95", "p99", "mean")))
+    for error in report["sample_errors"]:
+        print(f"  error: {error}")
+
+async def run(args: argparse.Namespace, url: str) -> Dict:
+    test = LoadTest(url, args.scenario, args.concurrency, args.requests, args.duration, args.audio_seconds, args.timeout)
+    return await test.run(args.warmup if args.warmup is not None else args.concurrency)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="agent to test (ignored with --spawn)")
+    parser.add_argument("--spawn", action="store_true", help="start the mock provider and the agent locally")
+    parser.add_argument("--workers", type=int, default=1, help="agent worker processes with --spawn")
+    parser.add_argument("--mock", default="", help="options for benchmarks.mock_provider with --spawn, as one string")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="agent setting with --spawn, e.g. EXTRACTION_MODE=fused (repeatable)")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="email")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests to send (unless --duration)")
+    parser.add_argument("--duration", type=float, default=None, help="run for this many seconds instead")
+    parser.add_argument("--warmup", type=int, default=None, help="unrecorded requests first (default: concurrency)")
+    parser.add_argument("--audio-seconds", type=float, default=10, help="length of each uploaded call recording")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", default=None, help="report path (default: benchmarks/reports/<time>-<commit>.json)")
+    parser.add_argument("--compare", default=None, help="earlier report to compare against")
+    args = parser.parse_args(argv)
+
+    env_overrides = dict(item.split("=", 1) for item in args.env)
+    mock_stats = None
+    if args.spawn:
+        with spawn_stack(args.workers, shlex.split(args.mock), env_overrides) as urls:
+            target = "spawned"
+            summary = asyncio.run(run(args, urls["agent"]))
+            mock_stats = httpx.get(f"{urls['mock']}/stats").json()
+    else:
+        target = args.url
+        summary = asyncio.run(run(args, args.url))
+
+    timestamp = datetime.now(timezone.utc)
+    report = {
+        "timestamp": timestamp.isoformat(timespec="seconds"),
+        **git_revision(),
+        "target": target,
+        "scenario": args.scenario,
+        "concurrency": args.concurrency,
+        "workers": args.workers if args.spawn else None,
+        "agent_settings": env_overrides,
+        "mock": mock_stats,
+        **summary,
+    }
+
+    print_report(report)
+    output = args.output or os.path.join(REPORT_DIR, f"{timestamp:%Y%m%d-%H%M%S}-{report['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print("\n".join(compare(report, baseline)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""Local stand-in for the Claude and Whisper APIs, for load tests and offline runs.
+
+Speaks enough of the Anthropic messages API (JSON, SSE streaming, tool use,
+prompt-cache usage) and the OpenAI transcription API for the agent's SDK
+clients. Replies are shaped per stage, recognised from the registered
+prompt in the system prompt, so every pipeline stage parses them. Latency
+follows the same model as bench_digest (overhead + prefill per input token +
+decode per output token) with jitter, and a share of requests can fail with
+529 overloaded or 429 rate limited. Small models (ids containing
+--fast-model-marker) run --fast-speedup times faster and give a different,
+less confident label for --fast-disagreement of classifications; the
+default model's label is fixed per input text, so answers can be compared.
+
+Run from python-agent/:  python -m benchmarks.mock_provider [--port 9100] [--latency-ms 300] [--error-rate 0.01]
+and start the agent with CLAUDE_BASE_URL=http://127.0.0.1:9100 OPENAI_BASE_URL=http://127.0.0.1:9100/v1
+"""
+import argparse
+import asyncio
+import json
+import random
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional
+import uvicorn
+from fastapi import FastAPI, Request, UploadFile, File, Form
+from fastapi.responses import JSONResponse, StreamingResponse
+from services.prompts import prompts
+from utils.tokens import count_tokens
+
+# Anthropic only caches prefixes of at least this many tokens
+CACHE_MIN_TOKENS = 1024
+
+TRANSCRIPT_SENTENCES = [
+    "Hi, this is Dana Smith from Acme Corp, thanks for taking the call.",
+    "We are a team of about forty people and our current CRM is too slow for us.",
+    "Our budget for this is roughly fifty thousand dollars a year.",
+    "Can your API integrate with our billing system?",
+    "I would need the director of operations to approve anything over that.",
+    "We are hoping to have something live by the end of next quarter.",
+    "You can reach me at dana.smith@acme.example or 555-123-4567.",
+    "Could you send over a proposal and maybe set up a demo next week?",
+]
+
+REPLY_SENTENCES = [
+    "Thank you for walking us through your current setup and where it falls short.",
+    "Our platform integrates with most billing systems through a documented REST API.",
+    "Reporting dashboards are available out of the box and can be tailored per team.",
+    "I would be glad to put together a proposal that fits within your budget.",
+    "Would a thirty minute demo early next week work for you and your director?",
+]
+
+class MockSettings:
+    """Behaviour of the mock, set from the command line"""
+
+    def __init__(self, latency_ms: float = 300, jitter: float = 0.2,
+                 input_tokens_per_second: float = 20000, output_tokens_per_second: float = 50,
+                 output_tokens: int = 150, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 transcribe_latency_ms: float = 1000, transcribe_ms_per_mb: float = 500,
+                 transcript_words: int = 600, fast_model_marker: str = "haiku", fast_speedup: float = 2.5,
+                 fast_disagreement: float = 0.15, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.input_tokens_per_second = input_tokens_per_second
+        self.output_tokens_per_second = output_tokens_per_second
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.transcribe_latency_ms = transcribe_latency_ms
+        self.transcribe_ms_per_mb = transcribe_ms_per_mb
+        self.transcript_words = transcript_words
+        self.fast_model_marker = fast_model_marker
+        self.fast_speedup = fast_speedup
+        self.fast_disagreement = fast_disagreement
+        self.rng = random.Random(seed)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in vars(self).items() if key != "rng"}
+
+settings = MockSettings()
+app = FastAPI(title="Mock Claude/Whisper provider")
+
+_stages = {prompts.get(name).instructions: name for name in prompts.names()}
+_cached_prefixes: set = set()
+_counters = {"messages": 0, "transcriptions": 0, "errors": 0}
+
+def _jittered(seconds: float) -> float:
+    return seconds * (1 + settings.rng.uniform(-settings.jitter, settings.jitter))
+
+def _injected_error(kind: str) -> Optional[JSONResponse]:
+    """A 529 or 429 for the configured share of requests"""
+    roll = settings.rng.random()
+    if roll < settings.error_rate:
+        status, error_type, message, headers = 529, "overloaded_error", "Overloaded", {}
+    elif roll < settings.error_rate + settings.rate_limit_rate:
+        status, error_type, message, headers = 429, "rate_limit_error", "Rate limited", {"retry-after": "1"}
+    else:
+        return None
+    _counters["errors"] += 1
+    if kind == "openai":
+        body = {"error": {"message": message, "type": error_type, "code": None}}
+    else:
+        body = {"type": "error", "error": {"type": error_type, "message": message}}
+    return JSONResponse(body, status_code=status, headers=headers)
+
+def _system_text(system: Any) -> str:
+    if isinstance(system, list):
+        return "\n\n".join(block.get("text", "") for block in system)
+    return system or ""
+
+def _stage(system: Any) -> Optional[str]:
+    text = _system_text(system)
+    for instructions, name in _stages.items():
+        if text.endswith(instructions):
+            return name
+    return None
+
+def _message_text(messages: List[Dict]) -> str:
+    parts = []
+    for message in messages:
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = " ".join(block.get("text", "") for block in content)
+        parts.append(content)
+    return "\n".join(parts)
+
+def _words(sentences: List[str], tokens: int) -> str:
+    parts, used = [], 0
+    while used < tokens:
+        sentence = settings.rng.choice(sentences)
+        parts.append(sentence)
+        used += count_tokens(sentence)
+    return " ".join(parts)
+
+def _lead_info() -> Dict:
+    return {"name": "Dana Smith", "email": "dana.smith@acme.example", "phone": "555-123-4567", "company": "Acme Corp"}
+
+INTENTS = ["sales_inquiry", "sales_inquiry", "technical_question", "general_inquiry"]
+NEXT_STEPS = ["schedule_demo", "send_proposal", "follow_up_call"]
+
+def _label(labels: List[str], text: str, fast: bool) -> tuple:
+    """(label, confidence): the default model's label is fixed by the text; a fast model sometimes differs"""
+    rng = settings.rng
+    label = labels[zlib.crc32(text.encode("utf-8")) % len(labels)]
+    if not fast:
+        return label, round(rng.uniform(0.75, 0.98), 2)
+    if rng.random() < settings.fast_disagreement:
+        return rng.choice([other for other in labels if other != label]), round(rng.uniform(0.4, 0.75), 2)
+    return label, round(rng.uniform(0.65, 0.95), 2)
+
+def _reply(stage: Optional[str], max_tokens: int, text: str = "", fast: bool = False) -> str:
+    rng = settings.rng
+    if stage == "detect_intent":
+        intent, confidence = _label(INTENTS, text, fast)
+        return json.dumps({"intent": intent, "confidence": confidence})
+    if stage == "extract_requirements":
+        return json.dumps(["Billing system integration", "Faster CRM", "Better reporting", "Fifty thousand dollar budget"])
+    if stage == "extract_lead_info":
+        return json.dumps(_lead_info())
+    if stage == "suggest_next_step":
+        return _label(NEXT_STEPS, text, fast)[0]
+    if stage in ("digest_chunk", "digest_reduce"):
+        return "\n".join(f"- {sentence}" for sentence in rng.sample(TRANSCRIPT_SENTENCES, 5))
+    return _words(REPLY_SENTENCES, min(settings.output_tokens, max_tokens))
+
+def _tool_input(tool: Dict) -> Dict:
+    if tool.get("name") != "record_extraction":
+        return {}
+    return {
+        "intent": "sales_inquiry",
+        "confidence": round(settings.rng.uniform(0.6, 0.98), 2),
+        "requirements": ["Billing system integration", "Faster CRM", "Better reporting"],
+        "lead_info": _lead_info(),
+        "next_step": settings.rng.choice(["schedule_demo", "send_proposal"]),
+    }
+
+def _usage(body: Dict, input_tokens: int, output_tokens: int) -> Dict:
+    """Usage block, with the prompt cache hit once a cacheable prefix has been seen"""
+    usage = {"input_tokens": input_tokens, "output_tokens": output_tokens}
+    system = body.get("system")
+    if not isinstance(system, list) or not any("cache_control" in block for block in system):
+        return usage
+    usage["cache_creation_input_tokens"] = usage["cache_read_input_tokens"] = 0
+    prefix = _system_text(system)
+    prefix_tokens = count_tokens(prefix)
+    if prefix_tokens < CACHE_MIN_TOKENS:
+        return usage
+    usage["input_tokens"] = max(input_tokens - prefix_tokens, 0)
+    if prefix in _cached_prefixes:
+        usage["cache_read_input_tokens"] = prefix_tokens
+    else:
+        _cached_prefixes.add(prefix)
+        usage["cache_creation_input_tokens"] = prefix_tokens
+    return usage
+
+@app.post("/v1/messages")
+async def messages(request: Request):
+    body = await request.json()
+    error = _injected_error("anthropic")
+    if error is not None:
+        return error
+    _counters["messages"] += 1
+
+    max_tokens = int(body.get("max_tokens", 1024))
+    user_text = _message_text(body.get("messages", []))
+    input_tokens = count_tokens(_system_text(body.get("system")) + "\n\n" + user_text)
+    fast = settings.fast_model_marker in str(body.get("model", ""))
+    speed = settings.fast_speedup if fast else 1.0
+    tools = body.get("tools") or []
+    if tools:
+        content = [{"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}", "name": tools[0]["name"],
+                    "input": _tool_input(tools[0])}]
+        output_tokens = count_tokens(json.dumps(content[0]["input"]))
+        stop_reason = "tool_use"
+    else:
+        text = _reply(_stage(body.get("system")), max_tokens, user_text, fast)
+        content = [{"type": "text", "text": text}]
+        output_tokens = min(count_tokens(text), max_tokens)
+        stop_reason = "end_turn"
+
+    message = {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "mock"),
+        "content": content,
+        "stop_reason": stop_reason,
+        "stop_sequence": None,
+        "usage": _usage(body, input_tokens, output_tokens),
+    }
+    prefill = _jittered(settings.latency_ms / 1000 + input_tokens / settings.input_tokens_per_second) / speed
+    decode = _jittered(output_tokens / settings.output_tokens_per_second) / speed
+
+    if not body.get("stream"):
+        await asyncio.sleep(prefill + decode)
+        return message
+    return StreamingResponse(_stream(message, prefill, decode), media_type="text/event-stream")
+
+def _event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps({'type': event, **data})}\n\n"
+
+async def _stream(message: Dict, prefill: float, decode: float):
+    """Replay a message as Anthropic SSE events, paced like token-by-token decoding"""
+    await asyncio.sleep(prefill)
+    usage = message["usage"]
+    yield _event("message_start", {"message": {**message, "content": [], "stop_reason": None,
+                                              "usage": {**usage, "output_tokens": 1}}})
+    for index, block in enumerate(message["content"]):
+        if block["type"] == "text":
+            yield _event("content_block_start", {"index": index, "content_block": {"type": "text", "text": ""}})
+            words = block["text"].split(" ")
+            for position, word in enumerate(words):
+                await asyncio.sleep(decode / len(words))
+                text = word if position == 0 else f" {word}"
+                yield _event("content_block_delta", {"index": index, "delta": {"type": "text_delta", "text": text}})
+        else:
+            yield _event("content_block_start", {"index": index, "content_block": {**block, "input": {}}})
+            await asyncio.sleep(decode)
+            yield _event("content_block_delta", {"index": index, "delta": {
+                "type": "input_json_delta", "partial_json": json.dumps(block["input"])}})
+        yield _event("content_block_stop", {"index": index})
+    yield _event("message_delta", {"delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+                                   "usage": {"output_tokens": usage["output_tokens"]}})
+    yield _event("message_stop", {})
+
+@app.post("/v1/audio/transcriptions")
+async def transcriptions(file: UploadFile = File(...), model: str = Form("whisper-1"),
+                         language: Optional[str] = Form(None)):
+    size = 0
+    while chunk := await file.read(1024 * 1024):
+        size += len(chunk)
+    error = _injected_error("openai")
+    if error is not None:
+        return error
+    _counters["transcriptions"] += 1
+
+    await asyncio.sleep(_jittered((settings.transcribe_latency_ms + settings.transcribe_ms_per_mb * size / 2**20) / 1000))
+    words = _words(TRANSCRIPT_SENTENCES, settings.transcript_words).split(" ")
+    return {"text": " ".join(words[:settings.transcript_words])}
+
+@app.get("/stats")
+async def stats():
+    return {**_counters, "settings": settings.as_dict()}
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=300, help="fixed overhead per Claude request")
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency varies by up to this fraction either way")
+    parser.add_argument("--input-tokens-per-second", type=float, default=20000, help="prefill speed")
+    parser.add_argument("--output-tokens-per-second", type=float, default=50, help="decode speed")
+    parser.add_argument("--output-tokens", type=int, default=150, help="length of free-text replies (emails)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing with 529")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests failing with 429")
+    parser.add_argument("--transcribe-latency-ms", type=float, default=1000)
+    parser.add_argument("--transcribe-ms-per-mb", type=float, default=500)
+    parser.add_argument("--transcript-words", type=int, default=600)
+    parser.add_argument("--fast-model-marker", default="haiku", help="model ids containing this are small models")
+    parser.add_argument("--fast-speedup", type=float, default=2.5, help="how much faster small models answer")
+    parser.add_argument("--fast-disagreement", type=float, default=0.15,
+                        help="share of classifications where a small model picks another label")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    global settings
+    args = parse_args(argv)
+    options = {key: value for key, value in vars(args).items() if key not in ("host", "port")}
+    settings = MockSettings(**options)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -10,17 +10,123 @@ class Config:
     # API Keys
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
     CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY", "")
+    # Provider endpoints; empty uses the SDK defaults (point at benchmarks/mock_provider.py for load tests)
+    CLAUDE_BASE_URL = os.getenv("CLAUDE_BASE_URL", "")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")
     
     # Server
     HOST = os.getenv("HOST", "0.0.0.0")
     PORT = int(os.getenv("PORT", 8000))
     
+    # Production server (serve.py)
+    WORKERS = int(os.getenv("WORKERS", 0))  # 0 = one per CPU
+    SHUTDOWN_DRAIN_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", 30))
+    # Where worker processes share /metrics snapshots; serve.py sets it (default ./data/metrics) for
+    # more than one worker. Empty: /metrics reports only the process that answers the scrape
+    METRICS_DIR = os.getenv("METRICS_DIR", "")
+    METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", 5))
+    
     # File Upload
     UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./uploads")
     MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 10485760))  # 10MB
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1048576))  # 1MB
+    UPLOAD_STALE_SECONDS = float(os.getenv("UPLOAD_STALE_SECONDS", 3600))
+    
+    # Provider HTTP pool
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30.0))
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 120.0))
+    
+    # Provider gateway: quotas (0 disables a limit), retries and circuit breaker
+    CLAUDE_RPM = float(os.getenv("CLAUDE_RPM", 50))
+    CLAUDE_TPM = float(os.getenv("CLAUDE_TPM", 40000))
+    WHISPER_RPM = float(os.getenv("WHISPER_RPM", 50))
+    PROVIDER_MAX_RETRIES = int(os.getenv("PROVIDER_MAX_RETRIES", 4))
+    PROVIDER_RETRY_BASE_DELAY = float(os.getenv("PROVIDER_RETRY_BASE_DELAY", 1.0))
+    PROVIDER_RETRY_MAX_DELAY = float(os.getenv("PROVIDER_RETRY_MAX_DELAY", 30.0))
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+    CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", 30.0))
+    
+    # Model routing: MODEL_ROUTES ("stage=model,...", where model is "fast", "default" or a model id)
+    # sends the listed stages to that model and every other stage to CLAUDE_MODEL. Opt-in: empty
+    # keeps every stage on CLAUDE_MODEL, e.g. "detect_intent=fast,extract_lead_info=fast" after
+    # checking agreement with benchmarks/bench_model_routing.py
+    CLAUDE_MODEL = os.getenv("CLAUDE_MODEL", "claude-3-5-sonnet-20241022")
+    CLAUDE_FAST_MODEL = os.getenv("CLAUDE_FAST_MODEL", "claude-3-5-haiku-20241022")
+    MODEL_ROUTES = os.getenv("MODEL_ROUTES", "")
+    # Re-ask CLAUDE_MODEL when a routed classification is less confident than this (0 disables)
+    MODEL_ESCALATION_CONFIDENCE = float(os.getenv("MODEL_ESCALATION_CONFIDENCE", 0.7))
+    
+    # Local intent/next-step classifier (train_classifier.py); empty path or a missing file disables it.
+    # Claude is asked only when its calibrated confidence is below LOCAL_CLASSIFIER_CONFIDENCE
+    LOCAL_CLASSIFIER_PATH = os.getenv("LOCAL_CLASSIFIER_PATH", "./models/local_classifier.npz")
+    LOCAL_CLASSIFIER_CONFIDENCE = float(os.getenv("LOCAL_CLASSIFIER_CONFIDENCE", 0.9))
+    
+    # Call extraction: "per_field" (one Claude request per field) or "fused" (one combined request)
+    EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "per_field")
+    
+    # Long transcripts: above the threshold, extraction prompts get a map-reduce digest
+    DIGEST_THRESHOLD_TOKENS = int(os.getenv("DIGEST_THRESHOLD_TOKENS", 6000))
+    DIGEST_CHUNK_TOKENS = int(os.getenv("DIGEST_CHUNK_TOKENS", 3000))
+    DIGEST_CHUNK_OVERLAP_TOKENS = int(os.getenv("DIGEST_CHUNK_OVERLAP_TOKENS", 100))
+    DIGEST_CHUNK_NOTES_TOKENS = int(os.getenv("DIGEST_CHUNK_NOTES_TOKENS", 400))
+    DIGEST_MAX_TOKENS = int(os.getenv("DIGEST_MAX_TOKENS", 1000))
+    DIGEST_MAX_CONCURRENCY = int(os.getenv("DIGEST_MAX_CONCURRENCY", 8))
+    
+    # Batch processing
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 8))
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 5000))
+    
+    # Job queue
+    JOB_DB_PATH = os.getenv("JOB_DB_PATH", "./data/jobs.db")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+    JOB_QUEUE_MAX_PENDING = int(os.getenv("JOB_QUEUE_MAX_PENDING", 100))
+    JOB_WEBHOOK_RETRIES = int(os.getenv("JOB_WEBHOOK_RETRIES", 3))
+    # Webhooks to private, loopback or link-local hosts are refused unless this is set
+    JOB_WEBHOOK_ALLOW_PRIVATE = os.getenv("JOB_WEBHOOK_ALLOW_PRIVATE", "false").lower() == "true"
+    # Finished jobs are deleted this long after they end (0 keeps them)
+    JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", 604800))
+    
+    # Transcription
+    TRANSCRIPTION_CHUNKING = os.getenv("TRANSCRIPTION_CHUNKING", "true").lower() == "true"
+    TRANSCRIPTION_SEGMENT_SECONDS = float(os.getenv("TRANSCRIPTION_SEGMENT_SECONDS", 300))
+    TRANSCRIPTION_OVERLAP_SECONDS = float(os.getenv("TRANSCRIPTION_OVERLAP_SECONDS", 2))
+    TRANSCRIPTION_SILENCE_SEARCH_SECONDS = float(os.getenv("TRANSCRIPTION_SILENCE_SEARCH_SECONDS", 30))
+    TRANSCRIPTION_MAX_CONCURRENCY = int(os.getenv("TRANSCRIPTION_MAX_CONCURRENCY", 4))
+    TRANSCRIPTION_MAX_REQUEST_BYTES = int(os.getenv("TRANSCRIPTION_MAX_REQUEST_BYTES", 26214400))  # 25MB
+    
+    # Result cache
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+    CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", 86400))
+    CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "")  # empty disables the disk tier
+    
+    # Similarity index of processed emails/calls: near-duplicate reuse and /ai/similar-leads
+    SIMILARITY_ENABLED = os.getenv("SIMILARITY_ENABLED", "true").lower() == "true"
+    SIMILARITY_INDEX_DIR = os.getenv("SIMILARITY_INDEX_DIR", "./data/similarity")
+    SIMILARITY_MAX_ENTRIES = int(os.getenv("SIMILARITY_MAX_ENTRIES", 100000))
+    SIMILARITY_DUPLICATE_THRESHOLD = float(os.getenv("SIMILARITY_DUPLICATE_THRESHOLD", 0.9))
+
+    # Anthropic prompt caching of the fixed instruction prefix of each prompt. Only prefixes over the
+    # model's cache minimum (1024 tokens, 2048 on Haiku) are marked; the current ones are all shorter
+    PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "false").lower() == "true"
+    
+    # Claude pricing (USD per million tokens) of CLAUDE_MODEL and CLAUDE_FAST_MODEL, for the cost metric
+    CLAUDE_INPUT_COST_PER_MTOK = float(os.getenv("CLAUDE_INPUT_COST_PER_MTOK", 3.0))
+    CLAUDE_OUTPUT_COST_PER_MTOK = float(os.getenv("CLAUDE_OUTPUT_COST_PER_MTOK", 15.0))
+    CLAUDE_FAST_INPUT_COST_PER_MTOK = float(os.getenv("CLAUDE_FAST_INPUT_COST_PER_MTOK", 0.8))
+    CLAUDE_FAST_OUTPUT_COST_PER_MTOK = float(os.getenv("CLAUDE_FAST_OUTPUT_COST_PER_MTOK", 4.0))
     
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" or "text"
+    # Records waiting for the background writer; more are dropped rather than blocking requests
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+    # Longer messages and string fields (e.g. raw model responses) are cut to this many characters
+    LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", 2000))
+    # Share of INFO/DEBUG records kept per logger, e.g. "utils.pipeline=0.1"; unlisted loggers keep all
+    LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "utils.pipeline=0.1")
 
 config = Config()
 
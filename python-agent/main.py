@@ -1,17 +1,73 @@
-from fastapi import FastAPI
+import asyncio
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from config import config
-from routes import process, health
-from utils.logger import setup_logger
+from routes import process, health, jobs, leads, live
+from services.cache import result_cache
+from services.container import container
+from services.jobs import job_queue
+from services.providers import providers
+from utils.lifecycle import lifecycle
+from utils.logger import queue_handler, request_id_var, setup_logger
+from utils.metrics import HTTP_REQUEST_SECONDS, registry, server_timing_header, start_request_timings
+from utils.uploads import UploadSizeLimitMiddleware, remove_live_uploads, sweep_stale_uploads
 
 logger = setup_logger(__name__)
+access_logger = setup_logger("access")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize shared clients and the job queue, and drain in-flight work on shutdown"""
+    swept = sweep_stale_uploads(config.UPLOAD_DIR, config.UPLOAD_STALE_SECONDS)
+    if swept:
+        logger.info(f"Removed {swept} stale uploads")
+    if config.METRICS_DIR:
+        registry.share(config.METRICS_DIR, config.METRICS_FLUSH_SECONDS)
+    await providers.startup()
+    # Load the classifier artifact now rather than on the first request
+    if config.LOCAL_CLASSIFIER_PATH:
+        classifier = await asyncio.to_thread(lambda: container.classifier)
+        if classifier:
+            logger.info(f"Loaded local classifier {classifier.version}")
+    await job_queue.start()
+    lifecycle.mark_ready()
+    logger.info(f"Worker {os.getpid()} ready")
+
+    yield
+
+    lifecycle.begin_drain()
+    job_queue.begin_drain()
+    if lifecycle.in_flight:
+        logger.info(f"Draining {lifecycle.in_flight} in-flight pipelines")
+    if not await lifecycle.wait_idle(config.SHUTDOWN_DRAIN_SECONDS):
+        logger.warning(f"{lifecycle.in_flight} pipelines still running after {config.SHUTDOWN_DRAIN_SECONDS}s drain")
+    await job_queue.stop()
+    await providers.shutdown()
+    result_cache.close()
+    # Only close the similarity index if a request opened it
+    if "similarity" in container.__dict__:
+        container.similarity.close()
+    removed = remove_live_uploads(config.UPLOAD_DIR)
+    if removed:
+        logger.info(f"Removed {removed} temp uploads")
+    registry.unshare()
+    if queue_handler.dropped:
+        logger.warning(f"Dropped {queue_handler.dropped} log records while the log queue was full")
 
 app = FastAPI(
     title="Sales AI Agent",
     description="Python AI service for processing sales calls and emails",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Refuse oversized uploads before Starlette spools them (save_upload checks the exact file size)
+app.add_middleware(UploadSizeLimitMiddleware, max_size=config.MAX_FILE_SIZE)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -21,9 +77,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    """Record request latency and return the per-stage breakdown as a Server-Timing header.
+
+    Streaming responses are measured to their headers, so their breakdown
+    only covers stages finished before the first byte. The request id (the
+    caller's X-Request-ID, or a new one) is on every log record of the
+    request and echoed back.
+    """
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    request_id_var.set(request_id)
+    timings = start_request_timings()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    HTTP_REQUEST_SECONDS.observe(
+        elapsed,
+        method=request.method,
+        route=route,
+        status=str(response.status_code),
+    )
+    response.headers["Server-Timing"] = server_timing_header(timings, elapsed * 1000)
+    response.headers["X-Request-ID"] = request_id
+    access_logger.info(
+        f"{request.method} {request.url.path} {response.status_code}",
+        extra={"route": route, "status": response.status_code,
+               "duration_ms": round(elapsed * 1000, 2), "stage_timings": dict(timings)},
+    )
+    return response
+
 # Routes
 app.include_router(health.router, tags=["Health"])
 app.include_router(process.router, prefix="/ai", tags=["AI Processing"])
+app.include_router(jobs.router, prefix="/ai", tags=["Jobs"])
+app.include_router(live.router, prefix="/ai", tags=["Live"])
+app.include_router(leads.router, prefix="/ai", tags=["Leads"])
 
 @app.get("/")
 async def root():
@@ -32,12 +123,22 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "health": "/health",
+            "ready": "/ready",
+            "metrics": "/metrics",
             "process_call": "/ai/process-call",
-            "process_email": "/ai/process-email"
+            "process_email": "/ai/process-email",
+            "process_call_stream": "/ai/process-call/stream",
+            "process_email_stream": "/ai/process-email/stream",
+            "process_emails_batch": "/ai/process-emails/batch",
+            "submit_job": "/ai/jobs",
+            "job_status": "/ai/jobs/{job_id}",
+            "live_call": "/ai/live-call (WebSocket)",
+            "similar_leads": "/ai/similar-leads"
         }
     }
 
 if __name__ == "__main__":
+    # Development server; use serve.py in production
     import uvicorn
     uvicorn.run(
         "main:app",
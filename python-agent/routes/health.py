@@ -1,15 +1,41 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
 from config import config
+from services.cache import result_cache
+from services.gateway import claude_gateway, whisper_gateway
+from services.jobs import job_queue
+from utils.lifecycle import lifecycle
+from utils.metrics import CACHE_ENTRIES, JOBS, registry
 
 router = APIRouter()
 
 @router.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Liveness: the process is up and serving requests"""
     return {
         "status": "ok",
         "service": "python-ai-agent",
         "openai_configured": bool(config.OPENAI_API_KEY),
         "claude_configured": bool(config.CLAUDE_API_KEY),
+        "cache": result_cache.stats(),
+        "jobs": job_queue.stats(),
+        "providers": {
+            "anthropic": claude_gateway.stats(),
+            "openai": whisper_gateway.stats(),
+        },
     }
 
+@router.get("/ready")
+async def readiness_check():
+    """Readiness: startup has finished and the worker is not draining"""
+    status = lifecycle.stats()
+    return JSONResponse(status_code=200 if lifecycle.ready else 503, content=status)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics"""
+    CACHE_ENTRIES.set(result_cache.stats()["entries"])
+    jobs = job_queue.stats()
+    JOBS.set(jobs["pending"], state="pending")
+    JOBS.set(jobs["running"], state="running")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
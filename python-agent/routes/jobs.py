@@ -0,0 +1,95 @@
+import os
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from typing import Dict, Optional
+from config import config
+from routes.process import build_call_pipeline, format_call_result
+from services.jobs import InvalidWebhookError, QueueFullError, job_queue
+from utils.logger import setup_logger
+from utils.uploads import UploadTooLargeError, remove_quietly, save_upload
+
+router = APIRouter()
+logger = setup_logger(__name__)
+
+JOB_UPLOAD_DIR = os.path.join(config.UPLOAD_DIR, "jobs")
+RETRY_AFTER = {"Retry-After": "30"}
+
+async def run_call_job(payload: Dict) -> Dict:
+    """Run the call pipeline for a queued job; the audio file is removed once it has run.
+
+    A job cancelled by shutdown keeps its audio, since it is re-queued.
+    """
+    try:
+        results, timings = await build_call_pipeline(payload["audio_path"], payload.get("file_hash")).run()
+    except Exception:
+        remove_quietly(payload["audio_path"])
+        raise
+    remove_quietly(payload["audio_path"])
+    return format_call_result(results, timings)
+
+job_queue.register("call", run_call_job)
+
+@router.post("/jobs", status_code=202)
+async def submit_call_job(
+    audio_file: UploadFile = File(...),
+    priority: int = Form(0),
+    webhook_url: Optional[str] = Form(None),
+):
+    """Queue sales call audio for processing and return a job id immediately"""
+    # Starlette has already spooled the body (bounded by UploadSizeLimitMiddleware); refuse
+    # before copying it into the jobs directory. submit() re-checks as it stores the job.
+    if await job_queue.queued() >= job_queue.max_pending:
+        raise HTTPException(status_code=429, detail="Job queue is full, retry later", headers=RETRY_AFTER)
+
+    audio_path = None
+    try:
+        upload = await save_upload(
+            audio_file,
+            JOB_UPLOAD_DIR,
+            max_size=config.MAX_FILE_SIZE,
+            chunk_size=config.UPLOAD_CHUNK_SIZE,
+        )
+        audio_path = upload.path
+        job = await job_queue.submit(
+            "call",
+            {"audio_path": audio_path, "file_hash": upload.sha256},
+            priority=priority,
+            webhook_url=webhook_url,
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except QueueFullError as e:
+        remove_quietly(audio_path)
+        raise HTTPException(status_code=429, detail=str(e), headers=RETRY_AFTER)
+    except InvalidWebhookError as e:
+        remove_quietly(audio_path)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        if audio_path:
+            remove_quietly(audio_path)
+        logger.error(f"Error queueing call job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue call: {str(e)}")
+
+    return {
+        "job_id": job["id"],
+        "status": "queued",
+        "priority": priority,
+        "pending": await job_queue.queued(),
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status, plus the call result once completed"""
+    job = await job_queue.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "priority": job["priority"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "result": job["result"],
+        "error": job["error"],
+    }
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from config import config
+from services.container import container
+from utils.logger import setup_logger
+
+router = APIRouter()
+logger = setup_logger(__name__)
+
+class SimilarLeadsRequest(BaseModel):
+    text: str
+    limit: int = Field(5, ge=1, le=50)
+    kind: Optional[Literal["email", "call"]] = None
+    min_similarity: float = Field(0.0, ge=-1.0, le=1.0)
+
+@router.post("/similar-leads")
+async def similar_leads(request: SimilarLeadsRequest):
+    """Previously processed emails and calls most similar to the given text, best first"""
+    if not config.SIMILARITY_ENABLED:
+        raise HTTPException(status_code=404, detail="Similarity index is disabled")
+    try:
+        matches = await container.similarity.search(
+            request.text, limit=request.limit, kind=request.kind, min_similarity=request.min_similarity
+        )
+    except Exception as e:
+        logger.error(f"Error searching similar leads: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to search similar leads: {str(e)}")
+    return {"matches": matches}
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import re
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from typing import Awaitable, List, Optional, Union
+from config import config
+from services.container import container
+from services.live_scoring import LiveCallScorer
+from utils.logger import setup_logger
+from utils.metrics import LIVE_SESSIONS
+from utils.uploads import remove_quietly, save_bytes
+
+router = APIRouter()
+logger = setup_logger(__name__)
+
+# Fragments waiting to be scored; a full queue stops reading from the socket
+MAX_QUEUED_FRAGMENTS = 32
+
+async def _score_fragments(websocket: WebSocket, scorer: LiveCallScorer,
+                           queue: asyncio.Queue, transcript: List[str]):
+    """Score queued text and (audio bytes, format) fragments in arrival order"""
+    while (fragment := await queue.get()) is not None:
+        if isinstance(fragment, tuple):
+            audio, audio_format = fragment
+            path = await save_bytes(audio, config.UPLOAD_DIR, f"chunk.{audio_format}")
+            try:
+                fragment = await container.transcription.transcribe_audio(path)
+            except Exception as e:
+                logger.error(f"Error transcribing live audio chunk: {str(e)}")
+                await websocket.send_json({"type": "error", "detail": f"Failed to transcribe audio chunk: {str(e)}"})
+                continue
+            finally:
+                remove_quietly(path)
+            await websocket.send_json({"type": "transcript", "text": fragment})
+
+        events = scorer.feed(fragment)
+        if events:
+            transcript.append(fragment.strip())
+        for event in events:
+            await websocket.send_json(event)
+
+async def _unless_failed(worker: asyncio.Task, awaitable: Awaitable):
+    """Await `awaitable`, but raise the scoring worker's exception if the worker fails first"""
+    step = asyncio.ensure_future(awaitable)
+    try:
+        await asyncio.wait({step, worker}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if not step.done():
+            step.cancel()
+    if not step.done():
+        worker.result()
+    return step.result()
+
+def _parse_message(message: dict) -> Union[bytes, dict, None]:
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    if message.get("bytes") is not None:
+        return message["bytes"]
+    try:
+        data = json.loads(message.get("text") or "")
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+@router.websocket("/live-call")
+async def live_call(websocket: WebSocket):
+    """Score a call while it is in progress.
+
+    Send transcript fragments as {"type": "text", "text": ...} and audio chunks
+    as binary frames (each a complete file, WAV unless {"type": "start",
+    "audio_format": "webm"} came first); finish with {"type": "end"}. Each
+    fragment is answered with a "score" event (score, tier, factors, intent),
+    preceded by "tier_changed" when the hot/warm/cold tier moves; the last
+    event is "final" with the full transcript. If scoring fails, the session
+    ends with an "error" event and close code 1011.
+    """
+    await websocket.accept()
+    LIVE_SESSIONS.inc()
+    scorer = LiveCallScorer()
+    transcript: List[str] = []
+    audio_format = "wav"
+    queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_QUEUED_FRAGMENTS)
+    worker: Optional[asyncio.Task] = asyncio.create_task(
+        _score_fragments(websocket, scorer, queue, transcript)
+    )
+    try:
+        while True:
+            data = _parse_message(await _unless_failed(worker, websocket.receive()))
+            if isinstance(data, bytes):
+                if len(data) > config.MAX_FILE_SIZE:
+                    await websocket.send_json({"type": "error", "detail": f"Audio chunk exceeds maximum size of {config.MAX_FILE_SIZE} bytes"})
+                else:
+                    await _unless_failed(worker, queue.put((data, audio_format)))
+            elif data is None:
+                await websocket.send_json({"type": "error", "detail": "Expected a JSON object or a binary audio frame"})
+            elif data.get("type") == "text":
+                await _unless_failed(worker, queue.put(str(data.get("text", ""))))
+            elif data.get("type") == "start":
+                audio_format = re.sub(r"[^a-z0-9]", "", str(data.get("audio_format", "wav")).lower()) or "wav"
+            elif data.get("type") == "end":
+                await _unless_failed(worker, queue.put(None))
+                await worker
+                worker = None
+                await websocket.send_json({"type": "final", **scorer.snapshot(), "transcript": " ".join(transcript)})
+                await websocket.close()
+                return
+            else:
+                await websocket.send_json({"type": "error", "detail": f"Unknown message type: {data.get('type')}"})
+    except WebSocketDisconnect:
+        logger.info("Live call client disconnected")
+    except Exception as e:
+        # The scoring worker failed: report it instead of waiting on a queue nobody drains
+        logger.error(f"Error scoring live call: {str(e)}")
+        try:
+            await websocket.send_json({"type": "error", "detail": f"Live scoring failed: {str(e)}"})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+    finally:
+        if worker is not None:
+            worker.cancel()
+        LIVE_SESSIONS.inc(-1)
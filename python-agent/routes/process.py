@@ -1,14 +1,17 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Body
-from typing import Optional
-from pydantic import BaseModel
-import aiofiles
-import os
+import asyncio
+import json
+from fastapi import APIRouter, UploadFile, File, HTTPException, Body, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from pydantic import BaseModel, ValidationError
 from config import config
-from services.transcription import TranscriptionService
-from services.analysis import AnalysisService
-from services.intent import IntentService
-from services.llm import LLMService
+from services.container import container
+from services.gateway import ProviderUnavailableError
+from utils.helpers import clean_text
 from utils.logger import setup_logger
+from utils.metrics import CACHE_LOOKUPS
+from utils.pipeline import StagePipeline
+from utils.uploads import UploadTooLargeError, remove_quietly, save_upload
 
 class EmailProcessRequest(BaseModel):
     email_body: str
@@ -18,126 +21,442 @@ class EmailProcessRequest(BaseModel):
 logger = setup_logger(__name__)
 
 router = APIRouter()
-transcription_service = TranscriptionService()
-analysis_service = AnalysisService()
-intent_service = IntentService()
-llm_service = LLMService()
+
+EmailDeltaCallback = Callable[[str], Awaitable[None]]
+
+async def _stream_email_response(email_body: str, lead_info: Dict, on_email_delta: EmailDeltaCallback) -> str:
+    parts = []
+    async for delta in container.llm.stream_email_response(email_body, lead_info):
+        parts.append(delta)
+        await on_email_delta(delta)
+    return "".join(parts).strip()
+
+def email_response_stage(email_body: str, lead_info: Dict, on_email_delta: Optional[EmailDeltaCallback] = None):
+    """Generate the reply in one call, or token by token when a delta callback is given"""
+    if on_email_delta is None:
+        return container.llm.generate_email_response(email_body, lead_info)
+    return _stream_email_response(email_body, lead_info, on_email_delta)
+
+async def fused_extraction_stage(transcription: str, lead_analysis: Dict) -> Dict:
+    """One combined Claude call, falling back to the per-field extractors if it fails validation"""
+    extraction = await container.llm.extract_all(transcription, lead_analysis)
+    if extraction is not None:
+        return extraction
+
+    logger.info("Falling back to per-field extraction")
+    intent, requirements, lead_info, next_step = await asyncio.gather(
+        container.intent.detect_intent(transcription),
+        container.llm.extract_requirements(transcription),
+        container.llm.extract_lead_info(transcription),
+        container.llm.suggest_next_step(transcription, lead_analysis),
+    )
+    return {
+        'intent': intent,
+        'requirements': requirements,
+        'lead_info': lead_info,
+        'next_step': next_step,
+    }
+
+async def near_duplicate_stage(kind: str, text: str, reusable: Tuple[str, ...]) -> Optional[Dict]:
+    """The closest already-processed text of `kind` above SIMILARITY_DUPLICATE_THRESHOLD, if any.
+
+    Only its id, similarity and the `reusable` stage results are kept; the
+    stored summary (the earlier sender, their lead score) never leaves here.
+    """
+    if not config.SIMILARITY_ENABLED:
+        return None
+    try:
+        match = await container.similarity.find_duplicate(kind, text, config.SIMILARITY_DUPLICATE_THRESHOLD)
+    except Exception as e:
+        logger.error(f"Error searching the similarity index: {str(e)}")
+        return None
+    CACHE_LOOKUPS.inc(stage="near_duplicate", result="miss" if match is None else "hit")
+    if match is None:
+        return None
+    return {
+        "id": match["id"],
+        "similarity": match["similarity"],
+        "result": {stage: match["result"][stage] for stage in reusable if stage in match["result"]},
+    }
+
+async def index_stage(kind: str, text: str, summary: Dict, result: Dict) -> Optional[int]:
+    """Add a processed text to the similarity index; a failure only costs future reuse"""
+    if not config.SIMILARITY_ENABLED:
+        return None
+    try:
+        return await container.similarity.add(kind, text, summary, result)
+    except Exception as e:
+        logger.error(f"Error indexing {kind}: {str(e)}")
+        return None
+
+# Email stages a near-duplicate may answer: they depend on the body alone, never on the sender
+REUSABLE_EMAIL_STAGES = ("intent", "requirements")
+
+def build_call_pipeline(audio_path: str, file_hash: Optional[str] = None,
+                        on_email_delta: Optional[EmailDeltaCallback] = None) -> StagePipeline:
+    """Stage graph for a recorded call; only the email stage waits on the extractors.
+
+    Lead scoring reads the full transcript; the Claude prompts read `digest`,
+    which is the transcript itself unless it is over DIGEST_THRESHOLD_TOKENS.
+    """
+    pipeline = StagePipeline()
+    pipeline.add("transcription", lambda: container.transcription.transcribe_audio(audio_path, file_hash))
+    pipeline.add("lead_analysis", lambda transcription: container.analysis.score_lead(transcription),
+                 depends_on=["transcription"])
+    pipeline.add("digest", lambda transcription: container.digest.prepare(transcription),
+                 depends_on=["transcription"])
+    if config.EXTRACTION_MODE == "fused":
+        pipeline.add("extraction", lambda digest, lead_analysis: fused_extraction_stage(digest, lead_analysis),
+                     depends_on=["digest", "lead_analysis"])
+        for field in ("intent", "requirements", "lead_info", "next_step"):
+            pipeline.add(field, lambda extraction, field=field: extraction[field], depends_on=["extraction"])
+    else:
+        pipeline.add("intent", lambda digest: container.intent.detect_intent(digest),
+                     depends_on=["digest"])
+        pipeline.add("requirements", lambda digest: container.llm.extract_requirements(digest),
+                     depends_on=["digest"])
+        pipeline.add("lead_info", lambda digest: container.llm.extract_lead_info(digest),
+                     depends_on=["digest"])
+        pipeline.add("next_step",
+                     lambda digest, lead_analysis: container.llm.suggest_next_step(digest, lead_analysis),
+                     depends_on=["digest", "lead_analysis"])
+    pipeline.add(
+        "email_response",
+        lambda digest, lead_info, lead_analysis, requirements: email_response_stage(
+            digest,
+            {**lead_info, **lead_analysis, 'requirements': requirements},
+            on_email_delta
+        ),
+        depends_on=["digest", "lead_info", "lead_analysis", "requirements"],
+    )
+    pipeline.add(
+        "index",
+        lambda transcription, intent, requirements, lead_info, lead_analysis, next_step, email_response: index_stage(
+            "call",
+            transcription,
+            {
+                'intent': intent['intent'],
+                'requirements': requirements,
+                'lead_name': lead_info.get('name'),
+                'lead_email': lead_info.get('email'),
+                'company': lead_info.get('company'),
+                'lead_score': lead_analysis['score'],
+                'lead_tier': lead_analysis['tier'],
+                'next_step': next_step,
+            },
+            {},
+        ),
+        depends_on=["transcription", "intent", "requirements", "lead_info", "lead_analysis",
+                    "next_step", "email_response"],
+    )
+    return pipeline
+
+def build_email_pipeline(request: EmailProcessRequest,
+                         on_email_delta: Optional[EmailDeltaCallback] = None) -> StagePipeline:
+    """Stage graph for an inbound email.
+
+    A near-duplicate of an email already processed (a resend, a forward, a
+    light edit) reuses its intent and requirements instead of calling Claude
+    again. Lead scoring is local and always recomputed, and the reply is
+    always written for the current sender, so nothing about one sender
+    reaches another's response.
+    """
+    email_body = request.email_body
+    from_email = request.from_email
+
+    def reuse(near_duplicate: Optional[Dict], stage: str, compute: Callable[[], Any]):
+        if near_duplicate is not None and stage in near_duplicate["result"]:
+            return near_duplicate["result"][stage]
+        return compute()
+
+    pipeline = StagePipeline()
+    pipeline.add("near_duplicate", lambda: near_duplicate_stage("email", email_body, REUSABLE_EMAIL_STAGES))
+    pipeline.add("intent",
+                 lambda near_duplicate: reuse(near_duplicate, "intent",
+                                              lambda: container.intent.detect_intent(email_body)),
+                 depends_on=["near_duplicate"])
+    pipeline.add("lead_analysis", lambda: container.analysis.score_lead("", email_body))
+    pipeline.add("requirements",
+                 lambda near_duplicate: reuse(near_duplicate, "requirements",
+                                              lambda: container.llm.extract_requirements(email_body)),
+                 depends_on=["near_duplicate"])
+    pipeline.add(
+        "email_response",
+        lambda lead_analysis, requirements: email_response_stage(
+            email_body,
+            {
+                'name': from_email.split('@')[0],
+                'email': from_email,
+                'requirements': requirements,
+                **lead_analysis
+            },
+            on_email_delta
+        ),
+        depends_on=["lead_analysis", "requirements"],
+    )
+    pipeline.add(
+        "index",
+        lambda near_duplicate, intent, requirements, lead_analysis, email_response: None if near_duplicate else index_stage(
+            "email",
+            email_body,
+            {
+                'sender': from_email,
+                'intent': intent['intent'],
+                'confidence': intent.get('confidence', 0.5),
+                'requirements': requirements,
+                'lead_score': lead_analysis['score'],
+                'lead_tier': lead_analysis['tier'],
+            },
+            # Only what depends on the body alone is reused; the sender and the reply are not
+            {'intent': intent, 'requirements': requirements},
+        ),
+        depends_on=["near_duplicate", "intent", "requirements", "lead_analysis", "email_response"],
+    )
+    return pipeline
+
+def format_call_result(results: Dict, timings: Dict) -> Dict:
+    """Shape call pipeline results into the /process-call response"""
+    intent_result = results["intent"]
+    lead_analysis = results["lead_analysis"]
+    lead_info = results["lead_info"]
+    return {
+        "transcription": results["transcription"],
+        "intent": intent_result["intent"],
+        "confidence": intent_result.get("confidence", 0.5),
+        "lead_score": lead_analysis["score"],
+        "lead_tier": lead_analysis["tier"],
+        "requirements": results["requirements"],
+        "suggested_email": results["email_response"],
+        "next_step": results["next_step"],
+        "lead_name": lead_info.get("name"),
+        "lead_email": lead_info.get("email"),
+        "lead_phone": lead_info.get("phone"),
+        "company": lead_info.get("company"),
+        "extraction_mode": config.EXTRACTION_MODE,
+        "digested": results["digest"] is not results["transcription"],
+        "stage_timings": timings,
+    }
+
+def format_email_result(request: EmailProcessRequest, results: Dict, timings: Dict) -> Dict:
+    """Shape email pipeline results into the /process-email response"""
+    intent_result = results["intent"]
+    lead_analysis = results["lead_analysis"]
+    near_duplicate = results["near_duplicate"]
+    return {
+        "sender": request.from_email,
+        "intent": intent_result["intent"],
+        "confidence": intent_result.get("confidence", 0.5),
+        "lead_score": lead_analysis["score"],
+        "lead_tier": lead_analysis["tier"],
+        "suggested_response": results["email_response"],
+        "extracted_data": {
+            "requirements": results["requirements"],
+            "factors": lead_analysis.get("factors", {})
+        },
+        "near_duplicate_of": near_duplicate and {"id": near_duplicate["id"], "similarity": near_duplicate["similarity"]},
+        "stage_timings": timings,
+    }
+
+# Stages that only feed other stages; their results are not streamed to the client
+INTERNAL_STAGES = {"near_duplicate", "digest", "index"}
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_pipeline_events(build: Callable[[EmailDeltaCallback], StagePipeline],
+                                 format_result: Callable[[Dict, Dict], Dict],
+                                 cleanup: Optional[Callable[[], None]] = None) -> AsyncIterator[str]:
+    """Run a pipeline, yielding an SSE event per finished stage (except INTERNAL_STAGES) and per email token"""
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def on_email_delta(delta: str):
+        await events.put(("email_delta", {"text": delta}))
+
+    async def on_stage_complete(name: str, result, elapsed_ms: float):
+        if name not in INTERNAL_STAGES:
+            await events.put((name, {"result": result, "elapsed_ms": elapsed_ms}))
+
+    runner = asyncio.create_task(build(on_email_delta).run(on_stage_complete=on_stage_complete))
+    runner.add_done_callback(lambda _: events.put_nowait(None))
+    try:
+        while True:
+            item = await events.get()
+            if item is None:
+                break
+            yield sse_event(*item)
+
+        results, timings = runner.result()
+        yield sse_event("done", format_result(results, timings))
+    except Exception as e:
+        logger.error(f"Error streaming pipeline: {str(e)}")
+        yield sse_event("error", {"detail": str(e)})
+    finally:
+        # Client disconnects close the generator early; stop the remaining stages
+        if not runner.done():
+            runner.cancel()
+        if cleanup:
+            cleanup()
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.post("/process-call")
 async def process_call(audio_file: UploadFile = File(...)):
     """Process sales call audio"""
+    audio_path = None
     try:
-        # Ensure upload directory exists
-        os.makedirs(config.UPLOAD_DIR, exist_ok=True)
-        
-        # Save audio temporarily
-        audio_path = os.path.join(config.UPLOAD_DIR, f"temp_{audio_file.filename}")
-        
-        async with aiofiles.open(audio_path, 'wb') as f:
-            content = await audio_file.read()
-            await f.write(content)
-        
-        logger.info(f"Saved audio file: {audio_path}")
-        
-        # 1. Transcribe
-        logger.info("Starting transcription...")
-        transcription = await transcription_service.transcribe_audio(audio_path)
-        
-        # 2. Detect intent
-        logger.info("Detecting intent...")
-        intent_result = await intent_service.detect_intent(transcription)
-        
-        # 3. Analyze lead
-        logger.info("Analyzing lead...")
-        lead_analysis = analysis_service.score_lead(transcription)
-        
-        # 4. Extract requirements
-        logger.info("Extracting requirements...")
-        requirements = await llm_service.extract_requirements(transcription)
-        
-        # 5. Extract lead info
-        logger.info("Extracting lead information...")
-        lead_info = await llm_service.extract_lead_info(transcription)
-        
-        # 6. Generate email response
-        logger.info("Generating email response...")
-        email_response = await llm_service.generate_email_response(
-            transcription,
-            {**lead_info, **lead_analysis, 'requirements': requirements}
+        upload = await save_upload(
+            audio_file,
+            config.UPLOAD_DIR,
+            max_size=config.MAX_FILE_SIZE,
+            chunk_size=config.UPLOAD_CHUNK_SIZE,
         )
+        audio_path = upload.path
+        logger.info(f"Saved audio file: {audio_path} ({upload.size} bytes)")
         
-        # 7. Suggest next step
-        logger.info("Suggesting next step...")
-        next_step = await llm_service.suggest_next_step(transcription, lead_analysis)
-        
-        # Clean up temp file
-        try:
-            os.remove(audio_path)
-        except:
-            pass
-        
-        return {
-            "transcription": transcription,
-            "intent": intent_result["intent"],
-            "confidence": intent_result.get("confidence", 0.5),
-            "lead_score": lead_analysis["score"],
-            "lead_tier": lead_analysis["tier"],
-            "requirements": requirements,
-            "suggested_email": email_response,
-            "next_step": next_step,
-            "lead_name": lead_info.get("name"),
-            "lead_email": lead_info.get("email"),
-            "lead_phone": lead_info.get("phone"),
-            "company": lead_info.get("company"),
-        }
+        results, timings = await build_call_pipeline(audio_path, upload.sha256).run()
+        return format_call_result(results, timings)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(config.CIRCUIT_RESET_SECONDS))})
     except Exception as e:
         logger.error(f"Error processing call: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to process call: {str(e)}")
+    finally:
+        if audio_path:
+            remove_quietly(audio_path)
 
 @router.post("/process-email")
 async def process_email(request: EmailProcessRequest):
     """Process email content"""
     try:
-        email_body = request.email_body
-        from_email = request.from_email
-        subject = request.subject
-        # 1. Detect intent
-        logger.info("Detecting intent...")
-        intent_result = await intent_service.detect_intent(email_body)
-        
-        # 2. Analyze lead
-        logger.info("Analyzing lead...")
-        lead_analysis = analysis_service.score_lead("", email_body)
-        
-        # 3. Extract requirements
-        logger.info("Extracting requirements...")
-        requirements = await llm_service.extract_requirements(email_body)
-        
-        # 4. Generate response
-        logger.info("Generating email response...")
-        email_response = await llm_service.generate_email_response(
-            email_body,
-            {
-                'name': from_email.split('@')[0],
-                'email': from_email,
-                'requirements': requirements,
-                **lead_analysis
-            }
-        )
-        
-        return {
-            "sender": from_email,
-            "intent": intent_result["intent"],
-            "confidence": intent_result.get("confidence", 0.5),
-            "lead_score": lead_analysis["score"],
-            "lead_tier": lead_analysis["tier"],
-            "suggested_response": email_response,
-            "extracted_data": {
-                "requirements": requirements,
-                "factors": lead_analysis.get("factors", {})
-            }
-        }
+        results, timings = await build_email_pipeline(request).run()
+        return format_email_result(request, results, timings)
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(config.CIRCUIT_RESET_SECONDS))})
     except Exception as e:
         logger.error(f"Error processing email: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to process email: {str(e)}")
 
+@router.post("/process-call/stream")
+async def process_call_stream(audio_file: UploadFile = File(...)):
+    """Process sales call audio, streaming each stage result as Server-Sent Events"""
+    try:
+        upload = await save_upload(
+            audio_file,
+            config.UPLOAD_DIR,
+            max_size=config.MAX_FILE_SIZE,
+            chunk_size=config.UPLOAD_CHUNK_SIZE,
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error saving call upload: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to process call: {str(e)}")
+
+    return sse_response(stream_pipeline_events(
+        lambda on_email_delta: build_call_pipeline(upload.path, upload.sha256, on_email_delta),
+        format_call_result,
+        cleanup=lambda: remove_quietly(upload.path),
+    ))
+
+@router.post("/process-email/stream")
+async def process_email_stream(request: EmailProcessRequest):
+    """Process email content, streaming each stage result as Server-Sent Events"""
+    return sse_response(stream_pipeline_events(
+        lambda on_email_delta: build_email_pipeline(request, on_email_delta),
+        lambda results, timings: format_email_result(request, results, timings),
+    ))
+
+def parse_batch_items(body: bytes, content_type: str) -> List[Union[EmailProcessRequest, str]]:
+    """Parse a JSON array / {"items": [...]} or NDJSON body; invalid items become error strings"""
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        raw_items = []
+        for line in body.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                raw_items.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raw_items.append(f"Invalid JSON line: {str(e)}")
+    else:
+        try:
+            payload = json.loads(body or b"null")
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+        raw_items = payload.get("items") if isinstance(payload, dict) else payload
+        if not isinstance(raw_items, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of emails or {\"items\": [...]}")
+
+    items: List[Union[EmailProcessRequest, str]] = []
+    for raw in raw_items:
+        if isinstance(raw, str):
+            items.append(raw)
+            continue
+        try:
+            items.append(EmailProcessRequest.model_validate(raw))
+        except ValidationError as e:
+            items.append(f"Invalid email item: {e.errors(include_url=False)}")
+    return items
+
+async def stream_email_batch(items: List[Union[EmailProcessRequest, str]], concurrency: int) -> AsyncIterator[str]:
+    """Process emails with bounded concurrency, yielding NDJSON results in input order.
+
+    Items with the same normalized body and sender share one pipeline run.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(item: EmailProcessRequest) -> Dict:
+        async with semaphore:
+            results, timings = await build_email_pipeline(item).run()
+            return format_email_result(item, results, timings)
+
+    tasks: Dict[tuple, asyncio.Task] = {}
+    first_index: Dict[tuple, int] = {}
+    plan = []
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            plan.append((item, None))
+            continue
+        key = (clean_text(item.email_body), item.from_email.lower())
+        if key not in tasks:
+            tasks[key] = asyncio.create_task(run(item))
+            first_index[key] = index
+        plan.append((None, key))
+
+    try:
+        for index, (error, key) in enumerate(plan):
+            line = {"index": index}
+            if error is not None:
+                line["error"] = error
+            else:
+                try:
+                    line["result"] = await tasks[key]
+                except Exception as e:
+                    logger.error(f"Error processing batch item {index}: {str(e)}")
+                    line["error"] = f"Failed to process email: {str(e)}"
+                if first_index[key] != index:
+                    line["duplicate_of"] = first_index[key]
+            yield json.dumps(line) + "\n"
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+@router.post("/process-emails/batch")
+async def process_emails_batch(
+    request: Request,
+    concurrency: Optional[int] = Query(None, ge=1, description="Parallel pipelines (capped by BATCH_MAX_CONCURRENCY)"),
+):
+    """Process many emails (JSON array or NDJSON), streaming NDJSON results in input order"""
+    items = parse_batch_items(await request.body(), request.headers.get("content-type", ""))
+    if len(items) > config.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {config.BATCH_MAX_ITEMS} items")
+
+    limit = min(concurrency or config.BATCH_MAX_CONCURRENCY, config.BATCH_MAX_CONCURRENCY)
+    logger.info(f"Processing email batch of {len(items)} items (concurrency={limit})")
+    return StreamingResponse(stream_email_batch(items, limit), media_type="application/x-ndjson")
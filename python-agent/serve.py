@@ -0,0 +1,44 @@
+"""Production entry point: runs the agent on multiple worker processes.
+
+Run from python-agent/:  python serve.py [--workers N] [--host HOST] [--port PORT]
+
+Each worker is a separate process with its own provider clients, caches and
+job workers, set up and torn down by the lifespan handler in main.py. On
+SIGTERM/SIGINT uvicorn stops accepting connections and gives open requests
+SHUTDOWN_DRAIN_SECONDS to finish before the lifespan drains background work.
+
+With more than one worker, /metrics is answered by whichever worker takes
+the scrape, so the workers share snapshots in METRICS_DIR (default
+./data/metrics, emptied at launch) and every scrape reports their sum.
+"""
+import argparse
+import os
+import uvicorn
+from config import config
+from utils.metrics import reset_shared_metrics
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=config.WORKERS or os.cpu_count() or 1,
+                        help="worker processes (default: WORKERS, or one per CPU)")
+    parser.add_argument("--host", default=config.HOST)
+    parser.add_argument("--port", type=int, default=config.PORT)
+    args = parser.parse_args(argv)
+
+    if args.workers > 1:
+        # Workers are started after this and read the setting from the environment
+        os.environ["METRICS_DIR"] = config.METRICS_DIR or "./data/metrics"
+        reset_shared_metrics(os.environ["METRICS_DIR"])
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=int(config.SHUTDOWN_DRAIN_SECONDS),
+        log_level=config.LOG_LEVEL.lower(),
+        proxy_headers=True,
+    )
+
+if __name__ == "__main__":
+    main()
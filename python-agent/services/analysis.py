@@ -1,84 +1,80 @@
-from typing import Dict, List
+from typing import Dict, List, Set
+from utils.keywords import KeywordMatcher
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Lead signal keywords and the points each category contributes
+LEAD_SIGNALS = KeywordMatcher({
+    'budget_mentioned': ['budget', 'price', 'cost', '$', 'dollar', 'afford', 'pricing', 'quote'],
+    'timeline_clear': ['quarter', 'month', 'week', 'soon', 'asap', 'urgent', 'timeline', 'deadline', 'when'],
+    'pain_points_clear': ['problem', 'issue', 'challenge', 'struggle', 'slow', 'difficult', 'need', 'want', 'looking for'],
+    'authority_indicated': ['we', 'team', 'company', 'decision', 'decide', 'approve', 'manager', 'director', 'ceo'],
+})
+SIGNAL_POINTS = {
+    'budget_mentioned': 25,
+    'timeline_clear': 20,
+    'pain_points_clear': 20,
+    'authority_indicated': 15,
+}
+
+# (minimum combined text length, points, factor), checked in order
+ENGAGEMENT_LEVELS = [
+    (500, 20, 'high_engagement'),
+    (200, 10, 'moderate_engagement'),
+]
+# (minimum score, tier), checked in order; anything lower is 'cold'
+TIER_THRESHOLDS = [
+    (70, 'hot'),
+    (40, 'warm'),
+]
+
+REQUIREMENT_SIGNALS = KeywordMatcher({
+    'integration': ['integrate', 'integration', 'connect', 'api'],
+    'customization': ['custom', 'customize', 'tailor', 'specific'],
+    'scalability': ['scale', 'scalable', 'growth', 'expand'],
+    'security': ['security', 'secure', 'encryption', 'compliance'],
+    'support': ['support', 'help', 'assistance', 'training'],
+})
+
+def score_signals(found: Set[str], total_length: int) -> Dict:
+    """Score, tier and factors from the lead signal categories found and the text length"""
+    score = 0
+    factors = {}
+    
+    for factor, points in SIGNAL_POINTS.items():
+        if factor in found:
+            score += points
+            factors[factor] = True
+    
+    # Length of conversation (engagement)
+    for min_length, points, factor in ENGAGEMENT_LEVELS:
+        if total_length > min_length:
+            score += points
+            factors[factor] = True
+            break
+    
+    # Ensure score is between 1-100
+    score = max(1, min(score, 100))
+    
+    # Determine tier
+    tier = next((name for min_score, name in TIER_THRESHOLDS if score >= min_score), 'cold')
+    
+    return {
+        'score': score,
+        'tier': tier,
+        'factors': factors
+    }
+
 class AnalysisService:
     def score_lead(self, transcript: str, email_body: str = "") -> Dict:
         """Score lead on scale 1-100 based on conversation indicators"""
-        score = 0
-        factors = {}
-        
-        text = (transcript + " " + email_body).lower()
-        
-        # Check for budget mention
-        budget_keywords = ['budget', 'price', 'cost', '$', 'dollar', 'afford', 'pricing', 'quote']
-        if any(keyword in text for keyword in budget_keywords):
-            score += 25
-            factors['budget_mentioned'] = True
-        
-        # Check for timeline
-        timeline_keywords = ['quarter', 'month', 'week', 'soon', 'asap', 'urgent', 'timeline', 'deadline', 'when']
-        if any(keyword in text for keyword in timeline_keywords):
-            score += 20
-            factors['timeline_clear'] = True
-        
-        # Check for pain points
-        pain_keywords = ['problem', 'issue', 'challenge', 'struggle', 'slow', 'difficult', 'need', 'want', 'looking for']
-        if any(keyword in text for keyword in pain_keywords):
-            score += 20
-            factors['pain_points_clear'] = True
-        
-        # Check for decision authority
-        authority_keywords = ['we', 'team', 'company', 'decision', 'decide', 'approve', 'manager', 'director', 'ceo']
-        if any(keyword in text for keyword in authority_keywords):
-            score += 15
-            factors['authority_indicated'] = True
-        
-        # Length of conversation (engagement)
-        total_length = len(transcript) + len(email_body)
-        if total_length > 500:
-            score += 20
-            factors['high_engagement'] = True
-        elif total_length > 200:
-            score += 10
-            factors['moderate_engagement'] = True
-        
-        # Ensure score is between 1-100
-        score = max(1, min(score, 100))
-        
-        # Determine tier
-        if score >= 70:
-            tier = 'hot'
-        elif score >= 40:
-            tier = 'warm'
-        else:
-            tier = 'cold'
-        
-        return {
-            'score': score,
-            'tier': tier,
-            'factors': factors
-        }
+        # Budget, timeline, pain points and decision authority in one scan
+        found = LEAD_SIGNALS.categories_in(transcript + " " + email_body)
+        return score_signals(found, len(transcript) + len(email_body))
     
     def extract_requirements(self, text: str) -> List[str]:
         """Extract basic requirements from text (simple keyword-based)"""
-        requirements = []
-        
-        text_lower = text.lower()
-        
-        # Common requirement patterns
-        requirement_patterns = {
-            'integration': ['integrate', 'integration', 'connect', 'api'],
-            'customization': ['custom', 'customize', 'tailor', 'specific'],
-            'scalability': ['scale', 'scalable', 'growth', 'expand'],
-            'security': ['security', 'secure', 'encryption', 'compliance'],
-            'support': ['support', 'help', 'assistance', 'training'],
-        }
-        
-        for req_type, keywords in requirement_patterns.items():
-            if any(keyword in text_lower for keyword in keywords):
-                requirements.append(req_type)
-        
-        return requirements
+        found = REQUIREMENT_SIGNALS.categories_in(text)
+        return [req_type for req_type in REQUIREMENT_SIGNALS.categories if req_type in found]
 
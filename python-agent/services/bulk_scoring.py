@@ -0,0 +1,116 @@
+"""Vectorized lead scoring over tables of transcripts / email bodies.
+
+Produces exactly what AnalysisService.score_lead returns for each row, as
+columns. Usable as a CLI over an export of the Interaction or Call table:
+
+    python -m services.bulk_scoring interactions.parquet scored.parquet --transcript-column content
+
+Parquet files need pyarrow (or fastparquet) installed; CSV works out of the box.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from typing import Optional
+from utils.logger import setup_logger
+from services.analysis import ENGAGEMENT_LEVELS, LEAD_SIGNALS, SIGNAL_POINTS, TIER_THRESHOLDS
+
+logger = setup_logger(__name__)
+
+FACTOR_COLUMNS = list(SIGNAL_POINTS) + [factor for _, _, factor in ENGAGEMENT_LEVELS]
+SIGNAL_PATTERNS = [LEAD_SIGNALS.category_pattern(factor) for factor in SIGNAL_POINTS]
+
+# Below this many distinct texts a process pool costs more than it saves
+MIN_PARALLEL_TEXTS = 50000
+
+def _signal_hits(texts: pd.Series) -> np.ndarray:
+    """(len(texts), len(SIGNAL_POINTS)) boolean matrix of keyword-category hits"""
+    lowered = texts.str.lower()
+    return np.column_stack([
+        lowered.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+        for pattern in SIGNAL_PATTERNS
+    ])
+
+def score_frame(data, transcript_column: str = "transcription",
+                email_column: Optional[str] = None, workers: int = 1) -> pd.DataFrame:
+    """Score every row; returns `score`, `tier` and one boolean column per factor.
+
+    `data` may be a pandas DataFrame or anything with `to_pandas()` (e.g. a
+    pyarrow Table). Missing text is treated as empty, like score_lead's defaults.
+    Each distinct text is matched once, split across `workers` processes.
+    """
+    frame = data.to_pandas() if hasattr(data, "to_pandas") else data
+    transcript = frame[transcript_column].fillna("").astype(str)
+    if email_column:
+        email_body = frame[email_column].fillna("").astype(str)
+    else:
+        email_body = pd.Series("", index=frame.index)
+
+    codes, texts = pd.factorize(transcript + " " + email_body)
+    texts = pd.Series(texts, dtype=object)
+    if workers > 1 and len(texts) >= MIN_PARALLEL_TEXTS:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            bounds = np.linspace(0, len(texts), workers + 1, dtype=int)
+            chunks = [texts.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+            unique_hits = np.vstack(list(pool.map(_signal_hits, chunks)))
+    else:
+        unique_hits = _signal_hits(texts)
+    hits = unique_hits[codes]
+
+    result = pd.DataFrame(index=frame.index)
+    score = np.zeros(len(frame), dtype=np.int64)
+    for column, (factor, points) in enumerate(SIGNAL_POINTS.items()):
+        result[factor] = hits[:, column]
+        score += points * hits[:, column]
+
+    total_length = transcript.str.len().to_numpy() + email_body.str.len().to_numpy()
+    matched = np.zeros(len(frame), dtype=bool)
+    for min_length, points, factor in ENGAGEMENT_LEVELS:
+        level = (total_length > min_length) & ~matched
+        result[factor] = level
+        score += points * level
+        matched |= level
+
+    score = np.clip(score, 1, 100)
+    result.insert(0, "score", score)
+    result.insert(1, "tier", np.select(
+        [score >= min_score for min_score, _ in TIER_THRESHOLDS],
+        [tier for _, tier in TIER_THRESHOLDS],
+        default="cold",
+    ))
+    return result
+
+def _read(path: str) -> pd.DataFrame:
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+def _write(frame: pd.DataFrame, path: str):
+    if path.endswith(".parquet"):
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rescore leads in a CSV/Parquet export")
+    parser.add_argument("input", help="CSV or Parquet file")
+    parser.add_argument("output", help="CSV or Parquet file to write (input columns plus scores)")
+    parser.add_argument("--transcript-column", default="transcription",
+                        help="transcript text column (use 'content' for Interaction exports)")
+    parser.add_argument("--email-column", default=None, help="optional email body column")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="matching processes")
+    args = parser.parse_args(argv)
+
+    frame = _read(args.input)
+    started = time.perf_counter()
+    scored = score_frame(frame, args.transcript_column, args.email_column, workers=args.workers)
+    elapsed = time.perf_counter() - started
+    logger.info(f"Scored {len(frame)} rows in {elapsed:.2f}s ({len(frame) / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    _write(pd.concat([frame, scored.drop(columns=[c for c in scored if c in frame])], axis=1), args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from utils.logger import setup_logger
+from config import config
+
+logger = setup_logger(__name__)
+
+class ResultCache:
+    """Content-addressed LRU+TTL cache with an optional SQLite tier.
+
+    Values must be JSON-serializable. The in-memory tier is checked first;
+    disk hits are promoted back into memory.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400,
+                 sqlite_path: Optional[str] = None, enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sqlite_path = sqlite_path or None
+        self.enabled = enabled
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(namespace: str, **parts: Any) -> str:
+        """Hash the namespace and every input that affects the result"""
+        payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return f"{namespace}:{digest}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        if self.sqlite_path:
+            value = await asyncio.to_thread(self._disk_get, key)
+            if value is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self._remember(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        self._remember(key, value)
+        if self.sqlite_path:
+            await asyncio.to_thread(self._disk_set, key, value)
+
+    def _remember(self, key: str, value: Any):
+        self._entries[key] = (time.time() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.sqlite_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _disk_get(self, key: str) -> Optional[Any]:
+        with self._db_lock:
+            try:
+                db = self._connection()
+                row = db.execute(
+                    "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[1] <= time.time():
+                    db.execute("DELETE FROM results WHERE key = ?", (key,))
+                    db.commit()
+                    return None
+                return json.loads(row[0])
+            except sqlite3.Error as e:
+                logger.error(f"Cache read failed: {str(e)}")
+                return None
+
+    def _disk_set(self, key: str, value: Any):
+        with self._db_lock:
+            try:
+                db = self._connection()
+                db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), time.time() + self.ttl_seconds),
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Cache write failed: {str(e)}")
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "sqlite": bool(self.sqlite_path),
+        }
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hash a file without loading it into memory"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+result_cache = ResultCache(
+    max_entries=config.CACHE_MAX_ENTRIES,
+    ttl_seconds=config.CACHE_TTL_SECONDS,
+    sqlite_path=config.CACHE_SQLITE_PATH,
+    enabled=config.CACHE_ENABLED,
+)
@@ -0,0 +1,194 @@
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Type
+from pydantic import BaseModel
+from utils.helpers import clean_text
+from utils.logger import setup_logger
+from utils.metrics import CACHE_LOOKUPS, CLAUDE_REQUESTS, COST_SAVED_USD, COST_USD, TOKENS, track_provider
+from services.cache import result_cache
+from services.gateway import claude_gateway
+from services.prompts import CHARS_PER_TOKEN, Prompt, prompts
+from services.providers import providers
+from services.routing import model_router
+
+logger = setup_logger(__name__)
+
+# Prompt-cache pricing relative to the base input price
+CACHE_READ_PRICE_FACTOR = 0.1
+CACHE_WRITE_PRICE_FACTOR = 1.25
+
+def _cache_key(stage: str, prompt: Prompt, model: str, max_tokens: int, text: str, fields: dict) -> str:
+    return result_cache.make_key(
+        stage,
+        template=prompt.fingerprint,
+        model=model,
+        max_tokens=max_tokens,
+        text=clean_text(text),
+        fields=fields,
+    )
+
+async def _cached(stage: str, key: str) -> Any:
+    cached = await result_cache.get(key)
+    CACHE_LOOKUPS.inc(stage=stage, result="miss" if cached is None else "hit")
+    if cached is not None:
+        logger.info(f"Cache hit for {stage}")
+    return cached
+
+def _cacheable(message, response_text: str) -> bool:
+    """Whether a reply may be replayed: not empty and not cut off at max_tokens"""
+    return bool(response_text) and getattr(message, "stop_reason", None) != "max_tokens"
+
+async def complete(stage: str, max_tokens: int, text: str, model: Optional[str] = None,
+                   parse: Optional[Callable[[str], Any]] = None, **fields: Any) -> Any:
+    """Run the stage's registered prompt and return Claude's response text, via the result cache.
+
+    The model is the stage's route unless `model` is given. The cache key
+    covers the whitespace-normalized input, the prompt, the model,
+    max_tokens and any other template fields. With `parse`, the parsed
+    response is returned instead, and a response is only cached once it
+    parses (not None), so a malformed reply is asked for again rather than
+    replayed for the whole TTL. Replies cut off at max_tokens are never cached.
+    """
+    parse = parse or (lambda response: response)
+    prompt = prompts.get(stage)
+    model = model or model_router.model_for(stage)
+    key = _cache_key(stage, prompt, model, max_tokens, text, fields)
+    cached = await _cached(stage, key)
+    if cached is not None:
+        return parse(cached)
+
+    message = await _create(stage, prompt, model, prompt.render(text, **fields), max_tokens)
+    response_text = message.content[0].text.strip()
+
+    result = parse(response_text)
+    if result is not None and _cacheable(message, response_text):
+        await result_cache.set(key, response_text)
+    return result
+
+async def complete_tool(stage: str, max_tokens: int, text: str,
+                        tool: Dict[str, Any], schema: Optional[Type[BaseModel]] = None,
+                        **fields: Any) -> Dict[str, Any]:
+    """Force Claude to answer through `tool` and return the tool input, via the result cache.
+
+    With `schema`, the input is validated (raising ValidationError) before it
+    is cached, so a malformed response is never served from the cache.
+    """
+    prompt = prompts.get(stage)
+    model = model_router.model_for(stage)
+    key = _cache_key(stage, prompt, model, max_tokens, text, {**fields, "tool": tool})
+    cached = await _cached(stage, key)
+    if cached is not None:
+        return cached
+
+    message = await _create(
+        stage,
+        prompt,
+        model,
+        prompt.render(text, **fields),
+        max_tokens,
+        tools=[tool],
+        tool_choice={"type": "tool", "name": tool["name"]},
+    )
+    tool_input = next(
+        (block.input for block in message.content if block.type == "tool_use"),
+        None,
+    )
+    if tool_input is None:
+        raise ValueError(f"No {tool['name']} tool call in response")
+    if schema is not None:
+        tool_input = schema.model_validate(tool_input).model_dump()
+
+    await result_cache.set(key, tool_input)
+    return tool_input
+
+def _estimate_tokens(prompt: Prompt, content: str, max_tokens: int) -> float:
+    """Rough prompt size for the tokens-per-minute limiter, settled against actual usage"""
+    return (len(prompt.system_text) + len(content)) / CHARS_PER_TOKEN + max_tokens
+
+def _messages_api(prompt: Prompt, model: str):
+    """The prompt-caching endpoint only for prompts with a cacheable prefix"""
+    return providers.claude_cached_messages if prompt.cacheable(model) else providers.claude_messages
+
+async def _create(stage: str, prompt: Prompt, model: str, content: str, max_tokens: int, **kwargs: Any):
+    """One messages.create call through the provider gateway"""
+    estimate = _estimate_tokens(prompt, content, max_tokens)
+
+    async def attempt():
+        with track_provider("anthropic", stage):
+            return await _messages_api(prompt, model).create(
+                model=model,
+                max_tokens=max_tokens,
+                system=prompt.system_for(model),
+                messages=[{"role": "user", "content": content}],
+                **kwargs
+            )
+
+    message = await claude_gateway.call(attempt, tokens=estimate)
+    _log_usage(stage, model, message, estimate)
+    return message
+
+def _log_usage(stage: str, model: str, message, estimate: float = 0):
+    """Log and count a response's token usage and estimated cost, settling the token quota"""
+    CLAUDE_REQUESTS.inc(stage=stage, model=model)
+    usage = getattr(message, "usage", None)
+    if usage is not None:
+        input_price, output_price = model_router.prices(model)
+        # input_tokens excludes the prompt-cache reads and writes, which are billed separately
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+        claude_gateway.tokens.refund(
+            estimate - usage.input_tokens - cache_read - cache_write - usage.output_tokens
+        )
+        logger.info(
+            f"{stage} tokens ({model}): {usage.input_tokens} in / {usage.output_tokens} out"
+            f" (prompt cache: {cache_read} read, {cache_write} written)"
+        )
+        TOKENS.inc(usage.input_tokens, stage=stage, direction="input")
+        TOKENS.inc(usage.output_tokens, stage=stage, direction="output")
+        TOKENS.inc(cache_read, stage=stage, direction="cache_read")
+        TOKENS.inc(cache_write, stage=stage, direction="cache_write")
+        COST_USD.inc(
+            (usage.input_tokens * input_price
+             + cache_read * input_price * CACHE_READ_PRICE_FACTOR
+             + cache_write * input_price * CACHE_WRITE_PRICE_FACTOR
+             + usage.output_tokens * output_price) / 1_000_000,
+            stage=stage,
+        )
+        COST_SAVED_USD.inc(
+            cache_read * input_price * (1 - CACHE_READ_PRICE_FACTOR) / 1_000_000,
+            stage=stage,
+        )
+
+async def stream_complete(stage: str, max_tokens: int, text: str, **fields: Any) -> AsyncIterator[str]:
+    """Like complete(), but yields the response text as Claude generates it.
+
+    A cached response is yielded as a single chunk; a fresh one is cached
+    once the stream finishes, unless it was cut off at max_tokens.
+    """
+    prompt = prompts.get(stage)
+    model = model_router.model_for(stage)
+    key = _cache_key(stage, prompt, model, max_tokens, text, fields)
+    cached = await _cached(stage, key)
+    if cached is not None:
+        yield cached
+        return
+
+    content = prompt.render(text, **fields)
+    parts = []
+    estimate = _estimate_tokens(prompt, content, max_tokens)
+    # Not retried: text may already have reached the client
+    async with claude_gateway.guard(estimate):
+        with track_provider("anthropic", stage):
+            async with _messages_api(prompt, model).stream(
+                model=model,
+                max_tokens=max_tokens,
+                system=prompt.system_for(model),
+                messages=[{"role": "user", "content": content}]
+            ) as stream:
+                async for delta in stream.text_stream:
+                    parts.append(delta)
+                    yield delta
+                message = await stream.get_final_message()
+
+    response_text = "".join(parts).strip()
+    if _cacheable(message, response_text):
+        await result_cache.set(key, response_text)
+    _log_usage(stage, model, message, estimate)
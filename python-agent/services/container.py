@@ -0,0 +1,69 @@
+import os
+from functools import cached_property
+from typing import TYPE_CHECKING, Optional
+from config import config
+from utils.logger import setup_logger
+
+if TYPE_CHECKING:
+    from services.analysis import AnalysisService
+    from services.digest import DigestService
+    from services.intent import IntentService
+    from services.llm import LLMService
+    from services.local_classifier import LocalClassifier
+    from services.similarity import SimilarityIndex
+    from services.transcription import TranscriptionService
+
+logger = setup_logger(__name__)
+
+class ServiceContainer:
+    """The services behind the routes, each imported and built on first use.
+
+    Importing the routes then costs nothing beyond the routes themselves, and
+    a service can be swapped out by assigning the attribute (e.g. a stub in
+    a benchmark) before or after it was first built.
+    """
+
+    @cached_property
+    def transcription(self) -> "TranscriptionService":
+        from services.transcription import TranscriptionService
+        return TranscriptionService()
+
+    @cached_property
+    def analysis(self) -> "AnalysisService":
+        from services.analysis import AnalysisService
+        return AnalysisService()
+
+    @cached_property
+    def intent(self) -> "IntentService":
+        from services.intent import IntentService
+        return IntentService()
+
+    @cached_property
+    def llm(self) -> "LLMService":
+        from services.llm import LLMService
+        return LLMService()
+
+    @cached_property
+    def digest(self) -> "DigestService":
+        from services.digest import DigestService
+        return DigestService()
+
+    @cached_property
+    def similarity(self) -> "SimilarityIndex":
+        from services.similarity import SimilarityIndex
+        return SimilarityIndex(config.SIMILARITY_INDEX_DIR, config.SIMILARITY_MAX_ENTRIES)
+
+    @cached_property
+    def classifier(self) -> Optional["LocalClassifier"]:
+        """The trained local classifier, or None when no artifact is configured"""
+        if not config.LOCAL_CLASSIFIER_PATH or not os.path.exists(config.LOCAL_CLASSIFIER_PATH):
+            return None
+        from services.local_classifier import LocalClassifier
+        try:
+            return LocalClassifier.load(config.LOCAL_CLASSIFIER_PATH)
+        except (OSError, ValueError, KeyError) as e:
+            # A bad artifact disables the first pass rather than every intent and next-step answer
+            logger.error(f"Local classifier {config.LOCAL_CLASSIFIER_PATH} not loaded: {str(e)}")
+            return None
+
+container = ServiceContainer()
@@ -0,0 +1,75 @@
+import asyncio
+from typing import List
+from utils.logger import setup_logger
+from utils.metrics import FALLBACKS
+from utils.pipeline import gather_or_cancel
+from utils.tokens import count_tokens, split_tokens, truncate_tokens
+from config import config
+from services.completion import complete
+from services.gateway import ProviderUnavailableError
+
+logger = setup_logger(__name__)
+
+# Each reduce round shrinks the notes by about DIGEST_CHUNK_TOKENS / DIGEST_MAX_TOKENS
+MAX_REDUCE_ROUNDS = 3
+
+class DigestService:
+    """Shrinks long transcripts before they reach the extraction prompts.
+
+    Transcripts under DIGEST_THRESHOLD_TOKENS pass through unchanged. Longer
+    ones are split into chunks whose facts are extracted in parallel (map)
+    and, if the notes are still over the threshold, merged into one digest
+    (reduce). Without Claude, or if the digest fails, the transcript is
+    truncated to the threshold instead.
+    """
+
+    async def prepare(self, text: str) -> str:
+        tokens = count_tokens(text)
+        if tokens <= config.DIGEST_THRESHOLD_TOKENS:
+            return text
+
+        if not config.CLAUDE_API_KEY:
+            FALLBACKS.inc(stage="digest")
+            return truncate_tokens(text, config.DIGEST_THRESHOLD_TOKENS)
+
+        try:
+            chunks = split_tokens(text, config.DIGEST_CHUNK_TOKENS, config.DIGEST_CHUNK_OVERLAP_TOKENS)
+            logger.info(f"Digesting {tokens}-token transcript in {len(chunks)} chunks")
+            notes = await self._map(chunks)
+            digest = "\n".join(notes)
+            # The reduce step costs a full decode; skip it when the notes already fit
+            if count_tokens(digest) > config.DIGEST_THRESHOLD_TOKENS:
+                digest = await self._reduce(notes)
+            logger.info(f"Digest ready: {tokens} -> {count_tokens(digest)} tokens")
+            return digest
+        except ProviderUnavailableError:
+            raise
+        except Exception as e:
+            logger.error(f"Error digesting transcript: {str(e)}")
+            FALLBACKS.inc(stage="digest")
+            return truncate_tokens(text, config.DIGEST_THRESHOLD_TOKENS)
+
+    async def _map(self, chunks: List[str]) -> List[str]:
+        semaphore = asyncio.Semaphore(config.DIGEST_MAX_CONCURRENCY)
+
+        async def extract(index: int, chunk: str) -> str:
+            async with semaphore:
+                return await complete(
+                    "digest_chunk", config.DIGEST_CHUNK_NOTES_TOKENS, chunk,
+                    part=index + 1, parts=len(chunks),
+                )
+
+        return await gather_or_cancel(*(extract(i, chunk) for i, chunk in enumerate(chunks)))
+
+    async def _reduce(self, notes: List[str]) -> str:
+        """Merge notes, in rounds if they do not fit one request"""
+        for _ in range(MAX_REDUCE_ROUNDS):
+            groups = split_tokens("\n".join(notes), config.DIGEST_CHUNK_TOKENS)
+            merged = await gather_or_cancel(*(
+                complete("digest_reduce", config.DIGEST_MAX_TOKENS, group)
+                for group in groups
+            ))
+            if len(merged) == 1:
+                return merged[0]
+            notes = list(merged)
+        return truncate_tokens("\n".join(notes), config.DIGEST_THRESHOLD_TOKENS)
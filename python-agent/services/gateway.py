@@ -0,0 +1,209 @@
+import asyncio
+import random
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+from utils.logger import setup_logger
+from utils.metrics import PROVIDER_RETRIES
+from config import config
+
+logger = setup_logger(__name__)
+
+# Provider responses worth another attempt: timeouts, conflicts, rate limits,
+# server errors and Anthropic's 529 "overloaded"
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+# SDKs whose APIConnectionError (timeouts, resets, DNS) is retried; looked up
+# in sys.modules so importing the gateway does not import the SDKs
+SDK_MODULES = ("anthropic", "openai")
+
+class ProviderUnavailableError(Exception):
+    """Raised without calling the provider while its circuit breaker is open"""
+
+def is_retryable(error: Exception) -> bool:
+    for name in SDK_MODULES:
+        sdk = sys.modules.get(name)
+        if sdk is not None and isinstance(error, sdk.APIConnectionError):
+            return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the provider asked us to wait, from retry-after-ms or retry-after"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = response.headers.get(header)
+        if value:
+            try:
+                return max(float(value) * scale, 0.0)
+            except ValueError:
+                continue
+    return None
+
+class TokenBucket:
+    """Refills `per_minute` units per minute up to a full minute's quota; 0 disables it"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.available = per_minute
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until `amount` units are available and take them; waiters are served in order"""
+        if not self.capacity:
+            return
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            if self.available < amount:
+                await asyncio.sleep((amount - self.available) / self.rate)
+                self._refill()
+            self.available -= amount
+
+    def refund(self, amount: float):
+        """Return over-estimated units (or take more, with a negative amount)"""
+        if not self.capacity:
+            return
+        self._refill()
+        self.available = min(self.capacity, self.available + amount)
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; after `reset_seconds` one trial call is let through"""
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info("Circuit breaker closed")
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            if self.state != "open":
+                logger.warning(f"Circuit breaker opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+
+class ProviderGateway:
+    """Rate limiting, retries and a circuit breaker in front of one provider.
+
+    Requests wait on a requests-per-minute and a tokens-per-minute bucket,
+    retry transient failures with jittered exponential backoff (or the
+    provider's retry-after; one over max_delay ends the retries), and fail
+    fast with ProviderUnavailableError while the breaker is open. Services
+    let that error through, so routes answer 503 instead of made-up results.
+    """
+
+    def __init__(self, name: str, rpm: float, tpm: float, max_retries: int,
+                 base_delay: float, max_delay: float, breaker: CircuitBreaker):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.retries = 0
+
+    @asynccontextmanager
+    async def guard(self, tokens: float = 0) -> AsyncIterator[None]:
+        """One attempt: check the breaker, wait for quota, and record the outcome"""
+        if not self.breaker.allow():
+            raise ProviderUnavailableError(f"{self.name} circuit breaker is open")
+        await self.requests.acquire(1)
+        if tokens:
+            await self.tokens.acquire(tokens)
+        try:
+            yield
+        except Exception as e:
+            if is_retryable(e):
+                self.breaker.record_failure()
+            else:
+                # The provider answered; the request itself was bad
+                self.breaker.record_success()
+            raise
+        except BaseException:
+            # Cancelled or abandoned mid-request: no verdict on provider health
+            self.breaker._trial_in_flight = False
+            raise
+        self.breaker.record_success()
+
+    async def call(self, func: Callable[[], Awaitable[Any]], tokens: float = 0) -> Any:
+        """Run `func` under guard(), retrying transient failures"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.guard(tokens):
+                    return await func()
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                elif delay > self.max_delay:
+                    # Retrying sooner than asked would only earn another 429
+                    logger.warning(f"{self.name} asked to retry after {delay:.0f}s, over the {self.max_delay:.0f}s limit; giving up")
+                    raise
+                self.retries += 1
+                PROVIDER_RETRIES.inc(provider=self.name)
+                logger.warning(f"{self.name} request failed ({str(e)}); retry {attempt + 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        for bucket in (self.requests, self.tokens):
+            if bucket.capacity:
+                bucket._refill()
+        return {
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "retries": self.retries,
+            "requests_available": round(self.requests.available, 2) if self.requests.capacity else None,
+            "tokens_available": round(self.tokens.available) if self.tokens.capacity else None,
+        }
+
+def _gateway(name: str, rpm: float, tpm: float = 0) -> ProviderGateway:
+    return ProviderGateway(
+        name,
+        rpm=rpm,
+        tpm=tpm,
+        max_retries=config.PROVIDER_MAX_RETRIES,
+        base_delay=config.PROVIDER_RETRY_BASE_DELAY,
+        max_delay=config.PROVIDER_RETRY_MAX_DELAY,
+        breaker=CircuitBreaker(config.CIRCUIT_FAILURE_THRESHOLD, config.CIRCUIT_RESET_SECONDS),
+    )
+
+claude_gateway = _gateway("anthropic", config.CLAUDE_RPM, config.CLAUDE_TPM)
+whisper_gateway = _gateway("openai", config.WHISPER_RPM)
@@ -0,0 +1,381 @@
+import asyncio
+import ipaddress
+import itertools
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+from utils.logger import setup_logger
+from config import config
+from services.providers import providers
+
+logger = setup_logger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+# How often finished jobs past JOB_RETENTION_SECONDS are deleted
+CLEANUP_INTERVAL_SECONDS = 3600
+
+class QueueFullError(Exception):
+    pass
+
+class InvalidWebhookError(ValueError):
+    pass
+
+def _public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%")[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+async def check_webhook_url(url: str):
+    """Raise InvalidWebhookError unless `url` is http(s) and every address of its host is public.
+
+    Keeps job webhooks from reaching the agent's own network (metadata
+    endpoints, internal services) unless JOB_WEBHOOK_ALLOW_PRIVATE is set.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise InvalidWebhookError("Webhook URL must be an http or https URL with a host")
+    if config.JOB_WEBHOOK_ALLOW_PRIVATE:
+        return
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = await asyncio.to_thread(socket.getaddrinfo, parts.hostname, port, proto=socket.IPPROTO_TCP)
+    except (OSError, ValueError) as e:
+        raise InvalidWebhookError(f"Webhook host cannot be resolved: {parts.hostname}") from e
+    if not all(_public_address(info[4][0]) for info in infos):
+        raise InvalidWebhookError(f"Webhook host is not a public address: {parts.hostname}")
+
+def _process_alive(pid: Optional[int]) -> bool:
+    """Whether a worker on this host still runs; the store is a local file, so owners are local"""
+    if not pid:
+        return False
+    if pid == os.getpid():
+        # Our own jobs left 'running' by an earlier life of this pid
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobStore:
+    """SQLite persistence for jobs, so queued and running work survives a restart"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+                "priority INTEGER NOT NULL, payload TEXT NOT NULL, webhook_url TEXT, "
+                "result TEXT, error TEXT, created_at REAL NOT NULL, "
+                "started_at REAL, finished_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+            columns = {row["name"] for row in self._db.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                self._db.execute("ALTER TABLE jobs ADD COLUMN owner INTEGER")
+            self._db.commit()
+        return self._db
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            db = self._connection()
+            rows = db.execute(sql, params).fetchall()
+            db.commit()
+            return rows
+
+    def _update(self, sql: str, params: tuple = ()) -> int:
+        with self._lock:
+            db = self._connection()
+            changed = db.execute(sql, params).rowcount
+            db.commit()
+            return changed
+
+    async def insert(self, job: Dict[str, Any], max_queued: Optional[int] = None) -> bool:
+        """Store a queued job; False, storing nothing, when `max_queued` jobs are already queued.
+
+        The count and the insert are one statement, so processes sharing the
+        database cannot both take the last free place.
+        """
+        values = (job["id"], job["kind"], "queued", job["priority"], json.dumps(job["payload"]),
+                  job["webhook_url"], job["created_at"])
+        limit = "" if max_queued is None else " WHERE (SELECT COUNT(*) FROM jobs WHERE status = 'queued') < ?"
+        changed = await asyncio.to_thread(
+            self._update,
+            "INSERT INTO jobs (id, kind, status, priority, payload, webhook_url, created_at) "
+            "SELECT ?, ?, ?, ?, ?, ?, ?" + limit,
+            values if max_queued is None else values + (max_queued,),
+        )
+        return changed == 1
+
+    async def count_queued(self) -> int:
+        """Jobs waiting for a worker, in every process sharing the database"""
+        rows = await asyncio.to_thread(self._execute, "SELECT COUNT(*) FROM jobs WHERE status = 'queued'")
+        return rows[0][0]
+
+    async def claim(self, job_id: str) -> bool:
+        """Atomically move a queued job to running for this process; False if another worker has it"""
+        changed = await asyncio.to_thread(
+            self._update,
+            "UPDATE jobs SET status = 'running', started_at = ?, owner = ? WHERE id = ? AND status = 'queued'",
+            (time.time(), os.getpid(), job_id),
+        )
+        return changed == 1
+
+    async def requeue(self, job_ids: List[str]):
+        """Hand running jobs back to the queue, e.g. when shutdown interrupts them"""
+        for job_id in job_ids:
+            await asyncio.to_thread(
+                self._execute,
+                "UPDATE jobs SET status = 'queued', owner = NULL WHERE id = ? AND status = 'running'",
+                (job_id,),
+            )
+
+    async def mark_finished(self, job_id: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            ("failed" if error else "completed", json.dumps(result) if result is not None else None,
+             error, time.time(), job_id),
+        )
+
+    async def delete_finished(self, before: float) -> int:
+        """Delete completed and failed jobs that finished before `before`"""
+        return await asyncio.to_thread(
+            self._update,
+            "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND finished_at < ?",
+            (before,),
+        )
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = await asyncio.to_thread(self._execute, "SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return self._to_dict(rows[0]) if rows else None
+
+    async def unfinished(self) -> List[Dict[str, Any]]:
+        """Queued jobs, after re-queueing running jobs whose worker process is gone; highest priority first"""
+        running = await asyncio.to_thread(self._execute, "SELECT id, owner FROM jobs WHERE status = 'running'")
+        orphaned = [row["id"] for row in running if not _process_alive(row["owner"])]
+        await self.requeue(orphaned)
+
+        rows = await asyncio.to_thread(
+            self._execute,
+            "SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority DESC, created_at",
+        )
+        return [self._to_dict(row) for row in rows]
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+class JobQueue:
+    """Bounded priority queue of pipeline jobs, drained by a fixed pool of workers.
+
+    Higher `priority` runs first; equal priorities run in submission order.
+    `submit` raises QueueFullError once `max_pending` jobs are waiting in the
+    store, counted across every worker process that shares it.
+    Finished jobs are deleted `retention_seconds` after they end (0 keeps them).
+    """
+
+    def __init__(self, store: JobStore, workers: int, max_pending: int, retention_seconds: float = 0):
+        self.store = store
+        self.worker_count = workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self.handlers: Dict[str, JobHandler] = {}
+
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._cleanup: Optional[asyncio.Task] = None
+        self._sequence = itertools.count()
+        self._running: Set[str] = set()
+        self.draining = False
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def register(self, kind: str, handler: JobHandler):
+        self.handlers[kind] = handler
+
+    @property
+    def pending(self) -> int:
+        """Jobs waiting in this process's queue"""
+        return self._queue.qsize() if self._queue else 0
+
+    async def queued(self) -> int:
+        """Jobs waiting in the store, whichever process queued them; what `max_pending` limits"""
+        return await self.store.count_queued()
+
+    async def start(self):
+        """Re-queue unfinished jobs from the store and start the workers"""
+        self._queue = asyncio.PriorityQueue()
+        self.draining = False
+        recovered = await self.store.unfinished()
+        for job in recovered:
+            self._enqueue(job["id"], job["priority"])
+        if recovered:
+            logger.info(f"Recovered {len(recovered)} unfinished jobs")
+
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.worker_count)]
+        if self.retention_seconds > 0:
+            self._cleanup = asyncio.create_task(self._clean_up())
+        logger.info(f"Job queue started with {self.worker_count} workers")
+
+    async def delete_expired(self) -> int:
+        """Delete finished jobs older than the retention period"""
+        deleted = await self.store.delete_finished(time.time() - self.retention_seconds)
+        if deleted:
+            logger.info(f"Deleted {deleted} finished jobs older than {self.retention_seconds:.0f}s")
+        return deleted
+
+    async def _clean_up(self):
+        while True:
+            try:
+                await self.delete_expired()
+            except Exception as e:
+                logger.error(f"Error deleting expired jobs: {str(e)}")
+            await asyncio.sleep(min(CLEANUP_INTERVAL_SECONDS, self.retention_seconds))
+
+    def begin_drain(self):
+        """Stop starting queued jobs; running ones carry on"""
+        self.draining = True
+
+    async def stop(self):
+        """Stop the workers; jobs still running are handed back to the queue for the next start"""
+        self.draining = True
+        interrupted = list(self._running)
+        tasks = self._workers + ([self._cleanup] if self._cleanup else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._cleanup = None
+        if interrupted:
+            logger.warning(f"Re-queueing {len(interrupted)} interrupted jobs")
+            await self.store.requeue(interrupted)
+        self.store.close()
+
+    async def submit(self, kind: str, payload: Dict[str, Any], priority: int = 0,
+                     webhook_url: Optional[str] = None) -> Dict[str, Any]:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self._queue is None or self.draining:
+            raise RuntimeError("Job queue is not running")
+        if webhook_url:
+            await check_webhook_url(webhook_url)
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "priority": priority,
+            "payload": payload,
+            "webhook_url": webhook_url,
+            "created_at": time.time(),
+        }
+        if not await self.store.insert(job, self.max_pending):
+            raise QueueFullError(f"Job queue is full ({self.max_pending} pending)")
+        self._enqueue(job["id"], priority)
+        logger.info(f"Queued {kind} job {job['id']} (priority={priority}, pending={self.pending})")
+        return job
+
+    def _enqueue(self, job_id: str, priority: int):
+        self._queue.put_nowait((-priority, next(self._sequence), job_id))
+
+    async def _work(self):
+        while True:
+            _, _, job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Job worker error on {job_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        # While draining, queued jobs stay in the store for the next start
+        if self.draining or not await self.store.claim(job_id):
+            return
+        job = await self.store.get(job_id)
+
+        self._running.add(job_id)
+        try:
+            result, error = await self.handlers[job["kind"]](job["payload"]), None
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            result, error = None, str(e)
+        finally:
+            self._running.discard(job_id)
+
+        await self.store.mark_finished(job_id, result, error)
+        if job["webhook_url"]:
+            await self._notify(job, result, error)
+
+    async def _notify(self, job: Dict[str, Any], result: Optional[Dict], error: Optional[str]):
+        """POST the outcome to the job's webhook, retrying with jittered backoff"""
+        body = {
+            "job_id": job["id"],
+            "status": "failed" if error else "completed",
+            "result": result,
+            "error": error,
+        }
+        for attempt in range(config.JOB_WEBHOOK_RETRIES + 1):
+            try:
+                # Checked again before each post: the host may resolve elsewhere than at submit time
+                await check_webhook_url(job["webhook_url"])
+                response = await providers.http_client.post(job["webhook_url"], json=body, timeout=10.0,
+                                                            follow_redirects=False)
+                if response.status_code < 500:
+                    return
+                logger.warning(f"Webhook for job {job['id']} returned {response.status_code}")
+            except InvalidWebhookError as e:
+                logger.error(f"Not calling webhook for job {job['id']}: {str(e)}")
+                return
+            except Exception as e:
+                logger.warning(f"Webhook for job {job['id']} failed: {str(e)}")
+            if attempt < config.JOB_WEBHOOK_RETRIES:
+                await asyncio.sleep((2 ** attempt) * (0.5 + random.random()))
+        logger.error(f"Giving up on webhook for job {job['id']}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": len(self._workers),
+            "pending": self.pending,
+            "running": self.running,
+            "max_pending": self.max_pending,
+        }
+
+job_queue = JobQueue(
+    JobStore(config.JOB_DB_PATH),
+    workers=config.JOB_WORKERS,
+    max_pending=config.JOB_QUEUE_MAX_PENDING,
+    retention_seconds=config.JOB_RETENTION_SECONDS,
+)
@@ -0,0 +1,67 @@
+from typing import Dict, List, Set
+from services.analysis import LEAD_SIGNALS, score_signals
+from services.intent import INTENT_SIGNALS, keyword_intent
+from utils.keywords import KeywordMatcher
+
+def _longest_phrase(*matchers: KeywordMatcher) -> int:
+    """Most words in any keyword of the matchers"""
+    return max(len(keyword.split()) for matcher in matchers for keywords in matcher.categories.values() for keyword in keywords)
+
+# Words of the previous fragment rescanned with the next, so phrases spanning two fragments match
+CARRY_WORDS = _longest_phrase(LEAD_SIGNALS, INTENT_SIGNALS) - 1
+
+class LiveCallScorer:
+    """Lead score, tier and keyword intent of a call that is still in progress.
+
+    Fragments (utterances, or transcribed audio chunks) join with a space into
+    the transcript. Signals only ever switch on, so each fragment is scanned
+    once, together with the last few words of the previous one, and the work
+    per fragment does not grow with the call. The result always equals
+    score_lead and the rule-based intent on the joined transcript.
+    """
+
+    def __init__(self):
+        self.fragments = 0
+        self.length = 0
+        self._lead_found: Set[str] = set()
+        self._intent_found: Set[str] = set()
+        self._carry = ""
+        self._lead = score_signals(self._lead_found, 0)
+
+    @property
+    def tier(self) -> str:
+        return self._lead["tier"]
+
+    def feed(self, fragment: str) -> List[Dict]:
+        """Add a fragment; returns a tier_changed event if the tier moved, then the new score"""
+        fragment = fragment.strip()
+        if not fragment:
+            return []
+
+        text = f"{self._carry} {fragment}" if self._carry else fragment
+        if len(self._lead_found) < len(LEAD_SIGNALS.categories):
+            self._lead_found |= LEAD_SIGNALS.categories_in(text)
+        if len(self._intent_found) < len(INTENT_SIGNALS.categories):
+            self._intent_found |= INTENT_SIGNALS.categories_in(text)
+        words = text.split()
+        self._carry = " ".join(words[len(words) - CARRY_WORDS:]) if CARRY_WORDS else ""
+
+        self.length += len(fragment) + (1 if self.fragments else 0)
+        self.fragments += 1
+
+        previous = self.tier
+        self._lead = score_signals(self._lead_found, self.length)
+        events = []
+        if self.tier != previous:
+            events.append({"type": "tier_changed", "from": previous, "to": self.tier, "score": self._lead["score"]})
+        events.append({"type": "score", **self.snapshot()})
+        return events
+
+    def snapshot(self) -> Dict:
+        intent = next((name for name in INTENT_SIGNALS.categories if name in self._intent_found), None)
+        return {
+            **self._lead,
+            **keyword_intent(intent),
+            "fragments": self.fragments,
+            "length": self.length,
+        }
@@ -1,162 +1,191 @@
-import anthropic
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
+from utils.helpers import extract_contacts
+from utils.json_parsing import parse_response
 from utils.logger import setup_logger
+from utils.metrics import FALLBACKS
 from config import config
+from pydantic import ValidationError
+from services.completion import complete, complete_tool, stream_complete
+from services.gateway import ProviderUnavailableError
+from services.routing import first_pass
+from services.schemas import FusedExtraction, LeadInfo, Requirements
 
 logger = setup_logger(__name__)
 
+FUSED_EXTRACTION_TOOL = {
+    "name": "record_extraction",
+    "description": "Record the structured fields extracted from a sales conversation",
+    "input_schema": FusedExtraction.model_json_schema(),
+}
+
 class LLMService:
     def __init__(self):
         if not config.CLAUDE_API_KEY:
             logger.warning("CLAUDE_API_KEY not set. LLM features will not work.")
-        else:
-            self.client = anthropic.Anthropic(api_key=config.CLAUDE_API_KEY)
     
     async def extract_requirements(self, text: str) -> List[str]:
         """Extract requirements and pain points using Claude"""
         try:
             if not config.CLAUDE_API_KEY:
+                FALLBACKS.inc(stage="extract_requirements")
                 return []
             
-            prompt = f"""Extract key requirements, pain points, and needs from this sales conversation.
-Return a JSON array of strings, each representing a distinct requirement or pain point.
-
-Conversation: {text}
-
-Return ONLY a JSON array like: ["requirement1", "requirement2", ...]"""
-            
-            message = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=300,
-                messages=[{"role": "user", "content": prompt}]
+            requirements = await complete(
+                "extract_requirements", 300, text,
+                parse=lambda response: parse_response("extract_requirements", response, Requirements),
             )
+            if requirements is not None:
+                return requirements.root
             
-            response_text = message.content[0].text.strip()
-            
-            # Extract JSON array
-            import json
-            import re
-            
-            # Try to find JSON array in response
-            json_match = re.search(r'\[.*?\]', response_text, re.DOTALL)
-            if json_match:
-                requirements = json.loads(json_match.group(0))
-                return requirements if isinstance(requirements, list) else []
-            
+            FALLBACKS.inc(stage="extract_requirements")
             return []
+        except ProviderUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Error extracting requirements: {str(e)}")
+            FALLBACKS.inc(stage="extract_requirements")
             return []
     
     async def generate_email_response(self, email_body: str, lead_info: Dict) -> str:
         """Generate professional email response"""
         try:
             if not config.CLAUDE_API_KEY:
+                FALLBACKS.inc(stage="generate_email_response")
                 return "Thank you for your inquiry. We will get back to you soon."
             
-            prompt = f"""You are a professional sales representative. Generate a response email that is:
-- Friendly but professional
-- Addresses their specific concerns
-- Includes a clear call-to-action
-- 2-3 paragraphs maximum
-
-From: {lead_info.get('name', 'Customer')} ({lead_info.get('company', 'Unknown Company')})
-Original Email: {email_body}
-
-Requirements to address: {', '.join(lead_info.get('requirements', []))}
-
-Generate ONLY the email body (no subject line, no greeting formalities like "Dear X," or "Hi X," - just start with the content):"""
-            
-            message = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=500,
-                messages=[{"role": "user", "content": prompt}]
+            return await complete(
+                "generate_email_response",
+                500,
+                email_body,
+                name=lead_info.get('name', 'Customer'),
+                company=lead_info.get('company', 'Unknown Company'),
+                requirements=', '.join(lead_info.get('requirements', [])),
             )
-            
-            return message.content[0].text.strip()
+        except ProviderUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Error generating email: {str(e)}")
+            FALLBACKS.inc(stage="generate_email_response")
             return "Thank you for your inquiry. We will get back to you soon."
     
+    async def stream_email_response(self, email_body: str, lead_info: Dict) -> AsyncIterator[str]:
+        """Generate the email response, yielding text as it is produced"""
+        if not config.CLAUDE_API_KEY:
+            FALLBACKS.inc(stage="generate_email_response")
+            yield "Thank you for your inquiry. We will get back to you soon."
+            return
+        
+        produced = False
+        try:
+            async for delta in stream_complete(
+                "generate_email_response",
+                500,
+                email_body,
+                name=lead_info.get('name', 'Customer'),
+                company=lead_info.get('company', 'Unknown Company'),
+                requirements=', '.join(lead_info.get('requirements', [])),
+            ):
+                produced = True
+                yield delta
+        except ProviderUnavailableError:
+            if produced:
+                logger.error("Claude became unavailable while streaming an email")
+                return
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming email: {str(e)}")
+            if not produced:
+                FALLBACKS.inc(stage="generate_email_response")
+                yield "Thank you for your inquiry. We will get back to you soon."
+    
     async def suggest_next_step(self, text: str, lead_info: Dict) -> str:
-        """Suggest next action step"""
+        """Suggest next action step, locally when the classifier is confident"""
+        prediction = None
         try:
+            prediction, confident = first_pass("next_step", text)
+            if confident:
+                return prediction.label
             if not config.CLAUDE_API_KEY:
-                return "Schedule a follow-up call"
-            
-            prompt = f"""Based on this sales conversation, suggest the next best action step.
-Options: schedule_demo, send_proposal, follow_up_call, send_information, close_deal
-
-Conversation: {text}
-Lead Score: {lead_info.get('score', 0)}
-Lead Tier: {lead_info.get('tier', 'cold')}
-
-Return ONLY the action (e.g., "schedule_demo" or "send_proposal"):"""
-            
-            message = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=100,
-                messages=[{"role": "user", "content": prompt}]
+                FALLBACKS.inc(stage="suggest_next_step")
+                return prediction.label if prediction else "Schedule a follow-up call"
+            
+            response_text = await complete(
+                "suggest_next_step",
+                100,
+                text,
+                score=lead_info.get('score', 0),
+                tier=lead_info.get('tier', 'cold'),
             )
             
-            return message.content[0].text.strip().lower()
+            return response_text.lower()
+        except ProviderUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Error suggesting next step: {str(e)}")
-            return "follow_up_call"
+            FALLBACKS.inc(stage="suggest_next_step")
+            return prediction.label if prediction else "follow_up_call"
+    
+    async def extract_all(self, text: str, lead_analysis: Dict) -> Optional[Dict]:
+        """Extract intent, requirements, lead info and next step in one schema-validated call.
+
+        Returns None when Claude is unavailable or the response fails
+        validation, so callers can fall back to the per-field methods.
+        """
+        try:
+            if not config.CLAUDE_API_KEY:
+                return None
+            
+            tool_input = await complete_tool(
+                "fused_extraction",
+                800,
+                text,
+                FUSED_EXTRACTION_TOOL,
+                schema=FusedExtraction,
+                score=lead_analysis.get('score', 0),
+                tier=lead_analysis.get('tier', 'cold'),
+            )
+            extraction = FusedExtraction.model_validate(tool_input)
+            return {
+                'intent': {'intent': extraction.intent, 'confidence': extraction.confidence},
+                'requirements': extraction.requirements,
+                'lead_info': extraction.lead_info.model_dump(),
+                'next_step': extraction.next_step,
+            }
+        except ValidationError as e:
+            logger.warning(f"Fused extraction failed validation: {str(e)}")
+            FALLBACKS.inc(stage="fused_extraction")
+            return None
+        except ProviderUnavailableError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in fused extraction: {str(e)}")
+            FALLBACKS.inc(stage="fused_extraction")
+            return None
     
     async def extract_lead_info(self, text: str) -> Dict:
         """Extract lead information (name, email, company) from text"""
         try:
             if not config.CLAUDE_API_KEY:
-                from utils.helpers import extract_email, extract_phone, extract_company_name
-                return {
-                    'name': 'Unknown',
-                    'email': extract_email(text),
-                    'phone': extract_phone(text),
-                    'company': extract_company_name(text),
-                }
+                FALLBACKS.inc(stage="extract_lead_info")
+                return self._fallback_lead_info(text)
             
-            prompt = f"""Extract lead information from this conversation. Return JSON with:
-- name: person's name (or "Unknown" if not found)
-- email: email address (or null if not found)
-- phone: phone number (or null if not found)
-- company: company name (or null if not found)
-
-Conversation: {text}
-
-Return ONLY valid JSON: {{"name": "...", "email": "...", "phone": "...", "company": "..."}}"""
-            
-            message = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=200,
-                messages=[{"role": "user", "content": prompt}]
+            lead_info = await complete(
+                "extract_lead_info", 200, text,
+                parse=lambda response: parse_response("extract_lead_info", response, LeadInfo),
             )
-            
-            response_text = message.content[0].text.strip()
-            
-            # Extract JSON
-            import json
-            import re
-            
-            json_match = re.search(r'\{.*?\}', response_text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(0))
+            if lead_info is not None:
+                return lead_info.model_dump()
             
             # Fallback
-            from utils.helpers import extract_email, extract_phone, extract_company_name
-            return {
-                'name': 'Unknown',
-                'email': extract_email(text),
-                'phone': extract_phone(text),
-                'company': extract_company_name(text),
-            }
+            FALLBACKS.inc(stage="extract_lead_info")
+            return self._fallback_lead_info(text)
+        except ProviderUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Error extracting lead info: {str(e)}")
-            from utils.helpers import extract_email, extract_phone, extract_company_name
-            return {
-                'name': 'Unknown',
-                'email': extract_email(text),
-                'phone': extract_phone(text),
-                'company': extract_company_name(text),
-            }
+            FALLBACKS.inc(stage="extract_lead_info")
+            return self._fallback_lead_info(text)
 
+    def _fallback_lead_info(self, text: str) -> Dict:
+        """Email, phone and company found by pattern, in one scan of the text"""
+        return {'name': 'Unknown', **extract_contacts(text)}
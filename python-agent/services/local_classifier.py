@@ -0,0 +1,230 @@
+import hashlib
+import json
+import re
+import time
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from services.schemas import Intent, NextStep
+
+# Bump when the artifact layout or the features change; older artifacts are refused
+FORMAT_VERSION = 1
+# Hashed feature buckets; collisions among ~10k distinct words and pairs cost little accuracy
+DIM = 2 ** 14
+
+# Label sets the classifier is trained for, by head
+HEADS: Dict[str, List[str]] = {
+    "intent": list(Intent.__args__),
+    "next_step": list(NextStep.__args__),
+}
+
+_WORD = re.compile(r"\w+")
+
+class Prediction(NamedTuple):
+    label: str
+    # Calibrated probability of `label`
+    confidence: float
+
+def features(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed bucket ids and log-damped counts of the text's words and word pairs"""
+    words = _WORD.findall(text.lower())
+    grams = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+    if not grams:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    # crc32, unlike hash(), is stable across processes, so trained buckets stay valid
+    hashes = np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.int64, count=len(grams))
+    buckets, counts = np.unique(hashes % DIM, return_counts=True)
+    return buckets, np.log1p(counts).astype(np.float32)
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+class LocalClassifier:
+    """Hashed TF-IDF features with a temperature-calibrated linear softmax model per head.
+
+    Trained offline (train_classifier.py) and saved as one versioned .npz
+    artifact; a prediction touches only the weight columns of the text's
+    own buckets.
+    """
+
+    def __init__(self, idf: np.ndarray, weights: Dict[str, np.ndarray], biases: Dict[str, np.ndarray],
+                 metadata: Dict):
+        self.idf = idf
+        self.weights = weights
+        self.biases = biases
+        self.metadata = metadata
+
+    @property
+    def version(self) -> str:
+        return self.metadata["version"]
+
+    def _vector(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        buckets, values = features(text)
+        values = values * self.idf[buckets]
+        norm = np.linalg.norm(values)
+        return buckets, (values / norm if norm else values)
+
+    def predict(self, head: str, text: str) -> Optional[Prediction]:
+        """Most likely label of `head` with its calibrated confidence; None if the artifact lacks the head"""
+        if head not in self.weights:
+            return None
+        buckets, values = self._vector(text)
+        logits = self.weights[head][:, buckets] @ values + self.biases[head]
+        info = self.metadata["heads"][head]
+        probabilities = _softmax(logits / info["temperature"])
+        best = int(probabilities.argmax())
+        return Prediction(info["labels"][best], round(float(probabilities[best]), 4))
+
+    def predict_many(self, head: str, texts: Sequence[str]) -> List[Prediction]:
+        return [self.predict(head, text) for text in texts]
+
+    def save(self, path: str):
+        arrays = {"idf": self.idf}
+        for head in self.weights:
+            arrays[f"{head}.weights"] = self.weights[head]
+            arrays[f"{head}.bias"] = self.biases[head]
+        np.savez_compressed(path, metadata=np.array(json.dumps(self.metadata)), **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "LocalClassifier":
+        with np.load(path, allow_pickle=False) as artifact:
+            metadata = json.loads(str(artifact["metadata"]))
+            if metadata.get("format") != FORMAT_VERSION:
+                raise ValueError(f"{path} is classifier format {metadata.get('format')}, expected {FORMAT_VERSION}")
+            heads = metadata["heads"]
+            return cls(
+                artifact["idf"],
+                {head: artifact[f"{head}.weights"] for head in heads},
+                {head: artifact[f"{head}.bias"] for head in heads},
+                metadata,
+            )
+
+def _dense(rows: Sequence[Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+    matrix = np.zeros((len(rows), DIM), dtype=np.float32)
+    for i, (buckets, values) in enumerate(rows):
+        matrix[i, buckets] = values
+    return matrix
+
+def _fit_head(rows: List[Tuple[np.ndarray, np.ndarray]], targets: np.ndarray, labels: int, epochs: int,
+              learning_rate: float, l2: float, batch_size: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Softmax regression by minibatch Adam; returns (weights, bias)"""
+    weights = np.zeros((labels, DIM), dtype=np.float32)
+    bias = np.zeros(labels, dtype=np.float32)
+    moments = [np.zeros_like(weights), np.zeros_like(weights), np.zeros_like(bias), np.zeros_like(bias)]
+    beta1, beta2, step = 0.9, 0.999, 0
+    for _ in range(epochs):
+        order = rng.permutation(len(rows))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            x = _dense([rows[i] for i in batch])
+            error = _softmax(x @ weights.T + bias)
+            error[np.arange(len(batch)), targets[batch]] -= 1
+            error /= len(batch)
+            step += 1
+            for k, (param, gradient) in enumerate(((weights, error.T @ x + l2 * weights), (bias, error.sum(axis=0)))):
+                first, second = moments[2 * k], moments[2 * k + 1]
+                first *= beta1
+                first += (1 - beta1) * gradient
+                second *= beta2
+                second += (1 - beta2) * gradient ** 2
+                param -= learning_rate * (first / (1 - beta1 ** step)) / (np.sqrt(second / (1 - beta2 ** step)) + 1e-8)
+    return weights, bias
+
+def _fit_temperature(logits: np.ndarray, targets: np.ndarray) -> float:
+    """Temperature minimising held-out negative log-likelihood, so confidences match accuracy"""
+    if len(targets) < 20:
+        return 1.0
+    best, best_loss = 1.0, float("inf")
+    for temperature in np.geomspace(0.2, 5.0, 49):
+        probabilities = _softmax(logits / temperature)
+        loss = -np.log(probabilities[np.arange(len(targets)), targets] + 1e-12).mean()
+        if loss < best_loss:
+            best, best_loss = float(temperature), loss
+    return best
+
+def train(records: Iterable[Dict], epochs: int = 12, learning_rate: float = 0.05, l2: float = 1e-4,
+          batch_size: int = 64, validation_share: float = 0.1, seed: int = 0) -> LocalClassifier:
+    """Train every head on records of {"text", "intent", "next_step"}; labels outside HEADS are skipped.
+
+    A held-out share of each head's examples calibrates its temperature and
+    gives the validation accuracy stored in the artifact.
+    """
+    records = [record for record in records if record.get("text")]
+    if not records:
+        raise ValueError("No training records with text")
+    rng = np.random.default_rng(seed)
+    rows = [features(record["text"]) for record in records]
+
+    document_frequency = np.zeros(DIM, dtype=np.float64)
+    for buckets, _ in rows:
+        document_frequency[buckets] += 1
+    idf = (np.log((1 + len(rows)) / (1 + document_frequency)) + 1).astype(np.float32)
+    vectors = []
+    for buckets, values in rows:
+        values = values * idf[buckets]
+        norm = np.linalg.norm(values)
+        vectors.append((buckets, values / norm if norm else values))
+
+    digest = hashlib.sha256("\n".join(
+        f"{record['text']}\t{record.get('intent')}\t{record.get('next_step')}" for record in records
+    ).encode("utf-8")).hexdigest()
+    metadata = {
+        "format": FORMAT_VERSION,
+        "version": f"{time.strftime('%Y%m%d-%H%M%S')}-{digest[:8]}",
+        "trained_at": time.time(),
+        "dim": DIM,
+        "heads": {},
+    }
+    weights, biases = {}, {}
+    for head, labels in HEADS.items():
+        index = {label: i for i, label in enumerate(labels)}
+        examples = [i for i, record in enumerate(records) if record.get(head) in index]
+        if len(examples) < len(labels):
+            continue
+        examples = rng.permutation(examples)
+        held_out = int(len(examples) * validation_share)
+        validation, training = examples[:held_out], examples[held_out:]
+        targets = np.full(len(records), -1, dtype=np.int64)
+        for i in examples:
+            targets[i] = index[records[i][head]]
+
+        head_weights, head_bias = _fit_head([vectors[i] for i in training], targets[training], len(labels),
+                                            epochs, learning_rate, l2, batch_size, rng)
+        temperature, accuracy = 1.0, None
+        if len(validation):
+            logits = _dense([vectors[i] for i in validation]) @ head_weights.T + head_bias
+            temperature = _fit_temperature(logits, targets[validation])
+            accuracy = round(float((logits.argmax(axis=1) == targets[validation]).mean()), 4)
+        weights[head], biases[head] = head_weights, head_bias
+        metadata["heads"][head] = {
+            "labels": labels,
+            "temperature": temperature,
+            "examples": len(training),
+            "validation_accuracy": accuracy,
+        }
+    if not weights:
+        raise ValueError("Too few labelled records to train any head")
+    return LocalClassifier(idf, weights, biases, metadata)
+
+def evaluate(classifier: LocalClassifier, records: Sequence[Dict],
+             thresholds: Sequence[float] = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95)) -> Dict[str, Dict]:
+    """Per head: accuracy, and at each confidence threshold the share answered locally and its accuracy"""
+    report = {}
+    for head, info in classifier.metadata["heads"].items():
+        labelled = [record for record in records if record.get(head) in info["labels"]]
+        if not labelled:
+            continue
+        predictions = classifier.predict_many(head, [record["text"] for record in labelled])
+        correct = np.array([p.label == record[head] for p, record in zip(predictions, labelled)])
+        confidence = np.array([p.confidence for p in predictions])
+        levels = []
+        for threshold in thresholds:
+            answered = confidence >= threshold
+            levels.append({
+                "threshold": threshold,
+                "coverage": round(float(answered.mean()), 4),
+                "accuracy": round(float(correct[answered].mean()), 4) if answered.any() else None,
+            })
+        report[head] = {"examples": len(labelled), "accuracy": round(float(correct.mean()), 4), "thresholds": levels}
+    return report
@@ -0,0 +1,157 @@
+import hashlib
+from typing import Any, Dict, List
+from config import config
+
+# Rough characters per token of English prompt text
+CHARS_PER_TOKEN = 4
+# Anthropic caches a prefix only from this many tokens (2048 on Haiku models) and
+# ignores shorter cache breakpoints, so those are not sent at all
+PROMPT_CACHE_MIN_TOKENS = 1024
+PROMPT_CACHE_MIN_TOKENS_HAIKU = 2048
+
+# Shared by every stage, ahead of the stage's own instructions
+SYSTEM_PREAMBLE = """You support the sales team of a B2B company. You work on sales call transcripts and inbound customer emails, and complete the task below in exactly the format it asks for, without commentary."""
+
+class Prompt:
+    """A stage's prompt, split into a fixed instruction prefix and a per-call suffix.
+
+    The prefix goes in the system prompt; when prompt caching is enabled
+    and the prefix is long enough to be cached, it ends in a cache
+    breakpoint so Claude can serve it from the prompt cache. Only the
+    suffix (the message and any template fields) changes between calls.
+    """
+
+    def __init__(self, name: str, instructions: str, suffix: str):
+        self.name = name
+        self.instructions = instructions
+        self.suffix = suffix
+        self.fingerprint = hashlib.sha256(f"{instructions}\0{suffix}".encode("utf-8")).hexdigest()
+
+        self.system_text = f"{SYSTEM_PREAMBLE}\n\n{instructions}"
+        self.system_blocks: List[Dict[str, Any]] = [
+            {"type": "text", "text": SYSTEM_PREAMBLE},
+            {"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}},
+        ]
+
+    def cacheable(self, model: str) -> bool:
+        """True when prompt caching is on and the prefix meets the model's cache minimum"""
+        minimum = PROMPT_CACHE_MIN_TOKENS_HAIKU if "haiku" in model else PROMPT_CACHE_MIN_TOKENS
+        return config.PROMPT_CACHE_ENABLED and len(self.system_text) / CHARS_PER_TOKEN >= minimum
+
+    def system_for(self, model: str):
+        return self.system_blocks if self.cacheable(model) else self.system_text
+
+    def render(self, text: str, **fields: Any) -> str:
+        return self.suffix.format(text=text, **fields)
+
+class PromptRegistry:
+    def __init__(self):
+        self._prompts: Dict[str, Prompt] = {}
+
+    def register(self, name: str, instructions: str, suffix: str) -> Prompt:
+        if name in self._prompts:
+            raise ValueError(f"Duplicate prompt: {name}")
+        self._prompts[name] = Prompt(name, instructions, suffix)
+        return self._prompts[name]
+
+    def get(self, name: str) -> Prompt:
+        try:
+            return self._prompts[name]
+        except KeyError:
+            raise ValueError(f"Unknown prompt: {name}") from None
+
+    def names(self) -> List[str]:
+        return list(self._prompts)
+
+prompts = PromptRegistry()
+
+prompts.register(
+    "detect_intent",
+    """Classify the intent of the customer message into EXACTLY ONE category:
+1. sales_inquiry - Customer asking about product/pricing/features/services
+2. performance_query - Customer asking "How are you doing?" or performance metrics/results
+3. technical_question - Technical or product-specific questions about implementation
+4. general_inquiry - General questions not fitting above categories
+
+Return ONLY valid JSON with this exact structure:
+{"intent": "sales_inquiry|performance_query|technical_question|general_inquiry", "confidence": 0.0-1.0}""",
+    "Message: {text}",
+)
+
+prompts.register(
+    "extract_requirements",
+    """Extract key requirements, pain points, and needs from the sales conversation.
+Return a JSON array of strings, each representing a distinct requirement or pain point.
+
+Return ONLY a JSON array like: ["requirement1", "requirement2", ...]""",
+    "Conversation: {text}",
+)
+
+prompts.register(
+    "generate_email_response",
+    """You are a professional sales representative. Generate a response email that is:
+- Friendly but professional
+- Addresses their specific concerns
+- Includes a clear call-to-action
+- 2-3 paragraphs maximum
+
+Generate ONLY the email body (no subject line, no greeting formalities like "Dear X," or "Hi X," - just start with the content).""",
+    """From: {name} ({company})
+Original Email: {text}
+
+Requirements to address: {requirements}""",
+)
+
+prompts.register(
+    "suggest_next_step",
+    """Based on the sales conversation, suggest the next best action step.
+Options: schedule_demo, send_proposal, follow_up_call, send_information, close_deal
+
+Return ONLY the action (e.g., "schedule_demo" or "send_proposal").""",
+    """Conversation: {text}
+Lead Score: {score}
+Lead Tier: {tier}""",
+)
+
+prompts.register(
+    "extract_lead_info",
+    """Extract lead information from the conversation. Return JSON with:
+- name: person's name (or "Unknown" if not found)
+- email: email address (or null if not found)
+- phone: phone number (or null if not found)
+- company: company name (or null if not found)
+
+Return ONLY valid JSON: {"name": "...", "email": "...", "phone": "...", "company": "..."}""",
+    "Conversation: {text}",
+)
+
+prompts.register(
+    "fused_extraction",
+    """Analyze the sales conversation and record every field with the record_extraction tool:
+- intent: EXACTLY ONE of sales_inquiry (asking about product/pricing/features/services), performance_query ("How are you doing?" or performance metrics/results), technical_question (technical or implementation questions), general_inquiry (anything else)
+- confidence: confidence in the intent, 0.0-1.0
+- requirements: distinct key requirements, pain points and needs
+- lead_info: person's name ("Unknown" if not found), email, phone and company (null if not found)
+- next_step: the next best action step given the conversation and lead score""",
+    """Conversation: {text}
+Lead Score: {score}
+Lead Tier: {tier}""",
+)
+
+prompts.register(
+    "digest_chunk",
+    """You are given one part of a sales call transcript.
+List the facts it contains as short bullet points: people's names and roles, email addresses and phone numbers (copied exactly), company names, requirements and pain points, budget, timeline, decision makers, objections, and any commitments or next steps.
+Skip small talk. Return ONLY the bullet points.""",
+    """This is part {part} of {parts}.
+
+Transcript part: {text}""",
+)
+
+prompts.register(
+    "digest_reduce",
+    """You are given notes taken from consecutive parts of one sales call.
+Merge them into a single compact digest of the call. Keep every name, email address, phone number, company, requirement, pain point, budget figure, timeline and agreed next step; drop duplicates and small talk.
+Return ONLY the digest.""",
+    "Notes: {text}",
+)
@@ -0,0 +1,104 @@
+import asyncio
+import importlib
+from typing import TYPE_CHECKING, Optional
+from utils.logger import setup_logger
+from config import config
+
+if TYPE_CHECKING:
+    import httpx
+    from anthropic import AsyncAnthropic
+    from openai import AsyncOpenAI
+
+logger = setup_logger(__name__)
+
+# Imported on first use (or by the warm-up after startup) rather than at import
+# time; together they take about half a second to import
+SDK_MODULES = ("httpx", "anthropic", "openai")
+
+class ProviderClients:
+    """Process-wide async Claude/Whisper clients sharing one pooled httpx transport"""
+
+    def __init__(self):
+        self._http_client: Optional["httpx.AsyncClient"] = None
+        self._anthropic: Optional["AsyncAnthropic"] = None
+        self._openai: Optional["AsyncOpenAI"] = None
+        self._warm_up: Optional[asyncio.Future] = None
+
+    @property
+    def http_client(self) -> "httpx.AsyncClient":
+        if self._http_client is None:
+            import httpx
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=config.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(config.HTTP_TIMEOUT, connect=10.0),
+            )
+        return self._http_client
+
+    @property
+    def anthropic(self) -> "AsyncAnthropic":
+        if self._anthropic is None:
+            from anthropic import AsyncAnthropic
+            self._anthropic = AsyncAnthropic(
+                api_key=config.CLAUDE_API_KEY,
+                base_url=config.CLAUDE_BASE_URL or None,
+                http_client=self.http_client,
+                # Retries are handled by the provider gateway
+                max_retries=0,
+            )
+        return self._anthropic
+
+    @property
+    def claude_messages(self):
+        return self.anthropic.messages
+
+    @property
+    def claude_cached_messages(self):
+        """Messages API that accepts cache_control blocks (prompt caching; still a beta in the pinned SDK).
+
+        Only used for prompts whose prefix is over the cache minimum, which no current prompt is.
+        """
+        return self.anthropic.beta.prompt_caching.messages
+
+    @property
+    def openai(self) -> "AsyncOpenAI":
+        if self._openai is None:
+            from openai import AsyncOpenAI
+            self._openai = AsyncOpenAI(
+                api_key=config.OPENAI_API_KEY,
+                base_url=config.OPENAI_BASE_URL or None,
+                http_client=self.http_client,
+                # Retries are handled by the provider gateway
+                max_retries=0,
+            )
+        return self._openai
+
+    async def startup(self):
+        """Import the SDKs in the background, so startup (and /health) does not wait for them"""
+        self._warm_up = asyncio.ensure_future(asyncio.to_thread(self._import_sdks))
+
+    def _import_sdks(self):
+        for name in SDK_MODULES:
+            importlib.import_module(name)
+        logger.info(
+            f"Provider SDKs loaded (max_connections={config.HTTP_MAX_CONNECTIONS}, "
+            f"keepalive={config.HTTP_MAX_KEEPALIVE_CONNECTIONS})"
+        )
+
+    async def shutdown(self):
+        """Close the shared transport"""
+        if self._warm_up is not None:
+            # Imports cannot be interrupted; a failed one surfaces again on first use
+            await asyncio.gather(self._warm_up, return_exceptions=True)
+            self._warm_up = None
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self._http_client = None
+        self._anthropic = None
+        self._openai = None
+        logger.info("Provider clients closed")
+
+providers = ProviderClients()
@@ -0,0 +1,65 @@
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from config import config
+from services.container import container
+from utils.logger import setup_logger
+from utils.metrics import LOCAL_PREDICTIONS
+
+if TYPE_CHECKING:
+    from services.local_classifier import Prediction
+
+logger = setup_logger(__name__)
+
+# Model names MODEL_ROUTES may use in place of an id
+MODEL_ALIASES = {"default": "CLAUDE_MODEL", "fast": "CLAUDE_FAST_MODEL"}
+
+class ModelRouter:
+    """Which Claude model answers each prompt stage, and when to escalate to the default one.
+
+    Stages not in the routing table use the default model, so a new prompt
+    gets the large model until it is routed on purpose.
+    """
+
+    def __init__(self, routes: str, default_model: str, fast_model: str, escalation_confidence: float = 0.0):
+        self.default_model = default_model
+        self.fast_model = fast_model
+        self.escalation_confidence = escalation_confidence
+        self.routes: Dict[str, str] = {}
+        for item in routes.split(","):
+            stage, _, model = item.partition("=")
+            if stage.strip() and model.strip():
+                model = model.strip()
+                self.routes[stage.strip()] = getattr(config, MODEL_ALIASES[model]) if model in MODEL_ALIASES else model
+        if self.routes:
+            logger.info(f"Model routes: {self.routes} (default {default_model})")
+
+    def model_for(self, stage: str) -> str:
+        return self.routes.get(stage, self.default_model)
+
+    def should_escalate(self, stage: str, confidence: Optional[float]) -> bool:
+        """True when a routed stage's answer is below MODEL_ESCALATION_CONFIDENCE"""
+        if self.escalation_confidence <= 0 or self.model_for(stage) == self.default_model:
+            return False
+        return confidence is None or confidence < self.escalation_confidence
+
+    def prices(self, model: str) -> Tuple[float, float]:
+        """(input, output) USD per million tokens"""
+        if model == self.fast_model and model != self.default_model:
+            return config.CLAUDE_FAST_INPUT_COST_PER_MTOK, config.CLAUDE_FAST_OUTPUT_COST_PER_MTOK
+        return config.CLAUDE_INPUT_COST_PER_MTOK, config.CLAUDE_OUTPUT_COST_PER_MTOK
+
+model_router = ModelRouter(
+    config.MODEL_ROUTES,
+    config.CLAUDE_MODEL,
+    config.CLAUDE_FAST_MODEL,
+    config.MODEL_ESCALATION_CONFIDENCE,
+)
+
+def first_pass(head: str, text: str) -> Tuple[Optional["Prediction"], bool]:
+    """(local classifier prediction, whether it is confident enough to answer without Claude)"""
+    classifier = container.classifier
+    prediction = classifier.predict(head, text) if classifier else None
+    if prediction is None:
+        return None, False
+    confident = prediction.confidence >= config.LOCAL_CLASSIFIER_CONFIDENCE
+    LOCAL_PREDICTIONS.inc(head=head, result="answered" if confident else "deferred")
+    return prediction, confident
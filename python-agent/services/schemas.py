@@ -0,0 +1,42 @@
+from typing import Any, List, Literal, Optional
+from pydantic import BaseModel, Field, RootModel, field_validator
+
+Intent = Literal['sales_inquiry', 'performance_query', 'technical_question', 'general_inquiry']
+NextStep = Literal['schedule_demo', 'send_proposal', 'follow_up_call', 'send_information', 'close_deal']
+
+class LeadInfo(BaseModel):
+    name: str = "Unknown"
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    company: Optional[str] = None
+
+    @field_validator("name", mode="before")
+    @classmethod
+    def _unknown_name(cls, value: Any) -> Any:
+        return value or "Unknown"
+
+class IntentResult(BaseModel):
+    """detect_intent response; an unknown intent is general_inquiry"""
+    intent: Optional[str] = Field(None, validate_default=True)
+    confidence: Optional[float] = Field(0.5, validate_default=True)
+
+    @field_validator("intent")
+    @classmethod
+    def _known_intent(cls, value: Optional[str]) -> str:
+        return value if value in Intent.__args__ else "general_inquiry"
+
+    @field_validator("confidence")
+    @classmethod
+    def _clamp_confidence(cls, value: Optional[float]) -> float:
+        return 0.5 if value is None else min(max(value, 0.0), 1.0)
+
+class Requirements(RootModel[List[str]]):
+    """extract_requirements response"""
+
+class FusedExtraction(BaseModel):
+    """Every structured field of a call, extracted in one Claude request"""
+    intent: Intent
+    confidence: float = Field(ge=0.0, le=1.0)
+    requirements: List[str]
+    lead_info: LeadInfo
+    next_step: NextStep
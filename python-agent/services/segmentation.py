@@ -0,0 +1,146 @@
+import os
+import re
+import wave
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+WINDOW_SECONDS = 0.05
+READ_WINDOWS = 200  # windows decoded per read, keeps memory flat
+
+# numpy is imported by the functions that need it; most uploads never get here.
+# Sample widths (bytes) window_energies can decode; other WAVs are sent whole
+SAMPLE_DTYPES = {1: "uint8", 2: "int16", 4: "int32"}
+
+def wav_info(path: str) -> Optional[Tuple[float, int, int]]:
+    """Return (duration seconds, bytes per second, bytes per sample) for a PCM WAV file, or None"""
+    try:
+        with wave.open(path, "rb") as wav:
+            rate = wav.getframerate()
+            byte_rate = rate * wav.getsampwidth() * wav.getnchannels()
+            return wav.getnframes() / float(rate), byte_rate, wav.getsampwidth()
+    except (wave.Error, EOFError, OSError):
+        return None
+
+def window_energies(path: str, window_seconds: float = WINDOW_SECONDS) -> "np.ndarray":
+    """RMS energy of consecutive fixed-size windows, read in bounded chunks"""
+    import numpy as np
+
+    with wave.open(path, "rb") as wav:
+        sample_width = wav.getsampwidth()
+        if sample_width not in SAMPLE_DTYPES:
+            raise ValueError(f"Unsupported sample width: {sample_width}")
+        dtype = SAMPLE_DTYPES[sample_width]
+        channels = wav.getnchannels()
+        window_frames = max(1, int(wav.getframerate() * window_seconds))
+
+        energies = []
+        while True:
+            raw = wav.readframes(window_frames * READ_WINDOWS)
+            if not raw:
+                break
+            samples = np.frombuffer(raw, dtype=dtype).astype(np.float64)
+            if sample_width == 1:
+                samples -= 128.0
+            per_window = window_frames * channels
+            usable = len(samples) - len(samples) % per_window
+            if usable:
+                blocks = samples[:usable].reshape(-1, per_window)
+                energies.append(np.sqrt(np.mean(blocks ** 2, axis=1)))
+            if usable < len(samples):
+                tail = samples[usable:]
+                energies.append(np.array([np.sqrt(np.mean(tail ** 2))]))
+
+    return np.concatenate(energies) if energies else np.zeros(0)
+
+def plan_segments(energies: "np.ndarray", window_seconds: float, segment_seconds: float,
+                  overlap_seconds: float, search_seconds: float) -> List[Tuple[float, float]]:
+    """Choose (start, end) times, cutting at the quietest window before each target length.
+
+    Each segment runs `overlap_seconds` past its cut so words straddling the
+    boundary appear in both neighbours; stitching removes the duplicate.
+    """
+    total = len(energies) * window_seconds
+    segments = []
+    start = 0.0
+
+    while total - start > segment_seconds:
+        target = start + segment_seconds
+        lo = int(max(start + segment_seconds / 2, target - search_seconds) / window_seconds)
+        hi = max(lo + 1, int(target / window_seconds))
+        cut = (lo + int(energies[lo:hi].argmin())) * window_seconds
+        segments.append((start, min(total, cut + overlap_seconds)))
+        start = cut
+
+    segments.append((start, total))
+    return segments
+
+def write_segments(path: str, segments: List[Tuple[float, float]], out_dir: str) -> List[str]:
+    """Copy each (start, end) range of a WAV file into its own WAV file"""
+    paths = []
+    with wave.open(path, "rb") as wav:
+        params = wav.getparams()
+        rate = wav.getframerate()
+        chunk_frames = rate * 10
+        for index, (start, end) in enumerate(segments):
+            segment_path = os.path.join(out_dir, f"segment_{index:04d}.wav")
+            first, last = int(start * rate), min(int(end * rate), wav.getnframes())
+            wav.setpos(first)
+            with wave.open(segment_path, "wb") as out:
+                out.setparams(params)
+                remaining = last - first
+                while remaining > 0:
+                    count = min(chunk_frames, remaining)
+                    frames = wav.readframes(count)
+                    if not frames:
+                        break
+                    out.writeframes(frames)
+                    remaining -= count
+            paths.append(segment_path)
+    return paths
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+def stitch_transcripts(texts: List[str], max_overlap_words: int = 40, min_overlap_words: int = 2,
+                       max_partial_words: int = 2) -> str:
+    """Join segment transcripts, dropping the words repeated across each overlap.
+
+    Up to `max_partial_words` words at either side of a boundary may be
+    clipped mid-word by the cut, so the alignment is allowed to skip them.
+    """
+    words: List[str] = []
+    for text in texts:
+        incoming = text.split()
+        if not words:
+            words.extend(incoming)
+            continue
+
+        tail = [_normalize_word(w) for w in words[-max_overlap_words:]]
+        head = [_normalize_word(w) for w in incoming[:max_overlap_words]]
+        match = _find_overlap(tail, head, min_overlap_words, max_partial_words)
+        if match is None:
+            words.extend(incoming)
+            continue
+
+        drop_tail, skip_head = match
+        if drop_tail:
+            del words[-drop_tail:]
+        words.extend(incoming[skip_head:])
+
+    return " ".join(words)
+
+def _find_overlap(tail: List[str], head: List[str], min_size: int,
+                  max_partial: int) -> Optional[Tuple[int, int]]:
+    """Longest run ending the tail that also starts the head, as (tail words to drop, head words to skip)"""
+    for size in range(min(len(tail), len(head)), min_size - 1, -1):
+        for drop_tail in range(max_partial + 1):
+            end = len(tail) - drop_tail
+            if end - size < 0:
+                break
+            run = tail[end - size:end]
+            for skip in range(min(max_partial, len(head) - size) + 1):
+                if head[skip:skip + size] == run:
+                    return drop_tail, skip + size
+    return None
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Set
+import numpy as np
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Embedding width; unrelated emails score under ~0.2, light edits of one above ~0.9
+DIM = 256
+# Random-hyperplane LSH: a vector is a candidate if it shares a bucket in any table
+LSH_TABLES = 8
+LSH_BITS = 10
+LSH_SEED = 1729
+# Below this many entries every vector is compared, which is exact and still ~1 ms
+BRUTE_FORCE_ENTRIES = 5000
+# An entry still not ready after this long was left by a crashed write and is skipped
+ABANDONED_SECONDS = 60
+
+_WORD = re.compile(r"\w+")
+
+def embed(text: str) -> np.ndarray:
+    """Unit vector of the text's words and word pairs, hashed with random signs into DIM buckets"""
+    words = _WORD.findall(text.lower())
+    features = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+    vector = np.zeros(DIM, dtype=np.float32)
+    if not features:
+        return vector
+    # crc32, unlike hash(), is stable across processes and restarts
+    hashes = np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature in features),
+                         dtype=np.uint32, count=len(features))
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+    counts = np.bincount(hashes % DIM, weights=signs, minlength=DIM)
+    # Damp repeated words so long texts are not dominated by filler
+    vector[:] = np.sign(counts) * np.log1p(np.abs(counts))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class SimilarityIndex:
+    """Embeddings of processed emails and calls, for near-duplicate reuse and similar-lead lookup.
+
+    Vectors live in a memory-mapped ring of `capacity` rows (a sparse file, so
+    only used rows take disk); each entry's kind, summary and reusable stage
+    results are in SQLite next to it. Entries past capacity replace the
+    oldest. Worker processes share both files: each keeps its own LSH
+    buckets and picks up other workers' entries on the next lookup.
+    """
+
+    def __init__(self, directory: str, capacity: int):
+        self.directory = directory
+        self.capacity = capacity
+        self._db: Optional[sqlite3.Connection] = None
+        self._vectors: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+
+        planes = np.random.default_rng(LSH_SEED).standard_normal((LSH_TABLES * LSH_BITS, DIM))
+        self._planes = planes.astype(np.float32)
+        self._bit_values = 1 << np.arange(LSH_BITS)
+        # slot -> (entry id, kind) of the entries this process has seen
+        self._slots: Dict[int, tuple] = {}
+        self._buckets: List[Dict[int, Set[int]]] = [{} for _ in range(LSH_TABLES)]
+        self._last_id = 0
+        # Bucket entries left behind by slots that were reused
+        self._stale = 0
+
+    def _open(self):
+        if self._db is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, "vectors.f32")
+        size = self.capacity * DIM * 4
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self._vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(self.capacity, DIM))
+
+        self._db = sqlite3.connect(os.path.join(self.directory, "entries.db"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, slot INTEGER, kind TEXT NOT NULL, "
+            "created_at REAL NOT NULL, summary TEXT NOT NULL, result TEXT NOT NULL, "
+            "ready INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_slot ON entries (slot)")
+        self._db.commit()
+
+    def _keys(self, vectors: np.ndarray) -> np.ndarray:
+        """(len(vectors), LSH_TABLES) bucket keys"""
+        bits = (vectors @ self._planes.T > 0).reshape(len(vectors), LSH_TABLES, LSH_BITS)
+        return bits @ self._bit_values
+
+    def _refresh(self):
+        """Pick up entries added since the last lookup, by this or another worker"""
+        rows = self._db.execute(
+            "SELECT id, slot, kind, ready, created_at FROM entries WHERE id > ? ORDER BY id", (self._last_id,)
+        ).fetchall()
+        ready = [row for row in rows if row["ready"]]
+        for row in ready:
+            previous = self._slots.get(row["slot"])
+            if previous is not None and previous[0] != row["id"]:
+                self._stale += 1
+            self._slots[row["slot"]] = (row["id"], row["kind"])
+        if self._stale > len(self._slots):
+            self._buckets = [{} for _ in range(LSH_TABLES)]
+            self._stale = 0
+            self._index(list(self._slots))
+        elif ready:
+            self._index([row["slot"] for row in ready])
+        # Stop before the first entry still being written, and look at it again next time,
+        # unless it has been pending so long that its writer must have died
+        abandoned_before = time.time() - ABANDONED_SECONDS
+        for row in rows:
+            if not row["ready"] and row["created_at"] > abandoned_before:
+                break
+            self._last_id = row["id"]
+
+    def _index(self, slots: List[int]):
+        if not slots:
+            return
+        keys = self._keys(np.asarray(self._vectors[np.array(slots)]))
+        for slot, slot_keys in zip(slots, keys):
+            for table, key in enumerate(slot_keys):
+                self._buckets[table].setdefault(int(key), set()).add(slot)
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        if len(self._slots) <= BRUTE_FORCE_ENTRIES:
+            return np.fromiter(self._slots, dtype=np.int64, count=len(self._slots))
+        found: Set[int] = set()
+        for table, key in enumerate(self._keys(query[None, :])[0]):
+            found |= self._buckets[table].get(int(key), set())
+        return np.fromiter(found, dtype=np.int64, count=len(found))
+
+    def _search(self, text: str, limit: int, kind: Optional[str], min_similarity: float,
+                with_result: bool) -> List[Dict[str, Any]]:
+        query = embed(text)
+        with self._lock:
+            self._open()
+            self._refresh()
+            slots = self._candidates(query)
+            if kind is not None:
+                slots = np.array([slot for slot in slots.tolist() if self._slots[slot][1] == kind], dtype=np.int64)
+            if not len(slots):
+                return []
+            # A slot reused by a newer entry is compared against the newer vector
+            similarities = np.asarray(self._vectors[slots]) @ query
+            keep = similarities >= min_similarity
+            slots, similarities = slots[keep], similarities[keep]
+            order = np.argsort(-similarities)[:limit]
+            ids = [self._slots[int(slots[i])][0] for i in order]
+            if not ids:
+                return []
+            rows = {
+                row["id"]: row for row in self._db.execute(
+                    f"SELECT * FROM entries WHERE id IN ({','.join('?' * len(ids))})", ids
+                )
+            }
+
+        matches = []
+        for i, entry_id in zip(order, ids):
+            row = rows.get(entry_id)
+            if row is None:
+                continue
+            match = {
+                "id": entry_id,
+                "kind": row["kind"],
+                "similarity": round(float(similarities[i]), 4),
+                "created_at": row["created_at"],
+                "summary": json.loads(row["summary"]),
+            }
+            if with_result:
+                match["result"] = json.loads(row["result"])
+            matches.append(match)
+        return matches
+
+    def _add(self, kind: str, text: str, summary: Dict[str, Any], result: Dict[str, Any]) -> int:
+        vector = embed(text)
+        with self._lock:
+            self._open()
+            cursor = self._db.execute(
+                "INSERT INTO entries (kind, created_at, summary, result) VALUES (?, ?, ?, ?)",
+                (kind, time.time(), json.dumps(summary), json.dumps(result)),
+            )
+            entry_id = cursor.lastrowid
+            slot = (entry_id - 1) % self.capacity
+            self._db.execute("DELETE FROM entries WHERE slot = ? AND id < ?", (slot, entry_id))
+            self._db.execute("UPDATE entries SET slot = ? WHERE id = ?", (slot, entry_id))
+            self._db.commit()
+            self._vectors[slot] = vector
+            self._db.execute("UPDATE entries SET ready = 1 WHERE id = ?", (entry_id,))
+            self._db.commit()
+            return entry_id
+
+    async def add(self, kind: str, text: str, summary: Dict[str, Any], result: Dict[str, Any]) -> int:
+        """Index a processed text with a display summary and the stage results a duplicate may reuse"""
+        return await asyncio.to_thread(self._add, kind, text, summary, result)
+
+    async def search(self, text: str, limit: int = 5, kind: Optional[str] = None,
+                     min_similarity: float = 0.0) -> List[Dict[str, Any]]:
+        """Most similar indexed entries, best first"""
+        return await asyncio.to_thread(self._search, text, limit, kind, min_similarity, False)
+
+    async def find_duplicate(self, kind: str, text: str, threshold: float) -> Optional[Dict[str, Any]]:
+        """The closest entry of `kind` at or above `threshold`, with its stored results"""
+        matches = await asyncio.to_thread(self._search, text, 1, kind, threshold, True)
+        return matches[0] if matches else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._slots), "capacity": self.capacity}
+
+    def close(self):
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -1,38 +1,137 @@
-import openai
-from typing import Optional
+import asyncio
+import os
+import shutil
+import tempfile
+from typing import Awaitable, Callable, Optional
 from utils.logger import setup_logger
+from utils.metrics import CACHE_LOOKUPS, track_provider
 from config import config
+from services.cache import result_cache, file_sha256
+from services.gateway import whisper_gateway
+from services.providers import providers
+from services.segmentation import (
+    SAMPLE_DTYPES, WINDOW_SECONDS, plan_segments, stitch_transcripts, wav_info, window_energies, write_segments,
+)
+from utils.pipeline import gather_or_cancel
 
 logger = setup_logger(__name__)
 
+class ChunkedTranscriber:
+    """Split a WAV recording at silences and transcribe the segments concurrently.
+
+    `transcribe_segment` receives a segment file path; it is the Whisper call
+    in production and can be any local stub otherwise.
+    """
+
+    def __init__(self, transcribe_segment: Callable[[str], Awaitable[str]],
+                 segment_seconds: float, overlap_seconds: float,
+                 search_seconds: float, max_concurrency: int):
+        self.transcribe_segment = transcribe_segment
+        self.segment_seconds = segment_seconds
+        self.overlap_seconds = overlap_seconds
+        self.search_seconds = search_seconds
+        self.max_concurrency = max_concurrency
+
+    def _split(self, audio_file_path: str, work_dir: str):
+        energies = window_energies(audio_file_path)
+        segments = plan_segments(
+            energies, WINDOW_SECONDS, self.segment_seconds, self.overlap_seconds, self.search_seconds
+        )
+        return write_segments(audio_file_path, segments, work_dir)
+
+    async def transcribe(self, audio_file_path: str) -> str:
+        work_dir = tempfile.mkdtemp(prefix="segments_", dir=os.path.dirname(audio_file_path) or None)
+        try:
+            segment_paths = await asyncio.to_thread(self._split, audio_file_path, work_dir)
+            logger.info(f"Transcribing {len(segment_paths)} segments of {audio_file_path}")
+
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def run(path: str) -> str:
+                async with semaphore:
+                    return await self.transcribe_segment(path)
+
+            # One failed segment fails the recording: stop the others before their files are removed
+            texts = await gather_or_cancel(*(run(path) for path in segment_paths))
+            return stitch_transcripts(texts)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
 class TranscriptionService:
     def __init__(self):
         if not config.OPENAI_API_KEY:
             logger.warning("OPENAI_API_KEY not set. Transcription will fail.")
-        else:
-            openai.api_key = config.OPENAI_API_KEY
-    
-    async def transcribe_audio(self, audio_file_path: str) -> str:
-        """Transcribe audio using OpenAI Whisper API"""
+
+    @property
+    def client(self):
+        return providers.openai
+
+    async def transcribe_audio(self, audio_file_path: str, file_hash: Optional[str] = None) -> str:
+        """Transcribe audio using OpenAI Whisper API, cached on the file's content hash"""
         try:
             if not config.OPENAI_API_KEY:
                 raise ValueError("OPENAI_API_KEY not configured")
-            
+
+            if file_hash is None:
+                file_hash = await asyncio.to_thread(file_sha256, audio_file_path)
+            cache_key = result_cache.make_key("transcription", audio=file_hash, model="whisper-1", language="en")
+            cached = await result_cache.get(cache_key)
+            CACHE_LOOKUPS.inc(stage="transcription", result="miss" if cached is None else "hit")
+            if cached is not None:
+                logger.info(f"Cache hit for transcription of {audio_file_path}")
+                return cached
+
             logger.info(f"Transcribing audio file: {audio_file_path}")
-            
-            with open(audio_file_path, "rb") as audio_file:
-                client = openai.OpenAI(api_key=config.OPENAI_API_KEY)
-                transcript = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language="en"
-                )
-            
-            transcription_text = transcript.text
+
+            chunker = self._chunker_for(audio_file_path)
+            if chunker:
+                transcription_text = await chunker.transcribe(audio_file_path)
+            else:
+                transcription_text = await self._transcribe_file(audio_file_path)
             logger.info(f"Transcription completed. Length: {len(transcription_text)} chars")
-            
+
+            await result_cache.set(cache_key, transcription_text)
             return transcription_text
         except Exception as e:
             logger.error(f"Error transcribing audio: {str(e)}")
             raise
 
+    async def _transcribe_file(self, audio_file_path: str) -> str:
+        """Send one file to Whisper"""
+        async def attempt():
+            with open(audio_file_path, "rb") as audio_file, track_provider("openai", "transcription"):
+                return await self.client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=audio_file,
+                    language="en"
+                )
+
+        transcript = await whisper_gateway.call(attempt)
+        return transcript.text
+
+    def _chunker_for(self, audio_file_path: str) -> Optional[ChunkedTranscriber]:
+        """Chunk WAV recordings that are longer than one segment or over the request size limit"""
+        if not config.TRANSCRIPTION_CHUNKING:
+            return None
+        info = wav_info(audio_file_path)
+        if info is None:
+            return None
+
+        duration, byte_rate, sample_width = info
+        if sample_width not in SAMPLE_DTYPES:
+            # e.g. 24-bit PCM: silences can't be found, so the file goes to Whisper in one request
+            logger.info(f"Not chunking {audio_file_path}: unsupported sample width {sample_width}")
+            return None
+        # Keep every segment comfortably under the provider's upload limit
+        max_segment_seconds = 0.9 * config.TRANSCRIPTION_MAX_REQUEST_BYTES / max(byte_rate, 1)
+        segment_seconds = min(config.TRANSCRIPTION_SEGMENT_SECONDS, max_segment_seconds)
+        if duration <= segment_seconds:
+            return None
+
+        return ChunkedTranscriber(
+            self._transcribe_file,
+            segment_seconds=segment_seconds,
+            overlap_seconds=config.TRANSCRIPTION_OVERLAP_SECONDS,
+            search_seconds=config.TRANSCRIPTION_SILENCE_SEARCH_SECONDS,
+            max_concurrency=config.TRANSCRIPTION_MAX_CONCURRENCY,
+        )
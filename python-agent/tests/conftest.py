@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Tests import the agent's modules the way main.py does, from python-agent/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Settings are read at import; keep tests offline and quiet whatever the shell has set
+os.environ["CLAUDE_API_KEY"] = ""
+os.environ["OPENAI_API_KEY"] = ""
+os.environ.setdefault("LOG_LEVEL", "WARNING")
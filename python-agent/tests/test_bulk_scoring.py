@@ -0,0 +1,66 @@
+import random
+import numpy as np
+import pandas as pd
+from services.analysis import AnalysisService
+from services.bulk_scoring import FACTOR_COLUMNS, score_frame
+
+WORDS = ["budget", "Price", "$", "asap", "next week", "problem", "looking for", "LOOKING  FOR", "we", "CEO",
+         "weekend", "pricing", "the", "hello", "team,", "needed", "quote.", ""]
+# Combined lengths on either side of the engagement thresholds
+BOUNDARY_LENGTHS = [0, 199, 200, 201, 499, 500, 501]
+
+def _text(rng: random.Random):
+    roll = rng.random()
+    if roll < 0.1:
+        return None
+    if roll < 0.15:
+        return np.nan
+    if roll < 0.25:
+        return ""
+    text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+    if rng.random() < 0.5:
+        # Pad to a threshold length (score_lead measures the two texts without the joining space)
+        text = text.ljust(rng.choice(BOUNDARY_LENGTHS), ".")
+    return text
+
+def _as_text(value) -> str:
+    return value if isinstance(value, str) else ""
+
+def _expected(transcript, email_body) -> dict:
+    if email_body is None:
+        return AnalysisService().score_lead(_as_text(transcript))
+    return AnalysisService().score_lead(_as_text(transcript), _as_text(email_body))
+
+def _assert_rows_match(frame: pd.DataFrame, email_column):
+    scored = score_frame(frame, "transcription", email_column)
+    for index, row in frame.iterrows():
+        expected = _expected(row["transcription"], row[email_column] if email_column else None)
+        got = scored.loc[index]
+        factors = {factor: True for factor in FACTOR_COLUMNS if got[factor]}
+        assert (int(got["score"]), got["tier"], factors) == (expected["score"], expected["tier"], expected["factors"]), row.to_dict()
+    return scored
+
+def test_bulk_scores_match_score_lead_row_by_row():
+    rng = random.Random(10)
+    rows = [{"transcription": _text(rng), "body": _text(rng)} for _ in range(600)]
+    # Exact threshold lengths split across both columns, and the tier boundaries (1, 40, 70, 100)
+    rows += [
+        {"transcription": "x" * 100, "body": "y" * 100},
+        {"transcription": "x" * 101, "body": "y" * 100},
+        {"transcription": "x" * 250, "body": "y" * 250},
+        {"transcription": "x" * 250, "body": "y" * 251},
+        {"transcription": "", "body": ""},
+        {"transcription": "budget", "body": "team"},
+        {"transcription": "price, asap", "body": None},
+        {"transcription": "budget asap ceo".ljust(201, "."), "body": ""},
+        {"transcription": "budget asap problem ceo".ljust(501, "."), "body": ""},
+    ]
+    frame = pd.DataFrame(rows, index=pd.RangeIndex(5, 5 + len(rows)))
+    scored = _assert_rows_match(frame, "body")
+    assert {1, 40, 70, 100} <= set(scored["score"])
+    assert set(scored["tier"]) == {"cold", "warm", "hot"}
+
+def test_bulk_scores_without_an_email_column():
+    rng = random.Random(11)
+    frame = pd.DataFrame({"transcription": [_text(rng) for _ in range(300)]})
+    _assert_rows_match(frame, None)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from services import completion
+from services.cache import ResultCache
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+def test_hits_misses_and_lru_eviction():
+    cache = ResultCache(max_entries=2)
+    run(cache.set("a", 1))
+    run(cache.set("b", 2))
+    assert run(cache.get("a")) == 1
+    run(cache.set("c", 3))
+    # "b" was the least recently used
+    assert run(cache.get("b")) is None
+    assert run(cache.get("c")) == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (2, 1, 1, 2)
+
+def test_entries_expire_after_the_ttl():
+    cache = ResultCache(ttl_seconds=0.05)
+    run(cache.set("a", {"x": 1}))
+    assert run(cache.get("a")) == {"x": 1}
+    time.sleep(0.06)
+    assert run(cache.get("a")) is None and cache.stats()["entries"] == 0
+
+def test_sqlite_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = ResultCache(sqlite_path=path)
+    run(first.set("key", ["SSO", "Audit log"]))
+    first.close()
+
+    second = ResultCache(sqlite_path=path)
+    assert run(second.get("key")) == ["SSO", "Audit log"]
+    assert second.stats()["disk_hits"] == 1
+    # Promoted to memory: the next hit does not touch the disk
+    assert run(second.get("key")) == ["SSO", "Audit log"] and second.stats()["disk_hits"] == 1
+    second.close()
+
+def test_expired_disk_entries_are_not_served(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = ResultCache(sqlite_path=path, ttl_seconds=0.05)
+    run(first.set("key", 1))
+    first.close()
+    time.sleep(0.06)
+    second = ResultCache(sqlite_path=path)
+    assert run(second.get("key")) is None
+    second.close()
+
+def test_disabled_cache_stores_nothing():
+    cache = ResultCache(enabled=False)
+    run(cache.set("a", 1))
+    assert run(cache.get("a")) is None and cache.stats()["misses"] == 0
+
+@pytest.fixture
+def replies(monkeypatch):
+    """complete() against a fresh cache and a queue of canned Claude replies"""
+    queued = []
+
+    async def create(stage, prompt, model, content, max_tokens, **kwargs):
+        text, stop_reason = queued.pop(0)
+        return SimpleNamespace(content=[SimpleNamespace(text=text)], stop_reason=stop_reason)
+
+    monkeypatch.setattr(completion, "result_cache", ResultCache())
+    monkeypatch.setattr(completion, "_create", create)
+    return queued
+
+def parse_list(response):
+    return response.split(",") if response.startswith("ok") else None
+
+def test_unparsable_replies_are_not_cached(replies):
+    replies += [("garbled", "end_turn"), ("ok,a", "end_turn")]
+    assert run(completion.complete("extract_requirements", 300, "text", parse=parse_list)) is None
+    assert run(completion.complete("extract_requirements", 300, "text", parse=parse_list)) == ["ok", "a"]
+    # Served from the cache now: no reply left to take
+    assert run(completion.complete("extract_requirements", 300, "text", parse=parse_list)) == ["ok", "a"]
+
+def test_truncated_replies_are_not_cached(replies):
+    replies += [("Dear Dana, thanks for", "max_tokens"), ("Dear Dana, thanks.", "end_turn")]
+    fields = {"name": "Dana", "company": "Acme", "requirements": ""}
+    assert run(completion.complete("generate_email_response", 500, "text", **fields)) == "Dear Dana, thanks for"
+    assert run(completion.complete("generate_email_response", 500, "text", **fields)) == "Dear Dana, thanks."
+    assert run(completion.complete("generate_email_response", 500, "text", **fields)) == "Dear Dana, thanks."
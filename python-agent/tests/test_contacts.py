@@ -0,0 +1,47 @@
+import time
+import pytest
+from benchmarks.bench_contacts import ADVERSARIAL, SAMPLE
+from utils.helpers import contact_extractor, extract_company_name, extract_contacts, extract_email, extract_phone
+
+def test_extracts_each_field_from_a_transcript():
+    assert extract_contacts(SAMPLE) == {"email": "dana.smith@acme.example", "phone": "+1 555-123-4567", "company": "Acme Corp"}
+    assert extract_contacts("nothing to see here") == {"email": None, "phone": None, "company": None}
+
+def test_single_field_helpers_agree():
+    assert (extract_email(SAMPLE), extract_phone(SAMPLE), extract_company_name(SAMPLE)) == (
+        "dana.smith@acme.example", "+1 555-123-4567", "Acme Corp")
+
+def test_company_after_a_cue_beats_an_earlier_mention():
+    text = "We left Globex Inc last year and now I am calling from Blue & Co about renewals"
+    assert extract_company_name(text) == "Blue & Co"
+    assert extract_company_name("Globex Inc and Initech LLC were both mentioned") == "Globex Inc"
+
+@pytest.mark.parametrize("text, email", [
+    ("mail me: first.last+tag@sub.example.co.uk.", "first.last+tag@sub.example.co.uk"),
+    ("no tld at user@localhost", None),
+    ("two @@ signs user@@example.com", None),
+])
+def test_email_boundaries(text, email):
+    assert extract_email(text) == email
+
+@pytest.mark.parametrize("text, phone", [
+    ("call (555) 123-4567 today", "(555) 123-4567"),
+    ("call 555.123.4567", "555.123.4567"),
+    ("order 12345678901234 is not a phone", None),
+    ("ref A5551234567", None),
+])
+def test_phone_boundaries(text, phone):
+    assert extract_phone(text) == phone
+
+def test_find_all_reports_spans_in_order():
+    text = "Acme Corp, 555-123-4567, a@b.io"
+    matches = contact_extractor.find_all(text)
+    assert [match.kind for match in matches] == ["company", "phone", "email"]
+    assert all(text[match.start:match.end] == match.value for match in matches)
+
+@pytest.mark.parametrize("name", sorted(ADVERSARIAL))
+def test_adversarial_input_scans_in_linear_time(name):
+    # The original patterns took seconds here; a linear scan takes milliseconds
+    started = time.perf_counter()
+    extract_contacts(ADVERSARIAL[name](64000))
+    assert time.perf_counter() - started < 1.0
@@ -0,0 +1,66 @@
+import asyncio
+import runpy
+import pytest
+import config as config_module
+from config import config
+from routes.process import build_call_pipeline
+from services import digest
+from services.digest import DigestService
+from utils.tokens import count_tokens
+
+@pytest.fixture
+def small_digest(monkeypatch):
+    monkeypatch.setattr(config, "CLAUDE_API_KEY", "test")
+    monkeypatch.setattr(config, "DIGEST_THRESHOLD_TOKENS", 200)
+    monkeypatch.setattr(config, "DIGEST_CHUNK_TOKENS", 100)
+    monkeypatch.setattr(config, "DIGEST_CHUNK_OVERLAP_TOKENS", 0)
+
+# About 9,000 spoken words; the calls the digest is for
+HOUR_LONG_CALL_TOKENS = 10000
+
+TRANSCRIPT = " ".join(f"sentence {i} about the budget." for i in range(200))
+
+def test_short_transcripts_pass_through(small_digest):
+    assert asyncio.run(DigestService().prepare("We need pricing.")) == "We need pricing."
+
+def test_chunk_notes_are_joined(small_digest, monkeypatch):
+    async def complete(stage, max_tokens, text, part, parts):
+        return f"note {part}/{parts}"
+
+    monkeypatch.setattr(digest, "complete", complete)
+    result = asyncio.run(DigestService().prepare(TRANSCRIPT))
+    assert result.startswith("note 1/") and count_tokens(result) <= config.DIGEST_THRESHOLD_TOKENS
+
+def test_failed_chunk_cancels_the_rest_and_truncates(small_digest, monkeypatch):
+    cancelled = []
+
+    async def complete(stage, max_tokens, text, part, parts):
+        if part == 1:
+            raise RuntimeError("overloaded")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(part)
+            raise
+
+    monkeypatch.setattr(digest, "complete", complete)
+    async def prepare():
+        result = await asyncio.wait_for(DigestService().prepare(TRANSCRIPT), 5)
+        # Checked before asyncio.run cancels whatever is still pending
+        return result, list(cancelled)
+
+    result, cancelled_before_return = asyncio.run(prepare())
+    assert result.startswith("sentence 0") and count_tokens(result) <= config.DIGEST_THRESHOLD_TOKENS
+    assert cancelled_before_return
+
+def test_default_threshold_digests_hour_long_calls_within_the_token_quota(monkeypatch):
+    for name in ("DIGEST_THRESHOLD_TOKENS", "DIGEST_CHUNK_TOKENS", "CLAUDE_TPM", "EXTRACTION_MODE"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr("dotenv.load_dotenv", lambda *args, **kwargs: None)
+    defaults = runpy.run_path(config_module.__file__)["Config"]
+    monkeypatch.setattr(config, "EXTRACTION_MODE", defaults.EXTRACTION_MODE)
+    readers = [stage for stage in build_call_pipeline("call.wav").stages.values() if "digest" in stage.depends_on]
+
+    assert defaults.DIGEST_CHUNK_TOKENS < defaults.DIGEST_THRESHOLD_TOKENS < HOUR_LONG_CALL_TOKENS
+    # The prompts of one call fit one minute's quota, so none waits for a full refill
+    assert len(readers) * defaults.DIGEST_THRESHOLD_TOKENS < defaults.CLAUDE_TPM
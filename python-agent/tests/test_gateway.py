@@ -0,0 +1,161 @@
+import asyncio
+import pytest
+from services.gateway import CircuitBreaker, ProviderGateway, ProviderUnavailableError, retry_after
+
+class Response:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+class ProviderError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = Response(headers)
+
+def make_gateway(max_retries=3, threshold=3, reset_seconds=30.0):
+    return ProviderGateway("test", rpm=0, tpm=0, max_retries=max_retries, base_delay=0.001,
+                           max_delay=0.01, breaker=CircuitBreaker(threshold, reset_seconds))
+
+def provider(*outcomes):
+    """A call that raises or returns each outcome in turn, counting attempts"""
+    calls = []
+
+    async def call():
+        outcome = outcomes[len(calls)]
+        calls.append(outcome)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return call, calls
+
+def reopen_later(breaker):
+    """Move the breaker's clock past reset_seconds"""
+    breaker.opened_at -= breaker.reset_seconds
+
+def test_transient_failures_are_retried():
+    gateway = make_gateway(threshold=10)
+    call, calls = provider(ProviderError(529), ProviderError(429, {"retry-after-ms": "1"}), "ok")
+    assert asyncio.run(gateway.call(call)) == "ok"
+    assert len(calls) == 3 and gateway.retries == 2
+    assert gateway.breaker.state == "closed" and gateway.breaker.failures == 0
+
+def test_client_errors_are_not_retried_and_do_not_trip_the_breaker():
+    gateway = make_gateway(threshold=1)
+    call, calls = provider(ProviderError(400))
+    with pytest.raises(ProviderError):
+        asyncio.run(gateway.call(call))
+    assert len(calls) == 1 and gateway.breaker.state == "closed"
+
+def test_gives_up_after_max_retries():
+    gateway = make_gateway(max_retries=2, threshold=10)
+    call, calls = provider(*[ProviderError(503)] * 3)
+    with pytest.raises(ProviderError):
+        asyncio.run(gateway.call(call))
+    assert len(calls) == 3 and gateway.breaker.failures == 3
+
+def test_open_breaker_fails_fast():
+    gateway = make_gateway(max_retries=5, threshold=2)
+    call, calls = provider(*[ProviderError(500)] * 6)
+    with pytest.raises(ProviderUnavailableError):
+        asyncio.run(gateway.call(call))
+    assert len(calls) == 2 and gateway.breaker.state == "open"
+    with pytest.raises(ProviderUnavailableError):
+        asyncio.run(gateway.call(call))
+    assert len(calls) == 2
+
+def test_half_open_trial_closes_or_reopens_the_breaker():
+    breaker = CircuitBreaker(threshold=1, reset_seconds=30.0)
+    breaker.record_failure()
+    reopen_later(breaker)
+    assert breaker.state == "half_open"
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    reopen_later(breaker)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+def test_cancelled_trial_frees_the_half_open_slot():
+    gateway = make_gateway(max_retries=0, threshold=1)
+    gateway.breaker.record_failure()
+    reopen_later(gateway.breaker)
+
+    async def run():
+        task = asyncio.create_task(gateway.call(lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return gateway.breaker.allow()
+
+    assert asyncio.run(run())
+    assert gateway.breaker.state == "half_open"
+
+def test_retry_after_headers():
+    assert retry_after(ProviderError(429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after(ProviderError(429, {"retry-after": "2"})) == 2.0
+    assert retry_after(ProviderError(429, {"retry-after": "Wed, 21 Oct 2026 07:28:00 GMT"})) is None
+    assert retry_after(ValueError()) is None
+
+def test_retry_after_over_the_limit_is_not_cut_short():
+    gateway = make_gateway(threshold=10)
+    call, calls = provider(ProviderError(429, {"retry-after": "120"}), "ok")
+    with pytest.raises(ProviderError):
+        asyncio.run(gateway.call(call))
+    assert len(calls) == 1 and gateway.retries == 0
+
+def test_open_breaker_reaches_the_caller_instead_of_a_fallback(monkeypatch):
+    from config import config
+    from services import digest, intent, llm
+    from services.digest import DigestService
+    from services.intent import IntentService
+    from services.llm import LLMService
+
+    async def unavailable(*args, **kwargs):
+        raise ProviderUnavailableError("anthropic circuit breaker is open")
+
+    monkeypatch.setattr(config, "CLAUDE_API_KEY", "test")
+    monkeypatch.setattr(config, "DIGEST_THRESHOLD_TOKENS", 10)
+    for module in (llm, intent, digest):
+        monkeypatch.setattr(module, "complete", unavailable)
+    monkeypatch.setattr(llm, "complete_tool", unavailable)
+    monkeypatch.setattr(intent, "first_pass", lambda head, text: (None, False))
+    monkeypatch.setattr(llm, "first_pass", lambda head, text: (None, False))
+
+    service = LLMService()
+    calls = [
+        service.extract_requirements("text"),
+        service.extract_lead_info("text"),
+        service.generate_email_response("text", {}),
+        service.suggest_next_step("text", {}),
+        service.extract_all("text", {}),
+        IntentService().detect_intent("text"),
+        DigestService().prepare("a long transcript " * 50),
+    ]
+    for call in calls:
+        with pytest.raises(ProviderUnavailableError):
+            asyncio.run(call)
+
+def test_process_email_answers_503_while_claude_is_unavailable(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from config import config
+    from routes import process
+    from services.container import container
+
+    class Unavailable:
+        async def detect_intent(self, text):
+            raise ProviderUnavailableError("anthropic circuit breaker is open")
+
+        extract_requirements = detect_intent
+
+    monkeypatch.setattr(config, "SIMILARITY_ENABLED", False)
+    monkeypatch.setitem(container.__dict__, "intent", Unavailable())
+    monkeypatch.setitem(container.__dict__, "llm", Unavailable())
+    app = FastAPI()
+    app.include_router(process.router, prefix="/ai")
+    response = TestClient(app).post("/ai/process-email", json={"email_body": "Pricing?", "from_email": "a@x.com"})
+    assert response.status_code == 503 and "Retry-After" in response.headers
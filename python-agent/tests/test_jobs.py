@@ -0,0 +1,132 @@
+import asyncio
+import os
+import time
+import pytest
+from config import config
+from services import jobs
+from services.jobs import InvalidWebhookError, JobQueue, JobStore, check_webhook_url
+
+def make_job(job_id, priority=0, webhook_url=None):
+    return {"id": job_id, "kind": "call", "priority": priority, "payload": {"n": job_id},
+            "webhook_url": webhook_url, "created_at": time.time()}
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    yield store
+    store.close()
+
+def test_only_one_worker_claims_a_job(store, tmp_path):
+    other = JobStore(str(tmp_path / "jobs.db"))
+
+    async def run():
+        await store.insert(make_job("a"))
+        return await asyncio.gather(store.claim("a"), other.claim("a"), store.claim("a"))
+
+    assert sorted(asyncio.run(run())) == [False, False, True]
+    other.close()
+
+def test_jobs_of_dead_workers_are_requeued_by_priority(store, monkeypatch):
+    async def run():
+        for job_id, priority in (("low", 0), ("high", 5), ("live", 1)):
+            await store.insert(make_job(job_id, priority))
+        await store.claim("low")
+        await store.claim("live")
+        store._update("UPDATE jobs SET owner = 999999999 WHERE id = 'low'")
+        store._update("UPDATE jobs SET owner = ? WHERE id = 'live'", (os.getppid(),))
+        return [job["id"] for job in await store.unfinished()]
+
+    assert asyncio.run(run()) == ["high", "low"]
+
+def test_finished_jobs_expire(store):
+    queue = JobQueue(store, workers=1, max_pending=10, retention_seconds=60)
+
+    async def run():
+        for job_id in ("old", "new", "queued"):
+            await store.insert(make_job(job_id))
+        await store.mark_finished("old", result={})
+        await store.mark_finished("new", error="boom")
+        store._update("UPDATE jobs SET finished_at = ? WHERE id = 'old'", (time.time() - 120,))
+        deleted = await queue.delete_expired()
+        return deleted, [await store.get(job_id) is not None for job_id in ("old", "new", "queued")]
+
+    assert asyncio.run(run()) == (1, [False, True, True])
+
+def test_queue_runs_submitted_jobs(store, monkeypatch):
+    monkeypatch.setattr(config, "JOB_WEBHOOK_ALLOW_PRIVATE", False)
+    queue = JobQueue(store, workers=2, max_pending=10)
+
+    async def handler(payload):
+        return {"double": payload["n"] * 2}
+
+    queue.register("call", handler)
+
+    async def run():
+        await queue.start()
+        job = await queue.submit("call", {"n": 21})
+        with pytest.raises(InvalidWebhookError):
+            await queue.submit("call", {"n": 1}, webhook_url="http://127.0.0.1:9000/hook")
+        await queue._queue.join()
+        finished = await store.get(job["id"])
+        await queue.stop()
+        return finished
+
+    finished = asyncio.run(run())
+    assert finished["status"] == "completed" and finished["result"] == {"double": 42}
+
+@pytest.mark.parametrize("url", [
+    "ftp://example.com/hook", "file:///etc/passwd", "http:///hook",
+    "http://127.0.0.1/hook", "http://localhost:8000/hook", "http://10.0.0.5/hook",
+    "http://169.254.169.254/latest/meta-data", "http://[::1]/hook", "http://[::ffff:192.168.1.1]/hook",
+])
+def test_private_or_non_http_webhooks_are_refused(url, monkeypatch):
+    monkeypatch.setattr(config, "JOB_WEBHOOK_ALLOW_PRIVATE", False)
+    with pytest.raises(InvalidWebhookError):
+        asyncio.run(check_webhook_url(url))
+
+def test_public_and_allowed_private_webhooks_pass(monkeypatch):
+    monkeypatch.setattr(config, "JOB_WEBHOOK_ALLOW_PRIVATE", False)
+    asyncio.run(check_webhook_url("https://93.184.216.34:8443/hook"))
+    monkeypatch.setattr(config, "JOB_WEBHOOK_ALLOW_PRIVATE", True)
+    asyncio.run(check_webhook_url("http://10.0.0.5/hook"))
+    with pytest.raises(InvalidWebhookError):
+        asyncio.run(check_webhook_url("gopher://10.0.0.5/hook"))
+
+def test_notify_rechecks_the_webhook(monkeypatch):
+    monkeypatch.setattr(config, "JOB_WEBHOOK_ALLOW_PRIVATE", False)
+
+    class Client:
+        posts = []
+
+        async def post(self, url, **kwargs):
+            self.posts.append(url)
+
+            class Response:
+                status_code = 200
+            return Response()
+
+    monkeypatch.setattr(jobs.providers, "_http_client", Client())
+    queue = JobQueue(JobStore(":memory:"), workers=1, max_pending=1)
+    asyncio.run(queue._notify(make_job("a", webhook_url="http://127.0.0.1/hook"), {}, None))
+    asyncio.run(queue._notify(make_job("b", webhook_url="https://93.184.216.34/hook"), {}, None))
+    assert Client.posts == ["https://93.184.216.34/hook"]
+
+def test_queue_limit_is_shared_by_processes_using_the_store(store, tmp_path):
+    other = JobStore(str(tmp_path / "jobs.db"))
+    queue = JobQueue(store, workers=0, max_pending=2)
+    queue.register("call", lambda payload: None)
+
+    async def run():
+        await queue.start()
+        # Another worker process queued one job in the same database
+        assert await other.insert(make_job("elsewhere"), max_queued=2)
+        await queue.submit("call", {"n": 1})
+        with pytest.raises(jobs.QueueFullError):
+            await queue.submit("call", {"n": 2})
+        assert not await other.insert(make_job("late"), max_queued=2)
+        queued = await queue.queued()
+        await queue.stop()
+        return queued, queue.pending
+
+    assert asyncio.run(run()) == (2, 1)
+    other.close()
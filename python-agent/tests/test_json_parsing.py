@@ -0,0 +1,29 @@
+import json
+import pytest
+from benchmarks.bench_json_parsing import FIXTURES, _parse_new
+from services.schemas import IntentResult, LeadInfo, Requirements
+from utils.json_parsing import find_json, parse_response
+
+with open(FIXTURES) as f:
+    CASES = [json.loads(line) for line in f if line.strip()]
+
+@pytest.mark.parametrize("fixture", CASES, ids=[f"{case['stage']}: {case['case']}" for case in CASES])
+def test_fixtures(fixture):
+    assert _parse_new(fixture["stage"], fixture["response"]) == fixture["expected"]
+
+def test_fenced_json_skips_the_scanner(monkeypatch):
+    monkeypatch.setattr("utils.json_parsing.find_json", lambda *args: pytest.fail("scanned"))
+    result = parse_response("detect_intent", '```json\n{"intent": "sales_inquiry", "confidence": 2}\n```', IntentResult)
+    assert result == IntentResult(intent="sales_inquiry", confidence=1.0)
+    assert parse_response("extract_requirements", " [\"SSO\"] ", Requirements).root == ["SSO"]
+
+def test_intent_normalization():
+    assert parse_response("detect_intent", '{"intent": "refund"}', IntentResult) == IntentResult(intent="general_inquiry", confidence=0.5)
+    assert parse_response("detect_intent", '{"intent": null, "confidence": null}', IntentResult).confidence == 0.5
+
+def test_find_json_respects_strings_and_reports_truncation():
+    text = 'Note {x} "}" then {"a": "]}", "b": [1, {"c": 2'
+    assert find_json(text).end == text.index("}") + 1
+    span = find_json(text, text.index('{"a"'))
+    assert not span.complete and span.closers == "}]}"
+    assert parse_response("extract_lead_info", "no json here", LeadInfo) is None
@@ -0,0 +1,47 @@
+import random
+from utils.keywords import KeywordMatcher
+
+MATCHER = KeywordMatcher({
+    "budget": ["budget", "price", "$", "looking for"],
+    "timeline": ["week", "soon", "asap"],
+    "pain": ["need", "issue", "looking"],
+})
+
+def test_words_match_on_boundaries_with_inflections():
+    assert MATCHER.categories_in("We needed it in two weeks") == {"pain", "timeline"}
+    assert MATCHER.categories_in("Pricing is fine") == set()
+    assert MATCHER.categories_in("the weekend is reissued") == set()
+
+def test_phrases_and_symbols():
+    assert MATCHER.categories_in("We are LOOKING\n  FOR a quote") == {"budget", "pain"}
+    assert MATCHER.categories_in("about $500") == {"budget"}
+    assert MATCHER.first_category("asap, and the price is $5") == "budget"
+    assert MATCHER.first_category("nothing here") is None
+
+def test_matches_per_category_patterns():
+    vocabulary = ["budget", "budgets", "priced", "price", "$", "weekly", "week", "weeks", "soon", "asap",
+                  "needing", "need", "issues", "looking", "for", "lookingfor", "the", "a", "us"]
+    rng = random.Random(3)
+    for _ in range(300):
+        text = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(0, 8)))
+        expected = {name for name in MATCHER.categories if MATCHER.category_pattern(name).search(text)}
+        assert MATCHER.categories_in(text) == expected, text
+
+def test_find_returns_spans_in_text_order():
+    text = "ASAP please: we are Looking  for a $ price"
+    spans = MATCHER.find(text)
+    assert [(name, text[start:end]) for name, start, end in spans] == [
+        ("timeline", "ASAP"), ("budget", "Looking  for"), ("pain", "Looking  for"), ("budget", "$"), ("budget", "price"),
+    ]
+    assert MATCHER.find("nothing here") == []
+
+def test_find_keeps_offsets_when_lowercasing_changes_length():
+    text = "İstanbul team needs a budget"
+    assert [(name, text[start:end]) for name, start, end in MATCHER.find(text)] == [("pain", "needs"), ("budget", "budget")]
+
+def test_find_agrees_with_categories_in():
+    rng = random.Random(5)
+    words = ["budget", "weeks", "soon", "needing", "looking", "for", "$", "the", "answer", "we"]
+    for _ in range(200):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(0, 10)))
+        assert {name for name, _, _ in MATCHER.find(text)} == MATCHER.categories_in(text), text
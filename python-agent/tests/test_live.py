@@ -0,0 +1,37 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from routes import live
+from services.live_scoring import LiveCallScorer
+
+def make_client():
+    app = FastAPI()
+    app.include_router(live.router, prefix="/ai")
+    return TestClient(app)
+
+def test_scores_fragments_and_finishes():
+    with make_client().websocket_connect("/ai/live-call") as websocket:
+        websocket.send_json({"type": "text", "text": "Our budget is set and we need it this quarter"})
+        assert websocket.receive_json()["type"] in ("tier_changed", "score")
+        websocket.send_json({"type": "end"})
+        events = []
+        while not events or events[-1]["type"] != "final":
+            events.append(websocket.receive_json())
+        assert "this quarter" in events[-1]["transcript"]
+
+def test_worker_failure_closes_with_an_error(monkeypatch):
+    class FailingScorer(LiveCallScorer):
+        def feed(self, fragment):
+            raise RuntimeError("scorer broke")
+
+    monkeypatch.setattr(live, "LiveCallScorer", FailingScorer)
+    monkeypatch.setattr(live, "MAX_QUEUED_FRAGMENTS", 1)
+    with make_client().websocket_connect("/ai/live-call") as websocket:
+        # More fragments than the queue holds: the receive loop must not block on put
+        for index in range(5):
+            websocket.send_json({"type": "text", "text": f"fragment {index}"})
+        assert websocket.receive_json() == {"type": "error", "detail": "Live scoring failed: scorer broke"}
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+        assert closed.value.code == 1011
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import numpy as np
+import pytest
+from config import config
+from services import intent as intent_module
+from services.container import container
+from services.intent import IntentService
+from services.local_classifier import LocalClassifier, train
+from services.routing import first_pass
+
+TEMPLATES = {
+    "sales_inquiry": ["how much does the {} plan cost", "can we buy {} seats, send pricing"],
+    "technical_question": ["how do we integrate the {} api", "the {} webhook setup returns an error"],
+    "performance_query": ["what were the {} metrics last month", "how is the {} campaign doing"],
+    "general_inquiry": ["thanks for the {} call yesterday", "who should I talk to about {}"],
+}
+NEXT_STEPS = {"sales_inquiry": "send_proposal", "technical_question": "send_information",
+              "performance_query": "follow_up_call", "general_inquiry": "follow_up_call"}
+
+def records():
+    rng = np.random.default_rng(1)
+    words = ["team", "enterprise", "starter", "billing", "search", "mobile", "q3", "partner"]
+    return [
+        {"text": template.format(rng.choice(words)), "intent": label, "next_step": NEXT_STEPS[label]}
+        for label, templates in TEMPLATES.items() for template in templates for _ in range(15)
+    ]
+
+@pytest.fixture(scope="module")
+def classifier():
+    return train(records(), epochs=20)
+
+@pytest.fixture
+def artifact(classifier, tmp_path, monkeypatch):
+    path = str(tmp_path / "classifier.npz")
+    classifier.save(path)
+    monkeypatch.setattr(config, "LOCAL_CLASSIFIER_PATH", path)
+    monkeypatch.delitem(container.__dict__, "classifier", raising=False)
+    return path
+
+def test_saved_artifact_loads_with_the_same_predictions(classifier, artifact):
+    loaded = LocalClassifier.load(artifact)
+    assert loaded.version == classifier.version
+    assert set(loaded.metadata["heads"]) == {"intent", "next_step"}
+    for text in ("how much does the team plan cost", "how do we integrate the search api"):
+        assert loaded.predict("intent", text) == classifier.predict("intent", text)
+    assert loaded.predict("intent", "how much does the team plan cost").label == "sales_inquiry"
+    assert loaded.predict("missing_head", "text") is None
+
+def test_container_skips_a_missing_or_outdated_artifact(classifier, artifact, tmp_path, monkeypatch):
+    assert container.classifier.version == classifier.version
+
+    outdated = LocalClassifier(classifier.idf, classifier.weights, classifier.biases, {**classifier.metadata, "format": 0})
+    outdated.save(str(tmp_path / "old.npz"))
+    for path in (str(tmp_path / "old.npz"), str(tmp_path / "absent.npz")):
+        monkeypatch.setattr(config, "LOCAL_CLASSIFIER_PATH", path)
+        monkeypatch.delitem(container.__dict__, "classifier")
+        assert container.classifier is None
+        assert first_pass("intent", "how much does it cost") == (None, False)
+
+def test_first_pass_answers_only_above_the_confidence_gate(artifact, monkeypatch):
+    text = "how much does the team plan cost"
+    confidence = container.classifier.predict("intent", text).confidence
+    monkeypatch.setattr(config, "LOCAL_CLASSIFIER_CONFIDENCE", confidence)
+    assert first_pass("intent", text)[1] is True
+    monkeypatch.setattr(config, "LOCAL_CLASSIFIER_CONFIDENCE", min(confidence + 0.01, 1.01))
+    prediction, confident = first_pass("intent", text)
+    assert prediction.label == "sales_inquiry" and confident is False
+
+def test_unconfident_prediction_falls_back_to_claude(artifact, monkeypatch):
+    asked = []
+
+    async def complete(stage, max_tokens, text, model=None, parse=None, **fields):
+        asked.append(stage)
+        return parse(json.dumps({"intent": "technical_question", "confidence": 0.8}))
+
+    monkeypatch.setattr(intent_module, "complete", complete)
+    monkeypatch.setattr(config, "CLAUDE_API_KEY", "test-key")
+    text = "how much does the team plan cost"
+
+    monkeypatch.setattr(config, "LOCAL_CLASSIFIER_CONFIDENCE", 0.0)
+    assert asyncio.run(IntentService().detect_intent(text))["intent"] == "sales_inquiry"
+    assert asked == []
+
+    monkeypatch.setattr(config, "LOCAL_CLASSIFIER_CONFIDENCE", 1.01)
+    assert asyncio.run(IntentService().detect_intent(text)) == {"intent": "technical_question", "confidence": 0.8}
+    assert asked == ["detect_intent"]
@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from utils.metrics import Counter, Gauge, Histogram, Registry, reset_shared_metrics
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = Registry()
+    registry.requests = registry.register(Counter("requests_total", "Requests", ["route"]))
+    registry.sessions = registry.register(Gauge("sessions", "Open sessions"))
+    registry.latency = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)))
+    yield registry
+    registry.unshare()
+
+def other_worker(directory, pid, requests, sessions, latency_counts):
+    with open(os.path.join(directory, f"{pid}.json"), "w") as f:
+        json.dump({
+            "requests_total": [[["/health"], requests]],
+            "sessions": [[[], sessions]],
+            "latency_seconds": [[[], latency_counts, 0.5 * sum(latency_counts)]],
+        }, f)
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+def test_single_process_render_is_unchanged(registry):
+    registry.requests.inc(route="/health")
+    assert 'requests_total{route="/health"} 1' in registry.render()
+
+def test_shared_render_sums_every_worker(registry, tmp_path):
+    registry.share(str(tmp_path), flush_seconds=60)
+    registry.requests.inc(2, route="/health")
+    registry.sessions.set(1)
+    registry.latency.observe(0.05)
+    other_worker(tmp_path, os.getppid(), 3, 2, [1, 1, 0])
+
+    text = registry.render()
+    assert 'requests_total{route="/health"} 5' in text
+    assert "sessions 3" in text
+    assert 'latency_seconds_bucket{le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{le="1"} 3' in text
+    assert "latency_seconds_count 3" in text
+    # The live registry itself is untouched by merging
+    assert registry.requests.value(route="/health") == 2
+
+def test_exited_workers_keep_counters_but_not_gauges(registry, tmp_path):
+    registry.share(str(tmp_path), flush_seconds=60)
+    other_worker(tmp_path, exited_pid(), 4, 7, [0, 0, 1])
+
+    text = registry.render()
+    assert 'requests_total{route="/health"} 4' in text
+    assert "latency_seconds_count 1" in text
+    assert "sessions 7" not in text
+
+def test_unshare_writes_a_last_snapshot(registry, tmp_path):
+    registry.share(str(tmp_path), flush_seconds=60)
+    registry.requests.inc(route="/jobs")
+    registry.unshare()
+    with open(tmp_path / f"{os.getpid()}.json") as f:
+        assert json.load(f)["requests_total"] == [[["/jobs"], 1.0]]
+
+def test_reset_removes_old_snapshots(tmp_path):
+    other_worker(tmp_path, 12345, 1, 1, [1, 0, 0])
+    reset_shared_metrics(str(tmp_path))
+    assert os.listdir(tmp_path) == []
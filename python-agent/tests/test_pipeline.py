@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from utils.pipeline import StagePipeline, gather_or_cancel
+
+def test_gather_or_cancel_returns_results_in_order():
+    async def value(result, delay):
+        await asyncio.sleep(delay)
+        return result
+
+    assert asyncio.run(gather_or_cancel(value("a", 0.02), value("b", 0), value("c", 0.01))) == ["a", "b", "c"]
+    assert asyncio.run(gather_or_cancel()) == []
+
+def test_gather_or_cancel_cancels_the_rest_on_the_first_failure():
+    cancelled = []
+
+    async def slow(name):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(name)
+            raise
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise KeyError("boom")
+
+    async def run():
+        with pytest.raises(KeyError):
+            await asyncio.wait_for(gather_or_cancel(slow("a"), fail(), slow("b")), 5)
+        # Already cancelled and awaited by the time the error is raised
+        return sorted(cancelled)
+
+    assert asyncio.run(run()) == ["a", "b"]
+
+def test_gather_or_cancel_cancels_its_tasks_when_cancelled():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        outer = asyncio.create_task(gather_or_cancel(slow(), slow()))
+        await asyncio.sleep(0.01)
+        outer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await outer
+        return len(cancelled)
+
+    assert asyncio.run(run()) == 2
+
+def test_stages_get_their_dependencies_results_in_order():
+    order = []
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        order.append("fetch")
+        return 2
+
+    def double(fetch):
+        order.append("double")
+        return fetch * 2
+
+    async def total(fetch, double):
+        order.append("total")
+        return fetch + double
+
+    completed = []
+    pipeline = StagePipeline().add("fetch", fetch).add("double", double, ["fetch"]).add("total", total, ["fetch", "double"])
+    results, timings = asyncio.run(pipeline.run(on_stage_complete=lambda name, result, ms: completed.append((name, result))))
+    assert results == {"fetch": 2, "double": 4, "total": 6}
+    assert order == ["fetch", "double", "total"]
+    assert completed == [("fetch", 2), ("double", 4), ("total", 6)]
+    assert set(timings) == {"fetch", "double", "total"}
+
+def test_independent_stages_run_concurrently():
+    running, overlap = set(), []
+
+    async def stage(name):
+        running.add(name)
+        await asyncio.sleep(0.05)
+        overlap.append(set(running))
+        running.discard(name)
+        return name
+
+    pipeline = StagePipeline()
+    for name in ("a", "b", "c"):
+        pipeline.add(name, lambda name=name: stage(name))
+    pipeline.add("joined", lambda a, b, c: a + b + c, ["a", "b", "c"])
+    results, _ = asyncio.run(pipeline.run())
+    assert results["joined"] == "abc"
+    # All three were in flight before the first one finished
+    assert overlap[0] == {"a", "b", "c"}
+
+def test_unknown_self_and_duplicate_dependencies_are_rejected():
+    pipeline = StagePipeline().add("a", lambda: 1)
+    with pytest.raises(ValueError, match="unknown stage 'missing'"):
+        pipeline.add("b", lambda missing: 1, ["missing"])
+    # A stage can only depend on stages registered before it, so a cycle cannot be built
+    with pytest.raises(ValueError, match="unknown stage 'c'"):
+        pipeline.add("c", lambda c: 1, ["c"])
+    with pytest.raises(ValueError, match="Duplicate stage: a"):
+        pipeline.add("a", lambda: 2)
+    assert list(pipeline.stages) == ["a"]
+
+def test_a_failing_stage_cancels_the_rest():
+    ran, cancelled = [], []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    pipeline = StagePipeline().add("slow", slow).add("fail", fail).add("after", lambda fail: ran.append("after"), ["fail"])
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(asyncio.wait_for(pipeline.run(), 5))
+    assert (ran, cancelled) == ([], ["slow"])
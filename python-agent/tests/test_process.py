@@ -0,0 +1,123 @@
+import asyncio
+import json
+import pytest
+from config import config
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routes import process as process_routes
+from services.container import container
+
+class StubIntent:
+    def __init__(self):
+        self.bodies = []
+
+    async def detect_intent(self, text):
+        self.bodies.append(text)
+        # Later items finish first, so ordering has to be restored
+        await asyncio.sleep(0.02 if "first" in text else 0)
+        if "explode" in text:
+            raise RuntimeError("intent model failed")
+        return {"intent": "sales_inquiry", "confidence": 0.9}
+
+class StubLLM:
+    async def extract_requirements(self, text):
+        return ["API integration"]
+
+    async def generate_email_response(self, email_body, lead_info):
+        return f"Hello {lead_info['name']}"
+
+    async def stream_email_response(self, email_body, lead_info):
+        for delta in ("Hello ", lead_info["name"]):
+            yield delta
+
+class StubAnalysis:
+    def score_lead(self, transcript, email_body=""):
+        return {"score": 60, "tier": "warm", "factors": {}}
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(config, "SIMILARITY_ENABLED", False)
+    monkeypatch.setitem(container.__dict__, "intent", StubIntent())
+    monkeypatch.setitem(container.__dict__, "llm", StubLLM())
+    monkeypatch.setitem(container.__dict__, "analysis", StubAnalysis())
+    app = FastAPI()
+    app.include_router(process_routes.router, prefix="/ai")
+    return TestClient(app)
+
+def sse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_email_stream_sends_stages_then_done(client):
+    response = client.post("/ai/process-email/stream", json={"email_body": "Need pricing", "from_email": "ann@x.com"})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = sse_events(response.text)
+    names = [name for name, _ in events]
+
+    assert sorted(names[:3]) == ["intent", "lead_analysis", "requirements"]
+    assert names[3:] == ["email_delta", "email_delta", "email_response", "done"]
+    assert [data["text"] for name, data in events if name == "email_delta"] == ["Hello ", "ann"]
+    assert events[0][1]["elapsed_ms"] >= 0
+    done = events[-1][1]
+    assert (done["sender"], done["intent"], done["suggested_response"]) == ("ann@x.com", "sales_inquiry", "Hello ann")
+
+def test_email_stream_ends_with_an_error_event(client):
+    response = client.post("/ai/process-email/stream", json={"email_body": "explode", "from_email": "ann@x.com"})
+    name, data = sse_events(response.text)[-1]
+    assert name == "error" and "intent model failed" in data["detail"]
+
+def batch_lines(response):
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+def without_timings(lines):
+    return [{**line, "result": {k: v for k, v in line["result"].items() if k != "stage_timings"}} for line in lines]
+
+def test_batch_results_come_back_in_input_order(client):
+    items = [{"email_body": f"{word} email", "from_email": f"{word}@x.com"} for word in ("first", "second", "third")]
+    lines = batch_lines(client.post("/ai/process-emails/batch", json=items))
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert [line["result"]["sender"] for line in lines] == ["first@x.com", "second@x.com", "third@x.com"]
+
+def test_batch_runs_identical_emails_once(client):
+    items = [
+        {"email_body": "Need  pricing", "from_email": "ann@x.com"},
+        {"email_body": "Need pricing", "from_email": "bob@x.com"},
+        {"email_body": " Need pricing\n", "from_email": "ANN@x.com"},
+    ]
+    lines = batch_lines(client.post("/ai/process-emails/batch", json={"items": items}))
+    assert "duplicate_of" not in lines[0] and "duplicate_of" not in lines[1]
+    assert lines[2]["duplicate_of"] == 0 and lines[2]["result"] == lines[0]["result"]
+    assert len(container.intent.bodies) == 2
+
+def test_batch_accepts_ndjson_and_json_list_alike(client):
+    items = [{"email_body": "Need pricing", "from_email": "ann@x.com"}, {"email_body": "Demo?", "from_email": "bob@x.com"}]
+    from_list = batch_lines(client.post("/ai/process-emails/batch", json=items))
+    ndjson = "\n".join(json.dumps(item) for item in items) + "\n\n"
+    from_ndjson = batch_lines(client.post("/ai/process-emails/batch", content=ndjson,
+                                          headers={"content-type": "application/x-ndjson"}))
+    assert without_timings(from_ndjson) == without_timings(from_list)
+
+def test_batch_item_errors_do_not_fail_the_batch(client):
+    ndjson = "\n".join([
+        json.dumps({"email_body": "Need pricing", "from_email": "ann@x.com"}),
+        "{not json",
+        json.dumps({"email_body": "missing sender"}),
+        json.dumps({"email_body": "explode", "from_email": "bob@x.com"}),
+        json.dumps({"email_body": "Demo?", "from_email": "cy@x.com"}),
+    ])
+    lines = batch_lines(client.post("/ai/process-emails/batch", content=ndjson,
+                                     headers={"content-type": "application/x-ndjson"}))
+    assert [line["index"] for line in lines] == [0, 1, 2, 3, 4]
+    assert [("result" in line, "error" in line) for line in lines] == [(True, False), (False, True), (False, True),
+                                                                      (False, True), (True, False)]
+    assert lines[1]["error"].startswith("Invalid JSON line")
+    assert lines[2]["error"].startswith("Invalid email item")
+    assert "intent model failed" in lines[3]["error"]
+
+def test_batch_rejects_a_body_that_is_not_a_list(client):
+    assert client.post("/ai/process-emails/batch", json={"email_body": "x"}).status_code == 400
+    assert client.post("/ai/process-emails/batch", content="{oops", headers={"content-type": "application/json"}).status_code == 400
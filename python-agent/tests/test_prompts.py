@@ -0,0 +1,24 @@
+from config import config
+from services.prompts import CHARS_PER_TOKEN, PROMPT_CACHE_MIN_TOKENS, PROMPT_CACHE_MIN_TOKENS_HAIKU, Prompt, prompts
+
+SONNET = "claude-3-5-sonnet-20241022"
+HAIKU = "claude-3-5-haiku-20241022"
+
+def test_prompt_caching_is_off_by_default():
+    assert not config.PROMPT_CACHE_ENABLED
+    assert prompts.get("detect_intent").system_for(SONNET) == prompts.get("detect_intent").system_text
+
+def test_registered_prefixes_are_under_the_cache_minimum(monkeypatch):
+    monkeypatch.setattr(config, "PROMPT_CACHE_ENABLED", True)
+    for name in prompts.names():
+        assert not prompts.get(name).cacheable(SONNET), name
+
+def test_cache_breakpoint_only_on_long_enough_prefixes(monkeypatch):
+    monkeypatch.setattr(config, "PROMPT_CACHE_ENABLED", True)
+    long_prompt = Prompt("long", "x" * (PROMPT_CACHE_MIN_TOKENS * CHARS_PER_TOKEN), "{text}")
+    assert long_prompt.cacheable(SONNET)
+    assert long_prompt.system_for(SONNET)[-1]["cache_control"] == {"type": "ephemeral"}
+    assert not long_prompt.cacheable(HAIKU)
+    assert isinstance(long_prompt.system_for(HAIKU), str)
+    longer = Prompt("longer", "x" * (PROMPT_CACHE_MIN_TOKENS_HAIKU * CHARS_PER_TOKEN), "{text}")
+    assert longer.cacheable(HAIKU)
@@ -0,0 +1,18 @@
+from config import config
+from services.routing import ModelRouter
+
+def test_default_routes_keep_every_stage_on_the_default_model():
+    router = ModelRouter(config.MODEL_ROUTES, "big", "small", config.MODEL_ESCALATION_CONFIDENCE)
+    assert router.routes == {}
+    assert router.model_for("detect_intent") == "big"
+    assert not router.should_escalate("detect_intent", 0.1)
+
+def test_routed_stage_escalates_below_the_threshold():
+    router = ModelRouter("detect_intent=fast, extract_lead_info=custom-model", "big", "small", 0.7)
+    assert router.model_for("detect_intent") == config.CLAUDE_FAST_MODEL
+    assert router.model_for("extract_lead_info") == "custom-model"
+    assert router.model_for("suggest_next_step") == "big"
+    assert router.should_escalate("detect_intent", 0.5)
+    assert router.should_escalate("detect_intent", None)
+    assert not router.should_escalate("detect_intent", 0.9)
+    assert not router.should_escalate("suggest_next_step", 0.1)
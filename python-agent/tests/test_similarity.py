@@ -0,0 +1,128 @@
+import asyncio
+import sqlite3
+import time
+import pytest
+from config import config
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routes import process as process_routes
+from routes.process import EmailProcessRequest, build_email_pipeline, format_email_result
+from services.container import container
+from services.similarity import ABANDONED_SECONDS, SimilarityIndex
+
+BODY = "Hi, we are evaluating your platform for 40 seats. Can you send pricing and details on the API integration?"
+
+class StubIntent:
+    def __init__(self):
+        self.calls = 0
+
+    async def detect_intent(self, text):
+        self.calls += 1
+        return {"intent": "sales_inquiry", "confidence": 0.9}
+
+class StubLLM:
+    def __init__(self):
+        self.requirement_calls = 0
+        self.replies = []
+
+    async def extract_requirements(self, text):
+        self.requirement_calls += 1
+        return ["API integration", "40 seats"]
+
+    async def generate_email_response(self, email_body, lead_info):
+        self.replies.append(lead_info["email"])
+        return f"Hello {lead_info['name']}, thanks for reaching out."
+
+    async def stream_email_response(self, email_body, lead_info):
+        yield await self.generate_email_response(email_body, lead_info)
+
+class StubAnalysis:
+    def score_lead(self, transcript, email_body=""):
+        return {"score": 60, "tier": "warm", "factors": {}}
+
+@pytest.fixture
+def services(monkeypatch, tmp_path):
+    intent, llm = StubIntent(), StubLLM()
+    monkeypatch.setattr(config, "SIMILARITY_ENABLED", True)
+    monkeypatch.setitem(container.__dict__, "intent", intent)
+    monkeypatch.setitem(container.__dict__, "llm", llm)
+    monkeypatch.setitem(container.__dict__, "analysis", StubAnalysis())
+    index = SimilarityIndex(str(tmp_path), 64)
+    monkeypatch.setitem(container.__dict__, "similarity", index)
+    yield intent, llm
+    index.close()
+
+def process(body, sender):
+    request = EmailProcessRequest(email_body=body, from_email=sender)
+    results, timings = asyncio.run(build_email_pipeline(request).run())
+    return format_email_result(request, results, timings)
+
+def test_near_duplicate_reuses_analysis_but_not_the_reply(services):
+    intent, llm = services
+    first = process(BODY, "a@x.com")
+    second = process(BODY.replace(",", "").replace("?", "!"), "b@y.com")
+
+    assert first["near_duplicate_of"] is None
+    assert second["near_duplicate_of"]["id"] == 1
+    assert intent.calls == 1 and llm.requirement_calls == 1
+    assert second["intent"] == "sales_inquiry"
+    assert second["extracted_data"]["requirements"] == ["API integration", "40 seats"]
+    # The reply is written for each sender, never copied from the first
+    assert llm.replies == ["a@x.com", "b@y.com"]
+    assert second["suggested_response"] == "Hello b, thanks for reaching out."
+    assert second["sender"] == "b@y.com"
+
+def test_stored_results_leave_out_sender_and_reply(services):
+    process(BODY, "a@x.com")
+    match = asyncio.run(container.similarity.find_duplicate("email", BODY, 0.9))
+    assert set(match["result"]) == {"intent", "requirements"}
+    assert "a@x.com" not in str(match["result"])
+
+def test_stream_never_shows_the_earlier_sender(services):
+    process(BODY, "alice@secret-corp.com")
+    app = FastAPI()
+    app.include_router(process_routes.router, prefix="/ai")
+    response = TestClient(app).post("/ai/process-email/stream", json={"email_body": BODY, "from_email": "mallory@evil.com"})
+    events = [line[len("event: "):] for line in response.text.splitlines() if line.startswith("event: ")]
+    assert "secret-corp" not in response.text
+    assert not {"near_duplicate", "index", "digest"} & set(events)
+    assert events[-1] == "done" and "intent" in events
+
+def test_different_email_is_not_a_duplicate(services):
+    intent, _ = services
+    process(BODY, "a@x.com")
+    result = process("Our quarterly metrics look great, thanks for the help with the rollout.", "a@x.com")
+    assert result["near_duplicate_of"] is None
+    assert intent.calls == 2
+
+def _stuck_entry(directory, created_at):
+    """An entry whose write died before it was marked ready"""
+    db = sqlite3.connect(f"{directory}/entries.db")
+    db.execute("INSERT INTO entries (slot, kind, created_at, summary, result) VALUES (NULL, 'email', ?, '{}', '{}')",
+               (created_at,))
+    db.commit()
+    db.close()
+
+def test_entries_after_an_abandoned_write_are_picked_up(tmp_path):
+    writer = SimilarityIndex(str(tmp_path), 64)
+    asyncio.run(writer.add("email", "first email about pricing", {}, {}))
+    _stuck_entry(tmp_path, time.time() - ABANDONED_SECONDS - 1)
+    asyncio.run(writer.add("email", BODY, {}, {"intent": "x"}))
+
+    reader = SimilarityIndex(str(tmp_path), 64)
+    match = asyncio.run(reader.find_duplicate("email", BODY, 0.9))
+    assert match is not None and match["id"] == 3
+    assert reader._last_id == 3
+    writer.close()
+    reader.close()
+
+def test_entry_still_being_written_is_revisited(tmp_path):
+    writer = SimilarityIndex(str(tmp_path), 64)
+    asyncio.run(writer.add("email", "first email about pricing", {}, {}))
+    _stuck_entry(tmp_path, time.time())
+
+    reader = SimilarityIndex(str(tmp_path), 64)
+    asyncio.run(reader.search("pricing"))
+    assert reader._last_id == 1
+    writer.close()
+    reader.close()
@@ -0,0 +1,29 @@
+import json
+import subprocess
+import sys
+from benchmarks.bench_startup import AGENT_DIR, IMPORT_BUDGET_MS, LAZY_MODULES, _env
+
+# CI runners are slower and noisier than the container the budget was set on
+CI_SLACK = 3
+
+CHECK = """
+import sys, json, time
+started = time.perf_counter()
+import main
+elapsed_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({"ms": elapsed_ms, "modules": sorted({name.split(".")[0] for name in sys.modules})}))
+"""
+
+def _import_main() -> dict:
+    env = {**_env(), "CLAUDE_API_KEY": "", "OPENAI_API_KEY": ""}
+    result = subprocess.run([sys.executable, "-c", CHECK], cwd=AGENT_DIR, env=env,
+                            capture_output=True, text=True, check=True, timeout=60)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_import_main_stays_lazy_and_within_budget():
+    # Best of two runs so one cold disk cache does not fail the build
+    runs = [_import_main() for _ in range(2)]
+    eager = [name for name in LAZY_MODULES if name in runs[0]["modules"]]
+    assert eager == [], f"imported at startup, should be lazy: {eager}"
+    fastest = min(run["ms"] for run in runs)
+    assert fastest < IMPORT_BUDGET_MS * CI_SLACK, f"import main took {fastest:.0f} ms"
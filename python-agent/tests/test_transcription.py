@@ -0,0 +1,85 @@
+import asyncio
+import os
+import wave
+import numpy as np
+import pytest
+from config import config
+from services.transcription import ChunkedTranscriber, TranscriptionService
+
+def write_wav(path, seconds, sample_width, rate=8000):
+    """Noise with a short silence every second"""
+    rng = np.random.default_rng(0)
+    samples = rng.integers(-2000, 2000, int(seconds * rate))
+    samples[(np.arange(len(samples)) % rate) < rate // 10] = 0
+    raw = b"".join(int(sample).to_bytes(sample_width, "little", signed=True) for sample in samples)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(rate)
+        wav.writeframes(raw)
+    return str(path)
+
+@pytest.fixture
+def short_segments(monkeypatch):
+    monkeypatch.setattr(config, "TRANSCRIPTION_CHUNKING", True)
+    monkeypatch.setattr(config, "TRANSCRIPTION_SEGMENT_SECONDS", 3.0)
+    monkeypatch.setattr(config, "TRANSCRIPTION_OVERLAP_SECONDS", 0.2)
+    monkeypatch.setattr(config, "TRANSCRIPTION_SILENCE_SEARCH_SECONDS", 1.0)
+
+def test_16_bit_wav_is_chunked(tmp_path, short_segments):
+    path = write_wav(tmp_path / "call.wav", 10, 2)
+    assert TranscriptionService()._chunker_for(path) is not None
+
+def test_24_bit_wav_falls_back_to_one_request(tmp_path, short_segments):
+    path = write_wav(tmp_path / "call.wav", 10, 3)
+    assert TranscriptionService()._chunker_for(path) is None
+
+def test_short_and_non_wav_files_are_not_chunked(tmp_path, short_segments):
+    path = write_wav(tmp_path / "call.wav", 2, 2)
+    other = tmp_path / "call.mp3"
+    other.write_bytes(b"ID3 not a wav")
+    service = TranscriptionService()
+    assert service._chunker_for(path) is None
+    assert service._chunker_for(str(other)) is None
+
+def chunker(transcribe_segment, max_concurrency=4):
+    return ChunkedTranscriber(transcribe_segment, segment_seconds=3.0, overlap_seconds=0.2,
+                              search_seconds=1.0, max_concurrency=max_concurrency)
+
+def test_segments_are_transcribed_and_stitched_in_order(tmp_path):
+    path = write_wav(tmp_path / "call.wav", 10, 2)
+
+    async def transcribe_segment(segment_path):
+        assert os.path.exists(segment_path)
+        index = int(os.path.basename(segment_path).split("_")[1].split(".")[0])
+        await asyncio.sleep(0.01 * (5 - index))
+        return f"part{index}"
+
+    text = asyncio.run(chunker(transcribe_segment).transcribe(path))
+    assert text.split() == sorted(text.split(), key=lambda word: int(word[4:]))
+    assert [entry for entry in os.listdir(tmp_path) if entry.startswith("segments_")] == []
+
+def test_a_failed_segment_cancels_the_others_before_cleanup(tmp_path):
+    path = write_wav(tmp_path / "call.wav", 10, 2)
+    started, finished, cancelled = [], [], []
+
+    async def transcribe_segment(segment_path):
+        started.append(segment_path)
+        if len(started) == 1:
+            await asyncio.sleep(0.01)
+            raise RuntimeError("whisper failed")
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            # Cancelled while the segment file still exists
+            cancelled.append(os.path.exists(segment_path))
+            raise
+        finished.append(segment_path)
+        return "text"
+
+    with pytest.raises(RuntimeError, match="whisper failed"):
+        asyncio.run(chunker(transcribe_segment).transcribe(path))
+    assert len(started) > 1
+    assert finished == []
+    assert cancelled and all(cancelled)
+    assert [entry for entry in os.listdir(tmp_path) if entry.startswith("segments_")] == []
@@ -0,0 +1,42 @@
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from utils.uploads import MULTIPART_OVERHEAD, UploadSizeLimitMiddleware
+
+MAX_SIZE = 1000
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_size=MAX_SIZE)
+    calls = []
+
+    @app.post("/upload")
+    async def upload(audio_file: UploadFile = File(...)):
+        calls.append(audio_file.filename)
+        return {"size": len(await audio_file.read())}
+
+    return TestClient(app), calls
+
+def test_small_upload_passes():
+    client, calls = make_client()
+    response = client.post("/upload", files={"audio_file": ("call.wav", b"x" * MAX_SIZE)})
+    assert response.status_code == 200 and response.json() == {"size": MAX_SIZE}
+
+def test_declared_length_over_limit_is_rejected_before_parsing():
+    client, calls = make_client()
+    response = client.post("/upload", files={"audio_file": ("call.wav", b"x" * (MAX_SIZE + MULTIPART_OVERHEAD))})
+    assert response.status_code == 413 and calls == []
+
+def test_chunked_body_is_stopped_at_the_limit():
+    client, calls = make_client()
+    boundary = "b0undary"
+    head = (f'--{boundary}\r\nContent-Disposition: form-data; name="audio_file"; filename="call.wav"\r\n'
+            "Content-Type: audio/wav\r\n\r\n").encode()
+
+    def body():
+        yield head
+        for _ in range(200):
+            yield b"x" * 1024
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    response = client.post("/upload", content=body(), headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+    assert response.status_code == 413 and calls == []
@@ -0,0 +1,103 @@
+"""Train and evaluate the local intent/next-step classifier from stored interactions.
+
+Run from python-agent/:
+  python train_classifier.py export --output data/interactions.jsonl   # from DATABASE_URL
+  python train_classifier.py train --data data/interactions.jsonl [--output models/local_classifier.npz]
+  python train_classifier.py eval --data data/holdout.jsonl [--model models/local_classifier.npz]
+
+Training examples are Interaction rows: the content with its stored intent
+and suggestedAction. Emails are stored with "send_response" as their action,
+so only the labels of HEADS are kept and other values just drop that head.
+The artifact is written to a temporary file and renamed, so a running agent
+(which loads LOCAL_CLASSIFIER_PATH once at startup) never sees half of one.
+"""
+import argparse
+import json
+import os
+from typing import Dict, Iterator, List, Optional
+from config import config
+from services.local_classifier import HEADS, LocalClassifier, evaluate, train
+
+# Older rows use the short intent names
+INTENT_ALIASES = {"tech_question": "technical_question", "general": "general_inquiry"}
+
+def _label(head: str, value: Optional[str]) -> Optional[str]:
+    """The HEADS label a stored value stands for, or None"""
+    if not value:
+        return None
+    value = value.strip().lower()
+    if head == "intent":
+        value = INTENT_ALIASES.get(value, value)
+    if value in HEADS[head]:
+        return value
+    # suggestedAction may hold Claude's full answer, e.g. "schedule_demo - they asked for a walkthrough"
+    found = [label for label in HEADS[head] if label in value]
+    return found[0] if len(found) == 1 else None
+
+def export_interactions(database_url: str) -> Iterator[Dict]:
+    import psycopg2
+    connection = psycopg2.connect(database_url)
+    try:
+        with connection.cursor(name="interactions") as cursor:
+            cursor.execute('SELECT content, intent, "suggestedAction" FROM "Interaction" ORDER BY "createdAt"')
+            for content, intent, action in cursor:
+                record = {"text": content, "intent": _label("intent", intent),
+                          "next_step": _label("next_step", action)}
+                if content and (record["intent"] or record["next_step"]):
+                    yield record
+    finally:
+        connection.close()
+
+def load_records(path: str) -> List[Dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def print_report(report: Dict[str, Dict]):
+    for head, result in report.items():
+        print(f"{head}: {result['examples']} interactions, accuracy {result['accuracy']:.1%}")
+        for level in result["thresholds"]:
+            accuracy = "-" if level["accuracy"] is None else f"{level['accuracy']:.1%}"
+            print(f"  confidence >= {level['threshold']:.2f}: {level['coverage']:.1%} answered locally, {accuracy} correct")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write labelled interactions from the database as JSONL")
+    export.add_argument("--output", required=True)
+    export.add_argument("--database-url", default=config.DATABASE_URL)
+    fit = commands.add_parser("train", help="train on a JSONL export and save the artifact")
+    fit.add_argument("--data", required=True)
+    fit.add_argument("--output", default=config.LOCAL_CLASSIFIER_PATH or "models/local_classifier.npz")
+    fit.add_argument("--epochs", type=int, default=12)
+    fit.add_argument("--seed", type=int, default=0)
+    check = commands.add_parser("eval", help="report accuracy and coverage of an artifact on a JSONL export")
+    check.add_argument("--data", required=True)
+    check.add_argument("--model", default=config.LOCAL_CLASSIFIER_PATH or "models/local_classifier.npz")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        count = 0
+        with open(args.output, "w") as f:
+            for record in export_interactions(args.database_url):
+                f.write(json.dumps(record) + "\n")
+                count += 1
+        print(f"Exported {count} labelled interactions to {args.output}")
+    elif args.command == "train":
+        classifier = train(load_records(args.data), epochs=args.epochs, seed=args.seed)
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        # np.savez adds .npz to names without it, so the temporary name keeps the suffix
+        temporary = f"{args.output}.tmp.npz"
+        classifier.save(temporary)
+        os.replace(temporary, args.output)
+        print(f"Saved classifier {classifier.version} to {args.output}")
+        for head, info in classifier.metadata["heads"].items():
+            accuracy = info["validation_accuracy"]
+            print(f"  {head}: {info['examples']} examples, temperature {info['temperature']:.2f}, "
+                  f"validation accuracy {'-' if accuracy is None else f'{accuracy:.1%}'}")
+    else:
+        classifier = LocalClassifier.load(args.model)
+        print(f"Classifier {classifier.version}")
+        print_report(evaluate(classifier, load_records(args.data)))
+
+if __name__ == "__main__":
+    main()
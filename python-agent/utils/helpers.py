@@ -1,32 +1,71 @@
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List, NamedTuple, Optional
+
+class ContactMatch(NamedTuple):
+    kind: str  # "email", "phone" or "company"
+    value: str
+    start: int
+    end: int
+
+# Every repetition is bounded or anchored at the start of a run, so each match
+# attempt costs O(1) and a scan is linear in the text, however adversarial
+_EMAIL = (
+    r"(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]{1,64}@"
+    r"(?:[A-Za-z0-9-]{1,63}\.){1,8}[A-Za-z]{2,24}\b"
+)
+_PHONE = r"(?<![\w+])(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}(?!\d)"
+# One to five capitalised words, then a company suffix in any case ("Acme Corp", "Blue & Co")
+_COMPANY = (
+    r"(?<![\w&'-])(?:[A-Z][\w&'-]{0,40}[ \t]+(?:&[ \t]+)?){1,5}"
+    r"(?i:inc|llc|corp|corporation|ltd|company|co)\b"
+)
+# A company right after "at", "from" or "with" is preferred over one mentioned in passing
+_COMPANY_CUE = re.compile(r"\b(?:at|from|with)\s+$", re.IGNORECASE)
+_CUE_WINDOW = 16
+
+class ContactExtractor:
+    """Finds emails, phone numbers and company names in one pass over the text"""
+
+    def __init__(self):
+        self._pattern = re.compile(f"(?P<email>{_EMAIL})|(?P<phone>{_PHONE})|(?P<company>{_COMPANY})")
+
+    def find_all(self, text: str) -> List[ContactMatch]:
+        """Every candidate, in order of appearance"""
+        return [
+            ContactMatch(match.lastgroup, match.group(), match.start(), match.end())
+            for match in self._pattern.finditer(text)
+        ]
+
+    def extract(self, text: str) -> Dict[str, Optional[str]]:
+        """The first email and phone number, and the best company candidate"""
+        found: Dict[str, Optional[str]] = {"email": None, "phone": None, "company": None}
+        cued = False
+        for kind, value, start, _ in self.find_all(text):
+            if kind != "company":
+                found[kind] = found[kind] or value
+            elif not cued:
+                cued = bool(_COMPANY_CUE.search(text, max(start - _CUE_WINDOW, 0), start))
+                if cued or found["company"] is None:
+                    found["company"] = value
+        return found
+
+contact_extractor = ContactExtractor()
+
+def extract_contacts(text: str) -> Dict[str, Optional[str]]:
+    """Email, phone and company from text, in a single scan"""
+    return contact_extractor.extract(text)
 
 def extract_email(text: str) -> Optional[str]:
     """Extract email address from text"""
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    match = re.search(email_pattern, text)
-    return match.group(0) if match else None
+    return extract_contacts(text)["email"]
 
 def extract_phone(text: str) -> Optional[str]:
     """Extract phone number from text"""
-    phone_pattern = r'(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
-    match = re.search(phone_pattern, text)
-    return match.group(0) if match else None
+    return extract_contacts(text)["phone"]
 
 def extract_company_name(text: str) -> Optional[str]:
     """Extract company name from text (basic heuristic)"""
-    # Look for common company indicators
-    patterns = [
-        r'(?:at|from|with)\s+([A-Z][a-zA-Z\s&]+(?:Inc|LLC|Corp|Ltd|Company|Co))',
-        r'([A-Z][a-zA-Z\s&]+(?:Inc|LLC|Corp|Ltd))',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
-    
-    return None
+    return extract_contacts(text)["company"]
 
 def clean_text(text: str) -> str:
     """Clean and normalize text"""
@@ -0,0 +1,159 @@
+import json
+import re
+from typing import NamedTuple, Optional, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+from utils.logger import setup_logger
+from utils.metrics import PARSE_FAILURES, PARSE_REPAIRS
+
+logger = setup_logger(__name__)
+
+Model = TypeVar("Model", bound=BaseModel)
+
+# Balanced values tried before giving up, e.g. a "{placeholder}" in prose ahead of the answer
+MAX_CANDIDATES = 3
+
+# The only characters that change the scanner's state; everything else is skipped in C
+_STRUCTURAL = re.compile(r'["\\{}\[\]:,]')
+_OPENERS = {"{": "}", "[": "]"}
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_PYTHON_LITERALS = re.compile(r"\b(None|True|False)\b")
+_SMART_QUOTES = str.maketrans({"\u201c": '"', "\u201d": '"', "\u2018": "'", "\u2019": "'"})
+
+class JsonSpan(NamedTuple):
+    """Where the first JSON object or array in a text starts and ends.
+
+    When the text ends first (a response cut off at max_tokens), `closers`
+    are the brackets still open, innermost first, and `cut` is where an
+    unfinished key or trailing comma begins.
+    """
+    start: int
+    end: int
+    closers: str = ""
+    in_string: bool = False
+    cut: Optional[int] = None
+
+    @property
+    def complete(self) -> bool:
+        return not self.closers
+
+def find_json(text: str, start: int = 0) -> Optional[JsonSpan]:
+    """The first object/array at or after `start`, to its closing bracket, found in one pass; strings are respected"""
+    begin = min((i for i in (text.find("{", start), text.find("[", start)) if i >= 0), default=-1)
+    if begin < 0:
+        return None
+
+    stack = []
+    in_string = False
+    skip = -1
+    # Start of the last member that may be incomplete: after "{", "[" or ","
+    member = begin + 1
+    for match in _STRUCTURAL.finditer(text, begin):
+        i = match.start()
+        if i < skip:
+            continue
+        char = text[i]
+        if in_string:
+            if char == "\\":
+                skip = i + 2
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _OPENERS:
+            stack.append(_OPENERS[char])
+            member = i + 1
+        elif char == ",":
+            member = i
+        elif char == ":":
+            continue
+        elif char != stack[-1]:
+            # Mismatched bracket: returned as is, to fail validation and move the search on
+            return JsonSpan(begin, i + 1)
+        else:
+            stack.pop()
+            if not stack:
+                return JsonSpan(begin, i + 1)
+    return JsonSpan(begin, len(text), "".join(reversed(stack)), in_string, member)
+
+def repair_json(text: str, span: JsonSpan) -> str:
+    """One cheap rewrite of a span that failed to parse.
+
+    Curly quotes become straight, Python literals become JSON, single quotes
+    become double when there are none, trailing commas go, and a truncated
+    value is cut back to its last complete member and closed.
+    """
+    candidate = text[span.start:span.end]
+    if not span.complete:
+        tail = candidate[span.cut - span.start:]
+        # An unfinished string, or an object key without a value, is dropped
+        key_only = span.closers[0] == "}" and (":" not in tail or tail.rstrip().endswith(":"))
+        if span.in_string or key_only:
+            candidate = candidate[:span.cut - span.start]
+        candidate = candidate.rstrip().rstrip(",") + span.closers
+    candidate = candidate.translate(_SMART_QUOTES)
+    if '"' not in candidate:
+        candidate = candidate.replace("'", '"')
+    candidate = _PYTHON_LITERALS.sub(lambda m: {"None": "null", "True": "true", "False": "false"}[m.group(1)], candidate)
+    return _TRAILING_COMMA.sub(r"\1", candidate)
+
+def _loads_unfenced(text: str) -> Optional[object]:
+    """The whole response as JSON, inside an optional ``` fence, or None"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text[text.find("\n") + 1:] if "\n" in text else ""
+        text = text[:-3] if text.rstrip().endswith("```") else text
+        text = text.strip()
+    if text[:1] not in ("{", "["):
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+def _failure_reason(error: ValidationError) -> str:
+    return "invalid_json" if error.errors()[0]["type"] == "json_invalid" else "schema"
+
+def parse_response(stage: str, text: str, schema: Type[Model]) -> Optional[Model]:
+    """The first JSON value in a model response that validates against `schema`, or None.
+
+    Markdown fences and surrounding prose are skipped. When no candidate
+    validates, a truncated one (or else the first) gets a single repair
+    attempt; failures are counted per stage and reason (no_json, invalid_json, schema).
+    """
+    # Most responses are just the JSON value, perhaps fenced: try json.loads before scanning
+    value = _loads_unfenced(text)
+    if value is not None:
+        try:
+            return schema.model_validate(value)
+        except ValidationError:
+            pass
+
+    target: Optional[JsonSpan] = None
+    position = 0
+    for _ in range(MAX_CANDIDATES):
+        span = find_json(text, position)
+        if span is None:
+            break
+        if not span.complete:
+            target = span
+            break
+        target = target or span
+        try:
+            return schema.model_validate_json(text[span.start:span.end])
+        except ValidationError:
+            pass
+        # Also try values nested in this one, e.g. the array in {"requirements": [...]}
+        position = span.start + 1
+
+    if target is None:
+        reason = "no_json"
+    else:
+        try:
+            result = schema.model_validate_json(repair_json(text, target))
+            PARSE_REPAIRS.inc(stage=stage)
+            return result
+        except ValidationError as e:
+            reason = _failure_reason(e)
+    PARSE_FAILURES.inc(stage=stage, reason=reason)
+    logger.warning(f"Failed to parse {stage} response ({reason})", extra={"response": text})
+    return None
@@ -0,0 +1,138 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Inflections accepted after a single-word keyword ("need" also matches "needs", "needed")
+SUFFIXES = ("", "s", "es", "d", "ed", "ing")
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex alternation shaped as a prefix trie, which sre scans much faster than a flat list"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+_INFLECTION = "(?:" + "|".join(SUFFIXES[1:]) + r")?\b"
+
+def _word_pattern(words: Iterable[str]) -> str:
+    return r"\b" + _trie_pattern(words) + _INFLECTION
+
+def _combined_pattern(words: Iterable[str], phrases: Iterable[str], symbols: Iterable[str]) -> str:
+    """One alternation of every keyword: words and phrases behind a single leading \b, then symbols.
+
+    Phrases come before the words' trie, so at the same position the longer
+    keyword wins.
+    """
+    branches = [r"\s+".join(map(re.escape, phrase.split())) + r"\b" for phrase in phrases]
+    words = list(words)
+    if words:
+        branches.append(f"(?:{_trie_pattern(words)}){_INFLECTION}")
+    pattern = r"\b(?:" + "|".join(branches) + ")" if branches else ""
+    return "|".join(filter(None, [pattern, *map(re.escape, symbols)]))
+
+class KeywordMatcher:
+    """Keyword categories compiled once into one regex and matched in a single pass over the text.
+
+    Single words match on word boundaries (plus common inflections), phrases
+    match with any whitespace between their words, and symbols such as '$'
+    match literally. The text is lowercased once and scanned left to right;
+    `categories_in` and `first_category` stop as soon as the answer is known,
+    and `find` returns the span of every hit.
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        self.categories = {name: tuple(k.lower() for k in keywords) for name, keywords in categories.items()}
+
+        # Matched text (whitespace collapsed) -> categories it belongs to
+        self._owners: Dict[str, Set[str]] = {}
+        self._phrases: Dict[str, str] = {}
+        self._symbols: List[str] = []
+        words = set()
+        for name, keywords in self.categories.items():
+            for keyword in keywords:
+                if re.fullmatch(r"\w+", keyword):
+                    words.add(keyword)
+                    for suffix in SUFFIXES:
+                        self._owners.setdefault(keyword + suffix, set()).add(name)
+                    continue
+                self._owners.setdefault(keyword, set()).add(name)
+                if re.search(r"\w", keyword):
+                    self._phrases[keyword] = r"\b" + r"\s+".join(map(re.escape, keyword.split())) + r"\b"
+                else:
+                    self._symbols.append(keyword)
+        # A phrase match consumes its words, so it also counts for the single-word keywords inside it
+        for phrase in self._phrases:
+            for word in phrase.split():
+                self._owners[phrase] |= self._owners.get(word, set())
+
+        pattern = _combined_pattern(words, self._phrases, self._symbols)
+        self._pattern = re.compile(pattern) if pattern else None
+
+    def _scan(self, text: str) -> Iterator[Set[str]]:
+        """Yield the categories found so far each time another one is found"""
+        found: Set[str] = set()
+        if self._pattern is None:
+            return
+        for match in self._pattern.finditer(text.lower()):
+            owners = self._owners[" ".join(match.group(0).split())]
+            if not owners <= found:
+                found |= owners
+                yield found
+
+    def find(self, text: str) -> List[Tuple[str, int, int]]:
+        """Every keyword hit as (category, start, end) offsets into `text`, in text order"""
+        if self._pattern is None:
+            return []
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few letters (e.g. "İ") lowercase to two characters; match case-insensitively to keep offsets
+            lowered = text
+            pattern = re.compile(self._pattern.pattern, re.IGNORECASE)
+        else:
+            pattern = self._pattern
+        spans = []
+        for match in pattern.finditer(lowered):
+            owners = self._owners.get(" ".join(match.group(0).lower().split()), ())
+            spans.extend((name, match.start(), match.end()) for name in self.categories if name in owners)
+        return spans
+
+    def categories_in(self, text: str) -> Set[str]:
+        """Categories with at least one keyword in the text"""
+        found: Set[str] = set()
+        for found in self._scan(text):
+            if len(found) == len(self.categories):
+                break
+        return set(found)
+
+    def first_category(self, text: str) -> Optional[str]:
+        """The earliest-declared category present in the text, or None"""
+        order = list(self.categories)
+        found: Set[str] = set()
+        for found in self._scan(text):
+            if order[0] in found:
+                return order[0]
+        return next((name for name in order if name in found), None)
+
+    def category_pattern(self, name: str) -> re.Pattern:
+        """Regex matching any keyword of one category in lowercased text"""
+        words, others = [], []
+        for keyword in self.categories[name]:
+            if keyword in self._phrases:
+                others.append(self._phrases[keyword])
+            elif keyword in self._symbols:
+                others.append(re.escape(keyword))
+            else:
+                words.append(keyword)
+        if words:
+            others.insert(0, _word_pattern(words))
+        return re.compile("|".join(others))
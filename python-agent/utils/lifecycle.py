@@ -0,0 +1,60 @@
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+class Lifecycle:
+    """Readiness and in-flight work of this worker process.
+
+    The worker is ready once the lifespan startup has finished and stops
+    being ready when shutdown begins; `wait_idle` then lets in-flight
+    pipelines finish before the clients they use are closed.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+        self.in_flight = 0
+        self.started_at = time.time()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def mark_ready(self):
+        self.ready = True
+        self.draining = False
+
+    def begin_drain(self):
+        self.ready = False
+        self.draining = True
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Count a unit of work (one pipeline run) as in flight"""
+        self.in_flight += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            if self.in_flight == 0:
+                self._idle.set()
+
+    async def wait_idle(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for in-flight work to finish; True if it did"""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def stats(self) -> Dict:
+        return {
+            "pid": os.getpid(),
+            "ready": self.ready,
+            "draining": self.draining,
+            "in_flight": self.in_flight,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+        }
+
+lifecycle = Lifecycle()
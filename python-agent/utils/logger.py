@@ -1,20 +1,127 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
+import zlib
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
 from config import config
 
+# Id of the request being served, set by the HTTP middleware and added to every record
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed as `extra` and is logged as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+def _parse_sample_rates(value: str) -> Dict[str, float]:
+    """"utils.pipeline=0.1,services.llm=0.5" -> {logger name: share of INFO/DEBUG records kept}"""
+    rates = {}
+    for item in value.split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+def truncate(value: str, limit: int) -> str:
+    if limit <= 0 or len(value) <= limit:
+        return value
+    return f"{value[:limit]}... [{len(value) - limit} chars truncated]"
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request_id and any `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Keep a configured share of a module's records below WARNING.
+
+    Records of a request are kept or dropped together (by a hash of its id),
+    so a sampled request's log is complete.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.name)
+        if rate is None or rate >= 1:
+            return True
+        request_id = request_id_var.get()
+        if request_id:
+            return zlib.crc32(request_id.encode()) % 10000 < rate * 10000
+        return random.random() < rate
+
+class BackgroundQueueHandler(QueueHandler):
+    """Hands records to the listener thread, which formats and writes them.
+
+    The calling thread only renders the message (capped at LOG_MAX_FIELD_CHARS)
+    and any traceback; when the queue is full the record is dropped and
+    counted instead of blocking the event loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue, max_chars: int):
+        super().__init__(log_queue)
+        self.max_chars = max_chars
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = truncate(record.getMessage(), self.max_chars)
+        record.args = None
+        if record.exc_info:
+            record.exc_text = truncate(logging.Formatter().formatException(record.exc_info), self.max_chars * 4)
+            record.exc_info = None
+        record.request_id = request_id_var.get()
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and isinstance(value, str):
+                setattr(record, key, truncate(value, self.max_chars))
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def _build_output_handler() -> logging.Handler:
+    handler = logging.StreamHandler(sys.stdout)
+    if config.LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    return handler
+
+_queue: queue.Queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+queue_handler = BackgroundQueueHandler(_queue, config.LOG_MAX_FIELD_CHARS)
+queue_handler.addFilter(SamplingFilter(_parse_sample_rates(config.LOG_SAMPLE_RATES)))
+_listener = QueueListener(_queue, _build_output_handler())
+_listener.start()
+# Flush what is still queued when the process exits
+atexit.register(_listener.stop)
+
 def setup_logger(name: str = __name__) -> logging.Logger:
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, config.LOG_LEVEL))
-    
+
     if not logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setLevel(getattr(logging, config.LOG_LEVEL))
-        
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-    
-    return logger
+        logger.addHandler(queue_handler)
 
+    return logger
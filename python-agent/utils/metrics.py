@@ -0,0 +1,381 @@
+import bisect
+import copy
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Seconds; covers keyword stages (~1 ms) through long Whisper calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def state(self) -> list:
+        """This process's series, as JSON for other workers to merge"""
+        raise NotImplementedError
+
+    def _reset(self):
+        raise NotImplementedError
+
+    def _load(self, state: list):
+        raise NotImplementedError
+
+    def merged(self, states: Iterable[list]) -> "Metric":
+        """A copy holding the sum of the given states"""
+        total = copy.copy(self)
+        total._lock = threading.Lock()
+        total._reset()
+        for state in states:
+            total._load(state)
+        return total
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+    def state(self) -> list:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def _reset(self):
+        self._values = {}
+
+    def _load(self, state: list):
+        for key, value in state:
+            key = tuple(key)
+            self._values[key] = self._values.get(key, 0.0) + value
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (non-cumulative, last is +Inf), sum]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def state(self) -> list:
+        with self._lock:
+            return [[list(key), list(counts), total] for key, (counts, total) in self._series.items()]
+
+    def _reset(self):
+        self._series = {}
+
+    def _load(self, state: list):
+        for key, counts, total in state:
+            series = self._series.setdefault(tuple(key), [[0] * (len(self.buckets) + 1), 0.0])
+            series[0] = [a + b for a, b in zip(series[0], counts)]
+            series[1] += total
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class Registry:
+    """The process's metrics, optionally merged with other worker processes' on render.
+
+    With a shared directory (see `share`), each process writes a snapshot
+    of its series there every `flush_seconds` and when it renders, and a
+    scrape of any worker returns the sum over all of them. Counters and
+    histograms of exited workers stay in the sum, so totals never go
+    backwards; their gauges are dropped.
+    """
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.directory: Optional[str] = None
+        self._stop: Optional[threading.Event] = None
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def share(self, directory: str, flush_seconds: float = 5.0):
+        """Merge metrics with the other processes writing to `directory`"""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._stop = threading.Event()
+        self.flush()
+
+        def flush_periodically(stop: threading.Event):
+            while not stop.wait(flush_seconds):
+                self.flush()
+
+        threading.Thread(target=flush_periodically, args=(self._stop,), name="metrics-flush", daemon=True).start()
+
+    def unshare(self):
+        """Write a last snapshot and stop flushing"""
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+        if self.directory:
+            self.flush()
+            self.directory = None
+
+    def flush(self):
+        """Write this process's snapshot to the shared directory"""
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({metric.name: metric.state() for metric in self.metrics}, f)
+        os.replace(temporary, path)
+
+    def _snapshots(self) -> List[Tuple[bool, Dict[str, list]]]:
+        """(writer still alive, states by metric name) of every process's snapshot"""
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                with open(path) as f:
+                    states = json.load(f)
+            except (OSError, ValueError):
+                continue
+            pid = int(os.path.basename(path).split(".")[0])
+            snapshots.append((pid == os.getpid() or _alive(pid), states))
+        return snapshots
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        metrics = self.metrics
+        if self.directory:
+            self.flush()
+            snapshots = self._snapshots()
+            metrics = [
+                metric.merged(states.get(metric.name, []) for alive, states in snapshots
+                              if alive or metric.kind != "gauge")
+                for metric in self.metrics
+            ]
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+def reset_shared_metrics(directory: str):
+    """Remove every snapshot, so a new server starts its totals from zero"""
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.json*")):
+        os.remove(path)
+
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.register(Histogram(
+    "sales_agent_http_request_duration_seconds",
+    "Time to response headers per route",
+    ["method", "route", "status"],
+))
+STAGE_SECONDS = registry.register(Histogram(
+    "sales_agent_stage_duration_seconds",
+    "Wall time of each pipeline stage",
+    ["stage"],
+))
+STAGE_FAILURES = registry.register(Counter(
+    "sales_agent_stage_failures_total",
+    "Pipeline stages that raised",
+    ["stage"],
+))
+PROVIDER_SECONDS = registry.register(Histogram(
+    "sales_agent_provider_request_duration_seconds",
+    "Latency of Claude and Whisper requests",
+    ["provider", "stage"],
+))
+PROVIDER_ERRORS = registry.register(Counter(
+    "sales_agent_provider_errors_total",
+    "Claude and Whisper requests that raised",
+    ["provider", "stage"],
+))
+PROVIDER_RETRIES = registry.register(Counter(
+    "sales_agent_provider_retries_total",
+    "Provider requests retried after a transient failure",
+    ["provider"],
+))
+TOKENS = registry.register(Counter(
+    "sales_agent_tokens_total",
+    "Claude tokens consumed (input, output, cache_read, cache_write)",
+    ["stage", "direction"],
+))
+CLAUDE_REQUESTS = registry.register(Counter(
+    "sales_agent_claude_requests_total",
+    "Claude responses by prompt stage and the model that answered",
+    ["stage", "model"],
+))
+MODEL_ESCALATIONS = registry.register(Counter(
+    "sales_agent_model_escalations_total",
+    "Routed stages re-asked on the default model after a low-confidence answer",
+    ["stage"],
+))
+COST_USD = registry.register(Counter(
+    "sales_agent_cost_usd_total",
+    "Estimated Claude spend from token usage",
+    ["stage"],
+))
+COST_SAVED_USD = registry.register(Counter(
+    "sales_agent_prompt_cache_savings_usd_total",
+    "Estimated Claude spend avoided by prompt-cache reads",
+    ["stage"],
+))
+CACHE_LOOKUPS = registry.register(Counter(
+    "sales_agent_cache_lookups_total",
+    "Result cache lookups",
+    ["stage", "result"],
+))
+LOCAL_PREDICTIONS = registry.register(Counter(
+    "sales_agent_local_predictions_total",
+    "Local classifier predictions, answered locally or deferred to Claude as not confident enough",
+    ["head", "result"],
+))
+FALLBACKS = registry.register(Counter(
+    "sales_agent_fallbacks_total",
+    "Rule-based or default answers served in place of a provider response",
+    ["stage"],
+))
+PARSE_FAILURES = registry.register(Counter(
+    "sales_agent_parse_failures_total",
+    "Model responses with no JSON value that validates against the stage's schema",
+    ["stage", "reason"],
+))
+PARSE_REPAIRS = registry.register(Counter(
+    "sales_agent_parse_repairs_total",
+    "Model responses that validated only after repair",
+    ["stage"],
+))
+CACHE_ENTRIES = registry.register(Gauge(
+    "sales_agent_cache_entries",
+    "Entries in the in-memory result cache",
+))
+JOBS = registry.register(Gauge(
+    "sales_agent_jobs",
+    "Queued and running jobs",
+    ["state"],
+))
+LIVE_SESSIONS = registry.register(Gauge(
+    "sales_agent_live_sessions",
+    "Open /ai/live-call WebSocket sessions",
+))
+
+@contextmanager
+def track_provider(provider: str, stage: str) -> Iterator[None]:
+    """Time a provider request and count it as an error if it raises"""
+    try:
+        with PROVIDER_SECONDS.time(provider=provider, stage=stage):
+            yield
+    except Exception:
+        PROVIDER_ERRORS.inc(provider=provider, stage=stage)
+        raise
+
+# Stage timings of the request being served, for its Server-Timing header
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+def start_request_timings() -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+def record_timing(name: str, elapsed_ms: float):
+    """Add a timing to the current request's breakdown; a no-op outside a request"""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + elapsed_ms
+
+def server_timing_header(timings: Dict[str, float], total_ms: float) -> str:
+    entries = [f"{name};dur={elapsed:.1f}" for name, elapsed in timings.items()]
+    entries.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(entries)
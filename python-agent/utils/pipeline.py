@@ -0,0 +1,110 @@
+import asyncio
+import inspect
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from utils.lifecycle import lifecycle
+from utils.logger import setup_logger
+from utils.metrics import STAGE_FAILURES, STAGE_SECONDS, record_timing
+
+logger = setup_logger(__name__)
+
+async def gather_or_cancel(*coroutines: Awaitable) -> List[Any]:
+    """Like asyncio.gather, but the first failure cancels the rest, waits for them, and is raised as is"""
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    if not tasks:
+        return []
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    except BaseException:
+        # Cancelled from outside: take the tasks down with us
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    failed = [task for task in tasks if task in done and not task.cancelled() and task.exception() is not None]
+    if failed:
+        raise failed[0].exception()
+    return [task.result() for task in tasks]
+
+class Stage:
+    def __init__(self, name: str, func: Callable, depends_on: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+class StagePipeline:
+    """Dependency-aware stage runner.
+
+    Each stage is called with the results of its dependencies as keyword
+    arguments and starts as soon as those results are available.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Stage] = {}
+
+    def add(self, name: str, func: Callable, depends_on: Iterable[str] = ()) -> "StagePipeline":
+        """Register a stage; `func` may be sync or async"""
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        for dep in depends_on:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self.stages[name] = Stage(name, func, depends_on)
+        return self
+
+    async def run(self, on_stage_complete: Optional[Callable] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Run all stages, returning (results, per-stage timings in ms).
+
+        `on_stage_complete(name, result, elapsed_ms)` is called (and awaited
+        if async) as each stage finishes.
+        """
+        results: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: Stage) -> Any:
+            if stage.depends_on:
+                await asyncio.gather(*(tasks[dep] for dep in stage.depends_on))
+            kwargs = {dep: results[dep] for dep in stage.depends_on}
+
+            logger.info(f"Running stage: {stage.name}")
+            started = time.perf_counter()
+            try:
+                result = stage.func(**kwargs)
+                if inspect.isawaitable(result):
+                    result = await result
+            except Exception:
+                STAGE_FAILURES.inc(stage=stage.name)
+                raise
+            elapsed = time.perf_counter() - started
+            timings[stage.name] = round(elapsed * 1000, 2)
+            STAGE_SECONDS.observe(elapsed, stage=stage.name)
+            record_timing(stage.name, timings[stage.name])
+            logger.info(f"Finished stage: {stage.name}",
+                        extra={"stage": stage.name, "elapsed_ms": timings[stage.name]})
+
+            results[stage.name] = result
+            if on_stage_complete is not None:
+                notified = on_stage_complete(stage.name, result, timings[stage.name])
+                if inspect.isawaitable(notified):
+                    await notified
+            return result
+
+        # Stages are registered in dependency order, so every dependency
+        # task exists before the stages that wait on it are created.
+        with lifecycle.track():
+            for stage in self.stages.values():
+                tasks[stage.name] = asyncio.create_task(run_stage(stage))
+
+            try:
+                await asyncio.gather(*tasks.values())
+            except BaseException:
+                for task in tasks.values():
+                    task.cancel()
+                await asyncio.gather(*tasks.values(), return_exceptions=True)
+                raise
+
+        return results, timings
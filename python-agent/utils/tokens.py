@@ -0,0 +1,86 @@
+import re
+from typing import List
+
+# Words and individual punctuation marks; a word costs one token plus one per
+# further six characters, which tracks the Claude tokenizer within a few
+# percent on English prose and errs high on code and identifiers
+_PIECES = re.compile(r"\w+|[^\w\s]")
+CHARS_PER_EXTRA_TOKEN = 6
+
+# Sentence ends, and line breaks (bullet lists, speaker turns)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\s*\n\s*")
+
+def count_tokens(text: str) -> int:
+    """Local estimate of the Claude token count of `text`"""
+    return sum(1 + len(piece) // CHARS_PER_EXTRA_TOKEN for piece in _PIECES.findall(text))
+
+def _split_long(sentence: str, max_tokens: int) -> List[str]:
+    """Break a sentence that is over budget on its own at word boundaries"""
+    parts, current, used = [], [], 0
+    for word in sentence.split():
+        cost = count_tokens(word)
+        if current and used + cost > max_tokens:
+            parts.append(" ".join(current))
+            current, used = [], 0
+        current.append(word)
+        used += cost
+    if current:
+        parts.append(" ".join(current))
+    return parts
+
+def split_tokens(text: str, max_tokens: int, overlap_tokens: int = 0) -> List[str]:
+    """Split text at sentence boundaries into chunks of at most `max_tokens`.
+
+    Each chunk after the first repeats up to `overlap_tokens` of trailing
+    sentences from the previous one, so facts spanning a boundary survive.
+    """
+    sentences: List[tuple] = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        cost = count_tokens(sentence)
+        if cost > max_tokens:
+            sentences.extend((part, count_tokens(part)) for part in _split_long(sentence, max_tokens))
+        elif sentence:
+            sentences.append((sentence, cost))
+
+    chunks: List[str] = []
+    current: List[tuple] = []
+    used = 0
+    for sentence, cost in sentences:
+        if current and used + cost > max_tokens:
+            chunks.append(" ".join(s for s, _ in current))
+            # Carry trailing sentences into the next chunk as overlap
+            carried, carried_cost = [], 0
+            for previous, previous_cost in reversed(current):
+                if carried_cost + previous_cost > overlap_tokens or carried_cost + previous_cost + cost > max_tokens:
+                    break
+                carried.insert(0, (previous, previous_cost))
+                carried_cost += previous_cost
+            current, used = carried, carried_cost
+        current.append((sentence, cost))
+        used += cost
+    if current:
+        chunks.append(" ".join(s for s, _ in current))
+    return chunks
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Keep the opening and closing sentences of text within `max_tokens`.
+
+    Calls tend to open with names and context and close with commitments,
+    so the middle is what gets dropped.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    sentences = split_tokens(text, max(max_tokens // 8, 1))
+    head, tail = [], []
+    budget = max_tokens
+    while sentences:
+        for side, pick in ((head, 0), (tail, -1)):
+            if not sentences:
+                break
+            cost = count_tokens(sentences[pick])
+            if cost > budget:
+                sentences = []
+                break
+            side.append(sentences.pop(pick))
+            budget -= cost
+    return " ".join(head) + " [...] " + " ".join(reversed(tail))
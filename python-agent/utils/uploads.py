@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+import aiofiles
+from fastapi import HTTPException, UploadFile
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import NamedTuple, Set
+
+# Room for multipart boundaries, part headers and small form fields on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Uploads saved by this process and not yet removed
+_live_uploads: Set[str] = set()
+
+class UploadTooLargeError(Exception):
+    pass
+
+class SavedUpload(NamedTuple):
+    path: str
+    sha256: str
+    size: int
+
+def unique_upload_path(directory: str, filename: str = "") -> str:
+    """Collision-free temp path that keeps the original extension for format detection"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    if not re.fullmatch(r"\.[a-z0-9]{1,10}", extension):
+        extension = ""
+    return os.path.join(directory, f"upload_{uuid.uuid4().hex}{extension}")
+
+class UploadSizeLimitMiddleware:
+    """Reject multipart bodies larger than `max_size` plus MULTIPART_OVERHEAD before they are spooled.
+
+    Starlette parses the whole multipart body into temp files before a route
+    runs, so save_upload alone only checks the size afterwards. A declared
+    Content-Length over the limit gets a 413 without reading the body; a
+    chunked body is counted as it arrives and stopped at the limit.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int):
+        self.app = app
+        self.limit = max_size + MULTIPART_OVERHEAD
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._is_multipart(scope):
+            await self.app(scope, receive, send)
+            return
+        detail = f"Request body exceeds maximum size of {self.limit} bytes"
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > self.limit:
+            await self._reject(send, detail)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            if received > self.limit:
+                # FastAPI re-raises an HTTPException from body parsing as the response
+                raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    def _is_multipart(scope: Scope) -> bool:
+        return dict(scope["headers"]).get(b"content-type", b"").startswith(b"multipart/form-data")
+
+    @staticmethod
+    async def _reject(send: Send, detail: str):
+        body = json.dumps({"detail": detail}).encode()
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                                (b"connection", b"close")]})
+        await send({"type": "http.response.body", "body": body})
+
+async def save_upload(upload: UploadFile, directory: str, max_size: int, chunk_size: int) -> SavedUpload:
+    """Stream an upload to disk in fixed-size chunks, hashing as it goes.
+
+    Raises UploadTooLargeError as soon as more than `max_size` bytes have
+    been received; the partial file is removed.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = unique_upload_path(directory, upload.filename)
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(path, 'wb') as f:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(
+                        f"File exceeds maximum size of {max_size} bytes"
+                    )
+                digest.update(chunk)
+                await f.write(chunk)
+    except BaseException:
+        remove_quietly(path)
+        raise
+
+    _live_uploads.add(path)
+    return SavedUpload(path, digest.hexdigest(), size)
+
+async def save_bytes(data: bytes, directory: str, filename: str = "") -> str:
+    """Write an in-memory upload (e.g. a WebSocket audio frame) to a temp path"""
+    os.makedirs(directory, exist_ok=True)
+    path = unique_upload_path(directory, filename)
+    try:
+        async with aiofiles.open(path, 'wb') as f:
+            await f.write(data)
+    except BaseException:
+        remove_quietly(path)
+        raise
+    _live_uploads.add(path)
+    return path
+
+def remove_quietly(path: str):
+    """Delete a temp file, ignoring files that are already gone"""
+    _live_uploads.discard(path)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def remove_live_uploads(directory: str) -> int:
+    """Delete uploads this process saved directly in `directory` and never removed"""
+    directory = os.path.abspath(directory)
+    leftover = [path for path in _live_uploads if os.path.dirname(os.path.abspath(path)) == directory]
+    for path in leftover:
+        remove_quietly(path)
+    return len(leftover)
+
+def sweep_stale_uploads(directory: str, max_age_seconds: float) -> int:
+    """Delete upload files in `directory` older than `max_age_seconds`, e.g. left by a crashed worker"""
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.name.startswith("upload_") and entry.stat().st_mtime < cutoff:
+                remove_quietly(entry.path)
+                removed += 1
+        except OSError:
+            continue
+    return removed